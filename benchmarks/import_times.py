@@ -0,0 +1,99 @@
+"""Cold import time of each page, with a per-page budget.
+
+Each page's module-level imports are run in a fresh interpreter that has
+already imported streamlit (a running server always has), so the figure is
+what a page adds to a cold start: the sum of the `-X importtime` cumulative
+times of its direct imports. The budgets are milliseconds on a machine that
+imports streamlit in REFERENCE_STREAMLIT_MS; `allowed_ms` scales them by how
+long streamlit took in the same interpreter, so slower runners get more room.
+
+    python -m benchmarks.import_times            # report
+    python -m benchmarks.import_times --check    # also exit 1 if a page is over budget
+"""
+import argparse
+import ast
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = ["nutrack.py", *sorted(str(p.relative_to(ROOT)) for p in (ROOT / "pages").glob("*.py"))]
+
+# Cold import budget per page in milliseconds; pages not listed use DEFAULT_BUDGET_MS
+DEFAULT_BUDGET_MS = 800
+BUDGETS_MS = {
+    "nutrack.py": 150,
+    "pages/4_exercises.py": 150,
+}
+
+# streamlit's own cold import where the budgets were set, the yardstick for the runner's speed
+REFERENCE_STREAMLIT_MS = 400
+
+MARKER = "--- page imports ---"
+SECRETS = '[supabase]\nBACKEND = "sqlite"\nSQLITE_PATH = ":memory:"\n'
+
+def page_imports(page):
+    """Source of the page's module-level import statements; imports inside functions are already lazy"""
+    tree = ast.parse((ROOT / page).read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+def import_times(stderr):
+    """[(cumulative ms, module)] of the top-level imports in `-X importtime` output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("| imported package"):
+            continue
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  "):  # direct imports only; nested ones are included in their parent
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return modules
+
+def measure(page):
+    """Return (total ms, [(cumulative ms, module)] for the page's top-level imports, streamlit's import ms)"""
+    script = "\n".join([
+        "import sys, streamlit",
+        f"sys.stderr.write({MARKER!r} + '\\n')",
+        page_imports(page),
+    ])
+    # Pages read st.secrets at import, so run where a minimal secrets file exists
+    with tempfile.TemporaryDirectory() as cwd:
+        (Path(cwd) / ".streamlit").mkdir()
+        (Path(cwd) / ".streamlit" / "secrets.toml").write_text(SECRETS)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script], cwd=cwd, capture_output=True, text=True,
+            env={"PYTHONPATH": str(ROOT), "PATH": ""}
+        )
+    if result.returncode:
+        raise RuntimeError(f"{page}: imports failed\n{result.stderr[-2000:]}")
+    before, after = result.stderr.split(MARKER, 1)
+    streamlit_ms = sum(ms for ms, name in import_times(before) if name == "streamlit")
+    modules = sorted(import_times(after), reverse=True)
+    return sum(ms for ms, _ in modules), modules, streamlit_ms
+
+def allowed_ms(page, streamlit_ms, tolerance=1.0):
+    """The page's budget scaled to this runner's speed, never below the budget itself"""
+    budget = BUDGETS_MS.get(page, DEFAULT_BUDGET_MS)
+    return budget * max(1.0, streamlit_ms / REFERENCE_STREAMLIT_MS) * tolerance
+
+def main():
+    parser = argparse.ArgumentParser(description="Report each page's cold import time")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any page exceeds its budget")
+    parser.add_argument("--top", type=int, default=3, help="heaviest imports to list per page")
+    args = parser.parse_args()
+
+    over = []
+    for page in PAGES:
+        total, modules, streamlit_ms = measure(page)
+        budget = allowed_ms(page, streamlit_ms)
+        heaviest = ", ".join(f"{name} {ms:.0f}ms" for ms, name in modules[:args.top])
+        print(f"{page:32} {total:7.0f}ms / {budget:.0f}ms  {heaviest}")
+        if total > budget:
+            over.append(page)
+    if over:
+        print(f"Over import budget: {', '.join(over)}")
+        if args.check:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
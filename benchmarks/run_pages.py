@@ -0,0 +1,159 @@
+"""Per-page rerun benchmarks against a synthetic SQLite dataset.
+
+Each scenario loads a page through Streamlit's AppTest with cold caches and,
+for interaction scenarios, measures the rerun triggered by one user action.
+Wall time, peak traced memory and backend request count are recorded and
+compared with a stored baseline; a rerun over its page's declared query
+budget (see nutrack_trace.trace_page) also fails the run.
+
+    python -m benchmarks.synthetic bench.db
+    python -m benchmarks.run_pages bench.db --save-baseline --repeat 5   # record benchmarks/baseline.json
+    python -m benchmarks.run_pages bench.db                   # compare, exit 1 on regression
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import nutrack_sqlite
+from nutrack_trace import budget_violation
+from benchmarks.synthetic import BENCH_EMAIL, BENCH_USER_ID
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+def _widget(widgets, label):
+    return next(widget for widget in widgets if widget.label == label)
+
+def select_row(key, row=0):
+    def interact(at):
+        at.session_state[key] = {"selection": {"rows": [row], "columns": []}}
+    return interact
+
+def click(label):
+    def interact(at):
+        _widget(at.button, label).click()
+    return interact
+
+def type_text(label, text):
+    def interact(at):
+        _widget(at.text_input, label).input(text)
+    return interact
+
+# (name, page, interaction or None for a plain cold load)
+SCENARIOS = [
+    ("home: load", "nutrack.py", None),
+    ("foods: load", "pages/1_nutrack_food.py", None),
+    ("foods: search", "pages/1_nutrack_food.py", type_text("Search foods", "chicken")),
+    ("foods: next page", "pages/1_nutrack_food.py", click("Next")),
+    ("recipes: load", "pages/2_nutrack_recipes.py", None),
+    ("recipes: select recipe", "pages/2_nutrack_recipes.py", select_row("recipe_table")),
+    ("meals: load", "pages/3_meals.py", None),
+    ("meals: open meal history", "pages/3_meals.py", select_row("meal_table")),
+    ("meals: start meal", "pages/3_meals.py", click("Start Adding Foods")),
+    ("exercises: load", "pages/4_exercises.py", None),
+    ("workouts: load", "pages/5_workouts.py", None),
+    ("workouts: log exercise", "pages/5_workouts.py", click("Log Exercise")),
+    ("measurements: load", "pages/6_measurements.py", None),
+    ("measurements: load more history", "pages/6_measurements.py", click("Load more")),
+]
+
+def _app(page, db_path, latency_ms):
+    at = AppTest.from_file(str(ROOT / page), default_timeout=600)
+    at.secrets["supabase"] = {"BACKEND": "sqlite", "SQLITE_PATH": db_path, "LATENCY_MS": latency_ms}
+    user = SimpleNamespace(id=BENCH_USER_ID, email=BENCH_EMAIL)
+    at.session_state["user"] = user
+    at.session_state["session"] = SimpleNamespace(
+        access_token=f"sqlite-{BENCH_USER_ID}", refresh_token="bench", expires_at=int(time.time()) + 3600, user=user
+    )
+    return at
+
+def _measure(db_path, run):
+    requests_before = nutrack_sqlite.request_counts[db_path]
+    tracemalloc.start()
+    started = time.perf_counter()
+    at = run()
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    failures = [str(e.value) for e in at.exception]
+    trace = at.session_state["query_trace"] if "query_trace" in at.session_state else None
+    return {
+        "wall_s": round(wall, 4),
+        "peak_mb": round(peak / 2**20, 2),
+        "requests": nutrack_sqlite.request_counts[db_path] - requests_before,
+        "exceptions": failures,
+        "budget_violation": budget_violation(trace),
+    }
+
+def run_scenario(page, interaction, db_path, latency_ms=0):
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = _app(page, db_path, latency_ms)
+    if interaction is None:
+        return _measure(db_path, at.run)
+    at.run()
+
+    def rerun():
+        interaction(at)
+        return at.run()
+    return _measure(db_path, rerun)
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["requests"] > before["requests"]:
+            regressions.append(f"{name}: requests {before['requests']} -> {result['requests']}")
+        for metric in ("wall_s", "peak_mb"):
+            if result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {before[metric]} -> {result[metric]}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page reruns against a synthetic dataset")
+    parser.add_argument("db_path", help="SQLite database created by benchmarks.synthetic")
+    parser.add_argument("--latency-ms", type=int, default=0, help="simulated per-request latency")
+    parser.add_argument("--only", help="run scenarios whose name contains this text")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown before failing")
+    parser.add_argument("--repeat", type=int, default=1, help="run each scenario this many times and keep the fastest")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    db_path = str(Path(args.db_path).resolve())
+    results = {}
+    for name, page, interaction in SCENARIOS:
+        if args.only and args.only not in name:
+            continue
+        runs = [run_scenario(page, interaction, db_path, args.latency_ms) for _ in range(max(args.repeat, 1))]
+        result = results[name] = min(runs, key=lambda run: run["wall_s"])
+        print(f"{name:36} {result['wall_s']:8.3f}s {result['peak_mb']:9.1f}MB {result['requests']:6d} req"
+              + (f"  EXCEPTION: {result['exceptions'][0]}" if result["exceptions"] else "")
+              + (f"  OVER BUDGET: {result['budget_violation']}" if result["budget_violation"] else ""))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+    if args.baseline.exists():
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+    if any(result["exceptions"] or result["budget_violation"] for result in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Deterministic synthetic dataset for benchmarking the pages against the SQLite backend.
+
+    python -m benchmarks.synthetic bench.db --foods 50000 --recipes 5000 --meals 20000
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from nutrack_recipe_nutrition import rebuild_all
+from nutrack_rollup import rebuild
+from nutrack_sqlite import SQLiteClient
+
+BENCH_USER_ID = "00000000-0000-0000-0000-00000000b0b0"
+BENCH_EMAIL = "bench@nutrack.local"
+
+# Production-scale defaults; every size can be overridden from the command line
+SIZES = {
+    "foods": 50_000,
+    "recipes": 5_000,
+    "ingredients_per_recipe": 8,
+    "meals": 20_000,
+    "items_per_meal": 4,
+    "exercises": 200,
+    "workouts": 3_000,
+    "exercises_per_workout": 5,
+    "measurement_days": 5 * 365,
+}
+
+WORDS = [
+    "chicken", "breast", "thigh", "beef", "mince", "pork", "salmon", "tuna", "egg", "tofu",
+    "rice", "brown", "white", "basmati", "pasta", "bread", "wholemeal", "oats", "porridge", "granola",
+    "milk", "skimmed", "almond", "oat", "yogurt", "greek", "cheese", "cheddar", "butter", "olive",
+    "apple", "banana", "berries", "orange", "spinach", "broccoli", "carrot", "potato", "sweet", "bean",
+]
+MEAL_TYPES = ['Breakfast', 'Lunch', 'Dinner', 'Shake', 'Snack']
+CUSTOM_MEASUREMENTS = ["chest", "waist", "hips", "bicep_left", "bicep_right", "thigh_left", "thigh_right", "neck", "forearm"]
+
+def _timestamp(day, rng):
+    return datetime.combine(day, datetime.min.time()).replace(hour=rng.randrange(6, 22), minute=rng.randrange(60)).isoformat()
+
+def generate(path, sizes=None, seed=42):
+    """Create (or overwrite the tables of) a SQLite database filled with one user's synthetic history"""
+    sizes = {**SIZES, **(sizes or {})}
+    rng = random.Random(seed)
+    client = SQLiteClient(path)
+    with client._conn:
+        for table in ["user_profiles", "foods", "recipes", "recipe_ingredients", "meals", "meal_foods",
+                      "meal_recipes", "exercises", "workouts", "workout_exercises", "body_measurements",
+                      "custom_measurements", "daily_nutrition", "recipe_nutrition"]:
+            client._conn.execute(f'DELETE FROM "{table}"')
+            client._conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", [table])
+    today = date.today()
+
+    client.load_rows("user_profiles", [{"user_id": BENCH_USER_ID, "email": BENCH_EMAIL}])
+
+    foods = []
+    for food_id in range(1, sizes["foods"] + 1):
+        protein, carbs, fat = rng.uniform(0, 40), rng.uniform(0, 80), rng.uniform(0, 35)
+        foods.append({
+            "food_name": f"{' '.join(rng.sample(WORDS, 3))} {food_id}",
+            "protein": round(protein, 2), "carbohydrates": round(carbs, 2),
+            "sugars": round(carbs * rng.random(), 2), "fat": round(fat, 2),
+            "saturates": round(fat * rng.random(), 2), "fiber": round(rng.uniform(0, 12), 2),
+            "user_id": BENCH_USER_ID, "created_at": _timestamp(today, rng)
+        })
+    client.load_rows("foods", foods)
+
+    client.load_rows("recipes", [
+        {"recipe_name": f"{' '.join(rng.sample(WORDS, 2))} bowl {recipe_id}", "user_id": BENCH_USER_ID}
+        for recipe_id in range(1, sizes["recipes"] + 1)
+    ])
+    client.load_rows("recipe_ingredients", [
+        {"recipe_id": recipe_id, "food_id": rng.randrange(1, sizes["foods"] + 1),
+         "amount": round(rng.uniform(5, 250), 1), "user_id": BENCH_USER_ID}
+        for recipe_id in range(1, sizes["recipes"] + 1)
+        for _ in range(sizes["ingredients_per_recipe"])
+    ])
+
+    meals, meal_foods, meal_recipes = [], [], []
+    for meal_id in range(1, sizes["meals"] + 1):
+        day = today - timedelta(days=rng.randrange(sizes["measurement_days"]))
+        meals.append({"user_id": BENCH_USER_ID, "meal_desc": rng.choice(MEAL_TYPES), "created_at": _timestamp(day, rng)})
+        for _ in range(sizes["items_per_meal"]):
+            if rng.random() < 0.8 or not sizes["recipes"]:
+                meal_foods.append({"meal_id": meal_id, "food_id": rng.randrange(1, sizes["foods"] + 1),
+                                   "amount": round(rng.uniform(10, 300), 1), "user_id": BENCH_USER_ID})
+            else:
+                meal_recipes.append({"meal_id": meal_id, "recipe_id": rng.randrange(1, sizes["recipes"] + 1),
+                                     "amount": round(rng.uniform(100, 500), 1), "user_id": BENCH_USER_ID})
+    client.load_rows("meals", meals)
+    client.load_rows("meal_foods", meal_foods)
+    client.load_rows("meal_recipes", meal_recipes)
+
+    exercise_types = {}
+    exercises = []
+    for exercise_id in range(1, sizes["exercises"] + 1):
+        exercise_type = "cardio" if rng.random() < 0.25 else "strength"
+        exercise_types[exercise_id] = exercise_type
+        exercises.append({
+            "exercise_name": f"{rng.choice(['Barbell', 'Dumbbell', 'Cable', 'Machine', 'Outdoor'])} exercise {exercise_id}",
+            "exercise_type": exercise_type, "muscle_groups": ["chest"], "equipment": "barbell",
+            "user_id": BENCH_USER_ID
+        })
+    client.load_rows("exercises", exercises)
+
+    workouts, logs = [], []
+    for workout_id in range(1, sizes["workouts"] + 1):
+        day = today - timedelta(days=sizes["workouts"] - workout_id)
+        workouts.append({"user_id": BENCH_USER_ID, "workout_name": f"Session {workout_id}",
+                         "workout_date": day.isoformat(), "created_at": _timestamp(day, rng)})
+        for _ in range(sizes["exercises_per_workout"]):
+            exercise_id = rng.randrange(1, sizes["exercises"] + 1)
+            log = {"workout_id": workout_id, "exercise_id": exercise_id, "user_id": BENCH_USER_ID,
+                   "sets": None, "reps": None, "weight": None, "duration": None, "distance": None,
+                   "created_at": _timestamp(day, rng)}
+            if exercise_types[exercise_id] == "strength":
+                log.update(sets=rng.randrange(1, 6), reps=rng.randrange(3, 13), weight=round(rng.uniform(10, 150), 1))
+            else:
+                log.update(duration=round(rng.uniform(10, 60), 1), distance=round(rng.uniform(1, 15), 2))
+            logs.append(log)
+    client.load_rows("workouts", workouts)
+    client.load_rows("workout_exercises", logs)
+
+    body, custom = [], []
+    weight = 85.0
+    for offset in range(sizes["measurement_days"]):
+        day = today - timedelta(days=sizes["measurement_days"] - offset)
+        weight += rng.uniform(-0.3, 0.28)
+        body.append({"measurement_date": day.isoformat(), "weight": round(weight, 1),
+                     "body_fat_percentage": round(rng.uniform(12, 25), 1), "muscle_mass": round(weight * 0.45, 1),
+                     "user_id": BENCH_USER_ID})
+        for name in rng.sample(CUSTOM_MEASUREMENTS, 3):
+            custom.append({"body_measurement_id": offset + 1, "measurement_name": name,
+                           "measurement_value": round(rng.uniform(30, 110), 1), "unit": "cm",
+                           "user_id": BENCH_USER_ID})
+    client.load_rows("body_measurements", body)
+    client.load_rows("custom_measurements", custom)
+    rebuild(client, BENCH_USER_ID)
+    rebuild_all(client)
+    return sizes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="SQLite database file to (re)populate")
+    parser.add_argument("--seed", type=int, default=42)
+    for name, default in SIZES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    sizes = generate(args.path, {name: getattr(args, name) for name in SIZES}, seed=args.seed)
+    print(f"Generated {args.path} in {time.perf_counter() - started:.1f}s: {sizes}")
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,15 @@
+import os
 import streamlit as st
-from supabase import create_client, Client
+from datetime import date
+from nutrack_trace import trace_page
+from nutrack_utils import get_supabase, get_auth_client, sign_out, user_has_profile
 
-# Initialize Supabase client
-url: str = st.secrets["supabase"]["SUPABASE_URL"]
-key: str = st.secrets["supabase"]["SUPABASE_KEY"]
-supabase: Client = create_client(url, key)
-
-# Function to check if user has a profile
-def user_has_profile(user_id):
-    try:
-        supabase.postgrest.auth(st.session_state.session.access_token)
-        result = supabase.table('user_profiles').select('id').eq('user_id', user_id).execute()
-        return bool(result.data)
-    except Exception as e:
-        st.error(f"Profile check failed: {str(e)}")
-        return False
+supabase = get_supabase()
 
 # Function to insert user profile
 def insert_user_profile():
     try:
         user = st.session_state.user
-        supabase.postgrest.auth(st.session_state.session.access_token)
         response = supabase.table('user_profiles').insert({
             'user_id': user.id,
             'email': user.email
@@ -33,16 +22,62 @@ def insert_user_profile():
     except Exception as e:
         st.error(f"Profile creation error: {str(e)}")
 
+def discard_export():
+    """Delete the session's export file; runs once it has been downloaded"""
+    path = st.session_state.pop("export_path", None)
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def show_export():
+    """Build the account export into a temporary file on demand and offer it for download.
+
+    The file is deleted once downloaded; ones left behind by sessions that never
+    downloaded are swept after an hour by the next export. st.download_button
+    serves the file from memory, so exports over MAX_DOWNLOAD_BYTES are refused
+    and left to the command line export.
+    """
+    from nutrack_export import MAX_DOWNLOAD_BYTES, ExportTooLarge, export_to_tempfile, remove_stale_exports
+
+    with st.expander("Export your data"):
+        st.caption("Every table you own, as Parquet (for pandas, DuckDB, Spark...) or CSV, in one zip.")
+        fmt = st.radio("Format", ["parquet", "csv"], horizontal=True)
+        if st.button("Prepare Export"):
+            discard_export()
+            remove_stale_exports()
+            status = st.empty()
+            try:
+                path, counts = export_to_tempfile(
+                    supabase, fmt, user_id=st.session_state.user.id,
+                    progress=lambda table, rows: status.caption(f"Exporting {table}: {rows} rows"),
+                    max_bytes=MAX_DOWNLOAD_BYTES
+                )
+            except ExportTooLarge as e:
+                status.empty()
+                st.error(f"Export failed: {str(e)}, too large to download here. "
+                         "Ask for a command line export (python -m nutrack_export) instead.")
+                return
+            except Exception as e:
+                st.error(f"Export failed: {str(e)}")
+                return
+            status.caption(f"{sum(counts.values())} rows from {len(counts)} tables")
+            st.session_state.export_path = path
+        path = st.session_state.get("export_path")
+        if path and os.path.exists(path):
+            with open(path, "rb") as export_file:
+                # Streamlit copies the file into its in-memory media store here, hence MAX_DOWNLOAD_BYTES
+                st.download_button("Download Export", export_file, file_name=f"nutrack-export-{date.today()}.zip",
+                                   mime="application/zip", on_click=discard_export)
+
 # Main app logic
 def main():
+    trace_page("nutrack.py", budget=1)
     st.write("# Welcome to Nutrack 🥗")
 
     with st.sidebar:
         if "user" in st.session_state:
             st.write(f"Logged in as: {st.session_state.user.email}")
             if st.button("Logout"):
-                supabase.auth.sign_out()
-                st.session_state.clear()
+                sign_out()
                 st.rerun()
         else:
             st.write("Not logged in")
@@ -56,14 +91,14 @@ def main():
 
                 if st.form_submit_button("Continue"):
                     try:
+                        auth_client = get_auth_client()
                         if action == "Sign Up":
-                            response = supabase.auth.sign_up({"email": email, "password": password})
+                            response = auth_client.auth.sign_up({"email": email, "password": password})
                         else:
-                            response = supabase.auth.sign_in_with_password({"email": email, "password": password})
+                            response = auth_client.auth.sign_in_with_password({"email": email, "password": password})
 
                         st.session_state.user = response.user
                         st.session_state.session = response.session
-                        supabase.postgrest.auth(response.session.access_token)
                         st.rerun()
 
                     except Exception as e:
@@ -78,6 +113,7 @@ def main():
                     insert_user_profile()
         else:
             st.success("✅ Profile complete! Explore nutritional tracking and meal planning features using the sidebar.")
+            show_export()
 
 if __name__ == "__main__":
     main()
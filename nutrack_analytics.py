@@ -0,0 +1,212 @@
+"""Strength analytics over a user's exercise log: estimated 1RM, tonnage, weekly volume and personal records.
+
+Everything is derived with vectorized pandas over the full log once, then
+kept in a per-user cache. A set logged on the Workouts page is applied with
+record_log(), which updates only its exercise's week and records in place,
+so the progress charts stay instant however many sessions have been logged.
+"""
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from nutrack_utils import MAX_CONCURRENT_READS, fetch_all
+
+LOG_COLUMNS = ["workout_exercise_id", "workout_id", "exercise_id", "sets", "reps", "weight"]
+WEEKLY_COLS = ["sets", "reps", "tonnage", "best_e1rm", "top_weight"]
+RECORD_COLS = ["exercise_id", "day", "workout_exercise_id", "weight", "reps", "e1rm", "previous_e1rm"]
+
+def epley(weight, reps):
+    """Estimated one-rep max, weight × (1 + reps / 30); a single is its own 1RM"""
+    weight, reps = np.asarray(weight, dtype=np.float64), np.asarray(reps, dtype=np.float64)
+    return np.where(reps <= 1, weight, weight * (1 + reps / 30))
+
+def week_start(days):
+    """Monday of each date's week"""
+    days = pd.to_datetime(days)
+    return days - pd.to_timedelta(days.dt.weekday, unit="D")
+
+def _strength_rows(logs):
+    """Logs with reps and weight, plus day, week, e1rm and tonnage, sorted by exercise, day and id.
+
+    sets defaults to 1; cardio rows and sets without a weight are left out.
+    """
+    logs = logs[(logs["reps"] > 0) & (logs["weight"] > 0)]
+    sets = logs["sets"].fillna(1).clip(lower=1)
+    logs = logs.assign(
+        sets=sets,
+        e1rm=epley(logs["weight"], logs["reps"]),
+        tonnage=sets * logs["reps"] * logs["weight"],
+        week=week_start(logs["day"]),
+    )
+    return logs.sort_values(["exercise_id", "day", "workout_exercise_id"], ignore_index=True)
+
+def _weekly(logs):
+    return logs.assign(reps=logs["sets"] * logs["reps"]).groupby(["exercise_id", "week"]).agg(
+        sets=("sets", "sum"), reps=("reps", "sum"), tonnage=("tonnage", "sum"),
+        best_e1rm=("e1rm", "max"), top_weight=("weight", "max"),
+    )
+
+def _records(logs):
+    """Logs whose e1rm beats every earlier log of the same exercise; an exercise's first log sets the baseline"""
+    by_exercise = logs.groupby("exercise_id", sort=False)
+    previous = by_exercise["e1rm"].cummax().groupby(logs["exercise_id"], sort=False).shift()
+    beaten = logs["e1rm"] > previous
+    return logs.loc[beaten].assign(previous_e1rm=previous[beaten])[RECORD_COLS].reset_index(drop=True)
+
+class StrengthAnalytics:
+    """Per-exercise estimated 1RM, tonnage, weekly volume and personal records for one user's log.
+
+    Built in one vectorized pass from the raw log rows (workout_exercise_id,
+    exercise_id, day, sets, reps, weight). add() applies a single new log with
+    scalar updates to its week and its exercise's best; only a backdated log,
+    which may demote later records, re-derives that exercise's records.
+    """
+
+    def __init__(self, logs):
+        self._logs = _strength_rows(logs)
+        self._pending = []  # rows added since _logs was last rebuilt
+        self.weekly = _weekly(self._logs)
+        self.records = _records(self._logs)
+        latest = self._logs.groupby("exercise_id").tail(1)
+        self._latest = dict(zip(latest["exercise_id"], zip(latest["day"], latest["workout_exercise_id"])))
+        self._best = self._logs.groupby("exercise_id")["e1rm"].max().to_dict()
+        self._lock = threading.Lock()
+
+    @property
+    def empty(self):
+        return self.weekly.empty
+
+    def exercise_summary(self):
+        """One row per exercise: best e1RM, heaviest weight, total tonnage, weeks trained, PR count and last PR"""
+        with self._lock:
+            summary = self.weekly.groupby(level="exercise_id").agg(
+                best_e1rm=("best_e1rm", "max"), top_weight=("top_weight", "max"),
+                tonnage=("tonnage", "sum"), weeks=("tonnage", "size"),
+            )
+            records = self.records.groupby("exercise_id")["day"].agg(["size", "max"])
+        summary["records"] = records["size"].reindex(summary.index, fill_value=0)
+        summary["last_record"] = records["max"].reindex(summary.index)
+        return summary.reset_index()
+
+    def exercise_weeks(self, exercise_id):
+        """Weekly totals for one exercise, weeks without a log included as zero volume"""
+        with self._lock:
+            if exercise_id not in self._best:
+                return pd.DataFrame(columns=["week", *WEEKLY_COLS])
+            weeks = self.weekly.xs(exercise_id, level="exercise_id")
+        every_week = pd.date_range(weeks.index.min(), weeks.index.max(), freq="7D", name="week")
+        weeks = weeks.reindex(every_week)
+        weeks[["sets", "reps", "tonnage"]] = weeks[["sets", "reps", "tonnage"]].fillna(0)
+        return weeks.reset_index()
+
+    def weekly_volume(self):
+        """Tonnage over all exercises per week"""
+        with self._lock:
+            return self.weekly.groupby(level="week")["tonnage"].sum().reset_index()
+
+    def exercise_records(self, exercise_id):
+        with self._lock:
+            return self.records[self.records["exercise_id"] == exercise_id]
+
+    def add(self, workout_exercise_id, exercise_id, day, sets, reps, weight):
+        """Apply one just-logged row; returns its record row as a dict if it set a PR, else None"""
+        with self._lock:
+            if not (reps and weight and reps > 0 and weight > 0):
+                return None
+            sets = max(sets or 1, 1)
+            day = pd.Timestamp(day)
+            e1rm = float(epley(weight, reps))
+            self._add_to_week(exercise_id, day - pd.Timedelta(days=day.weekday()), sets, reps, weight, e1rm)
+            self._pending.append({"workout_exercise_id": workout_exercise_id, "exercise_id": exercise_id, "day": day,
+                                  "sets": sets, "reps": reps, "weight": weight})
+
+            best = self._best.get(exercise_id)
+            self._best[exercise_id] = e1rm if best is None else max(best, e1rm)
+            latest = self._latest.get(exercise_id)
+            if latest is not None and (day, workout_exercise_id) < latest:
+                # Backdated: later records may no longer beat everything before them
+                logs = self._all_logs()
+                records = _records(logs[logs["exercise_id"] == exercise_id])
+                self.records = pd.concat([self.records[self.records["exercise_id"] != exercise_id], records],
+                                         ignore_index=True)
+                new = records[records["workout_exercise_id"] == workout_exercise_id]
+                return new.iloc[0].to_dict() if len(new) else None
+            self._latest[exercise_id] = (day, workout_exercise_id)
+            if best is None or e1rm <= best:
+                return None
+            record = {"exercise_id": exercise_id, "day": day, "workout_exercise_id": workout_exercise_id,
+                      "weight": weight, "reps": reps, "e1rm": e1rm, "previous_e1rm": best}
+            self.records = pd.concat([self.records, pd.DataFrame([record], columns=RECORD_COLS)], ignore_index=True)
+            return record
+
+    def _add_to_week(self, exercise_id, week, sets, reps, weight, e1rm):
+        key = (exercise_id, week)
+        if key in self.weekly.index:
+            current = self.weekly.loc[key]
+            self.weekly.loc[key, WEEKLY_COLS] = [
+                current["sets"] + sets, current["reps"] + sets * reps, current["tonnage"] + sets * reps * weight,
+                max(current["best_e1rm"], e1rm), max(current["top_weight"], weight),
+            ]
+        else:
+            row = pd.DataFrame([[sets, sets * reps, sets * reps * weight, e1rm, weight]], columns=WEEKLY_COLS,
+                               index=pd.MultiIndex.from_tuples([key], names=["exercise_id", "week"]))
+            self.weekly = pd.concat([self.weekly, row]).sort_index()
+
+    def _all_logs(self):
+        if self._pending:
+            self._logs = pd.concat([self._logs, _strength_rows(pd.DataFrame(self._pending))], ignore_index=True)
+            self._logs = self._logs.sort_values(["exercise_id", "day", "workout_exercise_id"], ignore_index=True)
+            self._pending = []
+        return self._logs
+
+def load_strength_log(client, user_id, workouts_df):
+    """Build StrengthAnalytics from every workout_exercises row of the user, dated through the loaded workouts"""
+    rows = fetch_all("workout_exercises", ", ".join(LOG_COLUMNS), client=client, filters={"user_id": user_id},
+                     prefetch=MAX_CONCURRENT_READS)
+    logs = pd.DataFrame(rows, columns=LOG_COLUMNS)
+    logs[["sets", "reps", "weight"]] = logs[["sets", "reps", "weight"]].astype(np.float64)
+    days = workout_days(workouts_df)
+    logs["day"] = logs["workout_id"].map(days)
+    return StrengthAnalytics(logs.dropna(subset=["day"]).drop(columns="workout_id"))
+
+def workout_days(workouts_df):
+    """workout_id -> workout date as a Series, falling back to the day the workout was created"""
+    if workouts_df.empty:
+        return pd.Series(dtype="datetime64[ns]")
+    days = workouts_df["workout_date"].fillna(workouts_df["created_at"].str[:10])
+    return pd.Series(pd.to_datetime(days.to_numpy()), index=workouts_df["workout_id"].to_numpy())
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _cached_analytics(user_id):
+    return SimpleNamespace(analytics=None, log_count=None)
+
+def get_strength_analytics(client, workouts_df, log_count=None):
+    """Return the user's cached StrengthAnalytics.
+
+    log_count is the user's total number of exercise logs (from
+    get_workout_stats). The cache keeps the count it was built at, plus one per
+    record_log(), and is rebuilt when log_count no longer matches, i.e. after
+    writes that did not go through record_log(). The analytics' own rows are
+    not counted for this: logs without a loaded workout are left out of them.
+    """
+    cached = _cached_analytics(st.session_state.user.id)
+    if cached.analytics is None or (log_count is not None and cached.log_count != log_count):
+        cached.analytics = load_strength_log(client, st.session_state.user.id, workouts_df)
+        cached.log_count = log_count
+    return cached.analytics
+
+def record_log(workout_exercise_id, exercise_id, day, sets, reps, weight):
+    """Apply a just-inserted exercise log to the cached analytics; returns its PR record or None"""
+    cached = _cached_analytics(st.session_state.user.id)
+    if cached.analytics is None:
+        return None
+    if cached.log_count is not None:
+        cached.log_count += 1
+    return cached.analytics.add(workout_exercise_id, exercise_id, day, sets, reps, weight)
+
+def invalidate_strength_analytics():
+    """Drop the cached analytics, e.g. after a bulk import; the next read rebuilds them"""
+    _cached_analytics(st.session_state.user.id).analytics = None
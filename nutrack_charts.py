@@ -0,0 +1,76 @@
+"""Progress charts for long time series.
+
+Series are downsampled server-side with Largest-Triangle-Three-Buckets before
+they reach Plotly, so the websocket payload and browser work stay bounded
+however many years of data a user has. Above WEBGL_THRESHOLD points the
+traces are drawn with WebGL instead of SVG.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+MAX_POINTS = 500  # points per trace after downsampling
+WEBGL_THRESHOLD = 1000  # raw points above which traces render with WebGL
+MARKER_THRESHOLD = 60  # only draw point markers on sparse series
+
+def lttb(x, y, threshold):
+    """Indices of the `threshold` points Largest-Triangle-Three-Buckets keeps from (x, y).
+
+    x must be sorted. The first and last points are always kept; every other
+    bucket keeps the point forming the largest triangle with the previously
+    kept point and the next bucket's average.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # threshold - 2 buckets over the inner points, then a final bucket of just the last point
+    edges = np.append(np.linspace(1, n - 1, threshold - 1).astype(np.int64), n)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        keep[bucket + 1] = a
+    return keep
+
+def downsample(series, max_points=MAX_POINTS):
+    """LTTB-downsample a Series indexed by a sorted DatetimeIndex"""
+    keep = lttb(series.index.asi8, series.to_numpy(), max_points)
+    return series.iloc[keep]
+
+def rolling_mean(series, days):
+    """Time-based rolling mean over the previous `days` days, robust to gaps in logging"""
+    return series.rolling(f"{days}D").mean()
+
+def progress_chart(df, x, y, title, y_title, rolling_days=None, max_points=MAX_POINTS):
+    """Line chart of df[y] over the dates in df[x], downsampled, with an optional rolling average"""
+    import plotly.graph_objects as go  # only loaded once a chart is actually drawn
+
+    series = df.set_index(pd.to_datetime(df[x]))[y].dropna().sort_index()
+    trace = go.Scattergl if len(series) > WEBGL_THRESHOLD else go.Scatter
+    shown = downsample(series, max_points)
+    fig = go.Figure(trace(
+        x=shown.index, y=shown.to_numpy(), name=y_title,
+        mode="lines+markers" if len(shown) <= MARKER_THRESHOLD else "lines"
+    ))
+    if rolling_days:
+        # Smooth the full series first so the average is not skewed by which points survived downsampling
+        smoothed = downsample(rolling_mean(series, rolling_days), max_points)
+        fig.add_trace(trace(
+            x=smoothed.index, y=smoothed.to_numpy(), name=f"{rolling_days}-day average",
+            mode="lines", line={"dash": "dash"}
+        ))
+    fig.update_layout(title=title, xaxis_title="Date", yaxis_title=y_title, showlegend=bool(rolling_days))
+    return fig, len(shown), len(series)
+
+def show_progress_chart(df, x, y, title, y_title, rolling_days=None):
+    fig, shown, total = progress_chart(df, x, y, title, y_title, rolling_days)
+    st.plotly_chart(fig, use_container_width=True)
+    if shown < total:
+        st.caption(f"Showing {shown} of {total} points, downsampled to keep the chart's shape")
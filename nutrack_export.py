@@ -0,0 +1,229 @@
+"""Full-account export: every user-owned table as Parquet or CSV inside one zip.
+
+Tables are read with nutrack_utils.iter_pages (primary key > last seen,
+ordered by the key), so each request is an index range scan however deep the export
+gets, and every page goes straight into the open archive entry as one Parquet
+row group or CSV chunk before the next is fetched. Memory stays at one page;
+the archive itself is written to a file, never held in memory. The in-app
+download is the exception: st.download_button reads the file into the
+server's memory to serve it, so exports for the app are capped at
+MAX_DOWNLOAD_BYTES and larger accounts are pointed to the command line.
+
+    python -m nutrack_export account.zip --user <user id> --sqlite nutrack.db
+    SUPABASE_URL=... SUPABASE_SERVICE_KEY=... python -m nutrack_export all.zip --format csv
+
+user_id limits the export to rows that user owns; the app always passes the
+signed-in user, so foods or recipes shared with them are not included. Child
+tables (CHILD_TABLES) are read through the ids of the parent rows just
+exported rather than their own user_id, which older rows may not carry, so
+the export also holds the parents' ids in memory.
+Tables with no rows are left out of the zip and listed with 0 in the manifest.
+"""
+import argparse
+import csv
+import glob
+import io
+import itertools
+import json
+import os
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timezone
+
+from nutrack_utils import PRIMARY_KEYS, iter_pages
+
+# In an order where referenced tables come first; primary keys are in nutrack_utils.PRIMARY_KEYS
+EXPORT_TABLES = [
+    "foods",
+    "recipes",
+    "recipe_ingredients",
+    "meals",
+    "meal_foods",
+    "meal_recipes",
+    "exercises",
+    "workouts",
+    "workout_exercises",
+    "body_measurements",
+    "custom_measurements",
+]
+# Child table -> (parent table, foreign key); with a user_id these are exported by their parents' ids
+CHILD_TABLES = {
+    "recipe_ingredients": ("recipes", "recipe_id"),
+    "meal_foods": ("meals", "meal_id"),
+    "meal_recipes": ("meals", "meal_id"),
+    "workout_exercises": ("workouts", "workout_id"),
+    "custom_measurements": ("body_measurements", "body_measurement_id"),
+}
+FORMATS = ("parquet", "csv")
+TEMP_PREFIX = "nutrack-export-"
+MAX_DOWNLOAD_BYTES = 200 * 2**20  # st.download_button holds the whole file in server memory until it is served
+
+class ExportTooLarge(ValueError):
+    """Raised by export_to_tempfile once the archive grows past max_bytes"""
+
+def _text(value):
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+def _write_csv(entry, pages):
+    out = io.TextIOWrapper(entry, encoding="utf-8", newline="")
+    writer, count = None, 0
+    for rows in pages:
+        if writer is None:
+            writer = csv.DictWriter(out, fieldnames=list(rows[0]), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerows({column: _text(value) for column, value in row.items()} for row in rows)
+        count += len(rows)
+    out.flush()
+    out.detach()
+    return count
+
+def _arrow_type(column, value):
+    import pyarrow as pa
+
+    if isinstance(value, bool):
+        return pa.bool_()
+    if isinstance(value, int) and (column.endswith("_id") or column in ("sets", "reps", "meal_count")):
+        return pa.int64()
+    if isinstance(value, (int, float)):
+        return pa.float64()
+    return pa.string()
+
+def _page_schema(rows):
+    """Arrow schema from a page: each column typed by its first non-null value. Columns empty on the
+    whole first page are written as strings, since a Parquet file's schema cannot change midway."""
+    import pyarrow as pa
+
+    fields = []
+    for column in rows[0]:
+        value = next((row[column] for row in rows if row.get(column) is not None), None)
+        fields.append(pa.field(column, _arrow_type(column, value)))
+    return pa.schema(fields)
+
+def _coerce(rows, schema):
+    import pyarrow as pa
+
+    text = {field.name for field in schema if field.type == pa.string()}
+    return [
+        {column: (str(_text(row.get(column))) if column in text and row.get(column) is not None else row.get(column))
+         for column in schema.names}
+        for row in rows
+    ]
+
+def _write_parquet(entry, pages):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer, schema, count = None, None, 0
+    for rows in pages:
+        if writer is None:
+            schema = _page_schema(rows)
+            writer = pq.ParquetWriter(entry, schema, compression="zstd")
+        writer.write_table(pa.Table.from_pylist(_coerce(rows, schema), schema=schema))  # one row group per page
+        count += len(rows)
+    if writer is not None:
+        writer.close()
+    return count
+
+def _owned_pages(client, table, user_id, parent_ids):
+    """Pages of the user's rows of `table`: a child table's rows by its parents' ids, others by user_id"""
+    if user_id is None:
+        yield from iter_pages(table, client=client)
+        return
+    parent = CHILD_TABLES.get(table)
+    if parent is None or parent[0] not in parent_ids:
+        yield from iter_pages(table, client=client, filters={"user_id": user_id})
+        return
+    from nutrack_rollup import ID_CHUNK
+
+    ids = parent_ids[parent[0]]
+    for start in range(0, len(ids), ID_CHUNK):
+        yield from iter_pages(table, client=client, in_={parent[1]: ids[start:start + ID_CHUNK]})
+
+def export_account(client, target, fmt="parquet", user_id=None, tables=None, progress=None):
+    """Write the export zip to `target` (a path or binary file). Returns {table: rows exported}.
+
+    progress(table, rows so far) is called after every page.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    write = _write_parquet if fmt == "parquet" else _write_csv
+    tables = tables or EXPORT_TABLES
+    parents = {parent for child, (parent, _) in CHILD_TABLES.items() if child in tables}
+    parent_ids = {}  # parent table -> ids of its exported rows, for reading its children
+    counts = {}
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED if fmt == "csv" else zipfile.ZIP_STORED) as archive:
+        for table in tables:
+            if user_id is not None and table in parents:
+                parent_ids[table] = []
+
+            def pages(table=table):
+                exported = 0
+                for rows in _owned_pages(client, table, user_id, parent_ids):
+                    if table in parent_ids:
+                        parent_ids[table] += [row[PRIMARY_KEYS[table]] for row in rows]
+                    exported += len(rows)
+                    if progress:
+                        progress(table, exported)
+                    yield rows
+            table_pages = pages()
+            first = next(table_pages, None)
+            if first is None:
+                # An empty table has no columns to build a header or Parquet schema from
+                counts[table] = 0
+                continue
+            with archive.open(f"{table}.{fmt}", "w", force_zip64=True) as entry:
+                counts[table] = write(entry, itertools.chain([first], table_pages))
+        archive.writestr("manifest.json", json.dumps({
+            "exported_at": datetime.now(timezone.utc).isoformat(), "format": fmt, "user_id": user_id, "rows": counts
+        }, indent=2))
+    return counts
+
+def export_to_tempfile(client, fmt="parquet", user_id=None, progress=None, max_bytes=None):
+    """Export into a new temporary .zip file; returns (path, counts). The caller deletes the file.
+
+    With max_bytes the export stops with ExportTooLarge as soon as the file
+    grows past it, checked after every page, and the partial file is removed.
+    """
+    with tempfile.NamedTemporaryFile(prefix=TEMP_PREFIX, suffix=".zip", delete=False) as handle:
+        def on_page(table, rows):
+            if max_bytes is not None and os.fstat(handle.fileno()).st_size > max_bytes:
+                raise ExportTooLarge(f"the export is over {max_bytes // 2**20} MB")
+            if progress:
+                progress(table, rows)
+        try:
+            counts = export_account(client, handle, fmt, user_id, progress=on_page)
+        except Exception:
+            handle.close()
+            os.remove(handle.name)
+            raise
+    return handle.name, counts
+
+def remove_stale_exports(max_age_s=3600):
+    """Delete temporary export files older than max_age_s, e.g. ones whose session ended before downloading"""
+    cutoff = time.time() - max_age_s
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), f"{TEMP_PREFIX}*.zip")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass  # already removed by another session
+
+# --- Command line ---
+def main():
+    from nutrack_rollup import client_from_args
+
+    parser = argparse.ArgumentParser(description="Export every user-owned table to a zip of Parquet or CSV files")
+    parser.add_argument("path", help="zip file to write")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--user", help="only rows owned by this user id")
+    parser.add_argument("--sqlite", help="export a SQLite database instead of Supabase")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = export_account(client_from_args(args), args.path, args.format, args.user)
+    total = sum(counts.values())
+    print(f"{total} rows from {len(counts)} tables in {time.perf_counter() - started:.1f}s -> {args.path}")
+
+if __name__ == "__main__":
+    main()
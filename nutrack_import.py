@@ -0,0 +1,223 @@
+"""Bulk import of foods from CSV or JSON lines, e.g. a nutrition database export.
+
+The input is read in chunks, so the file itself is never held in memory.
+What does grow is the name index used for deduplication: one entry per food
+in the catalog plus one per food added, so memory is the chunk size plus
+the size of the catalog. Each chunk is cleaned with vectorized pandas
+operations: names are trimmed and keyed case- and whitespace-insensitively,
+macros are coerced to numbers per 100 g and rows that cannot be right are
+rejected. Rows whose key matches a food already in the catalog (or earlier
+in the file) are skipped, or update that food's macros with
+on_duplicate="update"; the stored name is kept. Writes go out in
+fixed-size batches.
+
+    python -m nutrack_import foods.csv --sqlite nutrack.db
+    SUPABASE_URL=... SUPABASE_SERVICE_KEY=... python -m nutrack_import foods.jsonl --on-duplicate update
+
+Updated foods change the recipes and days that use them, so
+apply_food_changes() refreshes recipe_nutrition and the daily rollup after.
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from nutrack_nutrition import MACRO_COLS
+from nutrack_recipe_nutrition import refresh_for_foods
+from nutrack_rollup import client_from_args, recompute_shared, select_in
+from nutrack_utils import fetch_all
+
+FOOD_COLUMNS = ["food_name", *MACRO_COLS]
+CHUNK_SIZE = 10_000  # rows parsed and validated at a time
+BATCH_SIZE = 500  # rows per insert/upsert request
+MAX_NAME_LENGTH = 200
+
+# Header spellings seen in common exports -> our column names
+COLUMN_ALIASES = {
+    "name": "food_name", "food": "food_name", "description": "food_name",
+    "proteins": "protein", "carbs": "carbohydrates", "carbohydrate": "carbohydrates",
+    "sugar": "sugars", "fats": "fat", "total_fat": "fat",
+    "saturated_fat": "saturates", "saturated": "saturates", "fibre": "fiber",
+}
+
+class ImportStats:
+    """Running totals for one import; rejected counts rows by reason"""
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.rejected = Counter()
+        self.updated_ids = []
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        rejected = sum(self.rejected.values())
+        reasons = ", ".join(f"{count} {reason}" for reason, count in self.rejected.most_common())
+        return (f"{self.read} rows read, {self.inserted} added, {self.updated} updated, {self.skipped} duplicates skipped, "
+                f"{rejected} rejected{f' ({reasons})' if reasons else ''} in {self.elapsed:.1f}s "
+                f"({self.rows_per_second:,.0f} rows/s)")
+
+def normalize_key(names):
+    """Deduplication key for a Series of food names: case-folded with whitespace collapsed"""
+    return names.str.casefold().str.replace(r"\s+", " ", regex=True).str.strip()
+
+def read_chunks(source, fmt, chunksize=CHUNK_SIZE):
+    """Iterate DataFrame chunks of a CSV or JSON lines file (path or binary file object)"""
+    if fmt == "csv":
+        return pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False, na_values=[""],
+                           skipinitialspace=True)
+    if fmt == "jsonl":
+        return pd.read_json(source, lines=True, chunksize=chunksize, dtype=False)
+    raise ValueError(f"Unsupported format {fmt!r}; expected csv or jsonl")
+
+def format_of(filename):
+    return "jsonl" if Path(filename).suffix.lower() in (".jsonl", ".ndjson", ".json") else "csv"
+
+def clean_chunk(chunk):
+    """Validate and normalize one raw chunk. Returns (valid rows with a key column, Counter of rejections)"""
+    chunk = chunk.rename(columns=lambda c: str(c).strip().lower().replace(" ", "_")).rename(columns=COLUMN_ALIASES)
+    if "food_name" not in chunk:
+        raise ValueError("Input has no food_name (or name) column")
+    rejected = Counter()
+    names = chunk["food_name"].astype("string").str.replace(r"\s+", " ", regex=True).str.strip()
+    clean = pd.DataFrame({"food_name": names}, index=chunk.index)
+
+    bad = pd.Series(False, index=chunk.index)
+    for reason, mask in [("missing name", names.isna() | (names == "")),
+                         ("name too long", names.str.len() > MAX_NAME_LENGTH)]:
+        mask = mask.fillna(False).astype(bool) & ~bad
+        rejected[reason] += int(mask.sum())
+        bad |= mask
+
+    # Blank macros count as 0 g; anything present must be a number between 0 and 100 g per 100 g
+    raw = chunk.reindex(columns=MACRO_COLS).replace(r"^\s*$", np.nan, regex=True)
+    macros = raw.apply(pd.to_numeric, errors="coerce")
+    unparsable = (macros.isna() & raw.notna()).any(axis=1)
+    macros = macros.fillna(0.0)
+    values = macros.to_numpy(dtype=np.float64)
+    checks = [
+        ("non-numeric macro", unparsable),
+        ("macro out of range", pd.Series(((values < 0) | (values > 100)).any(axis=1), index=chunk.index)),
+        ("macros over 100 g", macros["protein"] + macros["carbohydrates"] + macros["fat"] > 100.5),
+        ("sugars above carbohydrates", macros["sugars"] > macros["carbohydrates"] + 0.05),
+        ("saturates above fat", macros["saturates"] > macros["fat"] + 0.05),
+    ]
+    for reason, mask in checks:
+        mask = mask & ~bad
+        rejected[reason] += int(mask.sum())
+        bad |= mask
+
+    clean[MACRO_COLS] = macros.round(4)
+    clean = clean[~bad]
+    clean["key"] = normalize_key(clean["food_name"])
+    return clean, +rejected
+
+def existing_keys(client):
+    """{normalized name: food_id} for every food visible to the client"""
+    foods = pd.DataFrame(fetch_all("foods", "food_id, food_name", client=client), columns=["food_id", "food_name"])
+    foods = foods.assign(key=normalize_key(foods["food_name"].astype("string"))).drop_duplicates("key")
+    return dict(zip(foods["key"], foods["food_id"].astype(int)))
+
+def _batches(rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        yield rows[start:start + BATCH_SIZE]
+
+def import_foods(client, chunks, user_id=None, on_duplicate="skip", known=None, progress=None):
+    """Import foods from an iterable of raw DataFrame chunks; returns ImportStats.
+
+    known maps normalized names to food_ids (default: every food the client can
+    see) and is extended as rows are added. progress(stats) is called after
+    every chunk.
+    """
+    if on_duplicate not in ("skip", "update"):
+        raise ValueError("on_duplicate must be 'skip' or 'update'")
+    known = existing_keys(client) if known is None else known
+    stats = ImportStats()
+    for chunk in chunks:
+        stats.read += len(chunk)
+        clean, rejected = clean_chunk(chunk)
+        stats.rejected.update(rejected)
+        repeated = clean["key"].duplicated()
+        stats.skipped += int(repeated.sum())
+        clean = clean[~repeated]
+
+        food_ids = clean["key"].map(known)
+        duplicate = food_ids.notna()
+        new = clean[~duplicate]
+        rows = new[FOOD_COLUMNS].to_dict("records")
+        if user_id is not None:
+            for row in rows:
+                row["user_id"] = user_id
+        for batch in _batches(rows):
+            inserted = pd.DataFrame(client.table("foods").insert(batch).execute().data, columns=["food_id", "food_name"])
+            stats.inserted += len(inserted)
+            # Later chunks must see these names as duplicates
+            known.update(zip(normalize_key(inserted["food_name"].astype("string")), inserted["food_id"].astype(int)))
+
+        if on_duplicate == "update":
+            updates = clean[duplicate].assign(food_id=food_ids[duplicate].astype("int64"))
+            rows = updates[["food_id", *MACRO_COLS]].to_dict("records")
+            for batch in _batches(rows):
+                # Only macros change; the upsert still needs a name, so it carries the catalog's own spelling
+                names = select_in(client, "foods", "food_id, food_name", "food_id", [row["food_id"] for row in batch])
+                names = dict(zip(names["food_id"].astype(int), names["food_name"]))
+                batch = [{**row, "food_name": names[row["food_id"]]} for row in batch if row["food_id"] in names]
+                if batch:
+                    client.table("foods").upsert(batch, on_conflict="food_id").execute()
+                stats.updated += len(batch)
+                stats.updated_ids += [int(row["food_id"]) for row in batch]
+        else:
+            stats.skipped += int(duplicate.sum())
+        if progress:
+            progress(stats)
+    return stats
+
+def apply_food_changes(client, food_ids):
+    """Refresh recipe_nutrition and the daily rollup of every user who ate these foods after their macros changed"""
+    if not food_ids:
+        return
+    refresh_for_foods(client, food_ids)
+    recompute_shared(client, food_ids=food_ids)
+
+# --- Command line ---
+def main():
+    parser = argparse.ArgumentParser(description="Import foods from a CSV or JSON lines file")
+    parser.add_argument("path", help="CSV or JSON lines file; the format follows the extension unless --format is given")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--sqlite", help="import into a SQLite database instead of Supabase")
+    parser.add_argument("--user", help="user id that owns the imported foods")
+    parser.add_argument("--on-duplicate", choices=["skip", "update"], default="skip",
+                        help="what to do with foods whose name is already in the catalog")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    client = client_from_args(args)
+    chunks = read_chunks(args.path, args.format or format_of(args.path), args.chunk_size)
+
+    def report(stats):
+        sys.stderr.write(f"\r{stats.read} rows, {stats.inserted} added, {stats.updated} updated "
+                         f"({stats.rows_per_second:,.0f} rows/s)")
+
+    stats = import_foods(client, chunks, user_id=args.user, on_duplicate=args.on_duplicate, progress=report)
+    sys.stderr.write("\n")
+    print(stats.summary())
+    if stats.updated_ids:
+        apply_food_changes(client, stats.updated_ids)
+        print(f"Refreshed recipes and daily totals for {len(stats.updated_ids)} updated foods")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from nutrack_utils import fetch_all
+
+class MeasurementTable:
+    """Custom measurements in wide form: one row per date, one float32 column per measurement name.
+
+    Built with a single vectorized scatter from the long rows, so charting a
+    measurement is a column lookup. New measurements are applied in place
+    with add() instead of rebuilding.
+    """
+
+    def __init__(self, dates, names, values):
+        date_codes, dates = pd.factorize(pd.DatetimeIndex(dates), sort=True)
+        name_codes, names = pd.factorize(pd.Index(names, dtype=object), sort=True)
+        self.dates = pd.DatetimeIndex(dates, name="measurement_date")
+        self._columns = {name: i for i, name in enumerate(names)}
+        self._values = np.full((len(self.dates), len(self._columns)), np.nan, dtype=np.float32)
+        self._values[date_codes, name_codes] = np.asarray(values, dtype=np.float32)
+        self._lock = threading.Lock()
+
+    @property
+    def names(self):
+        return list(self._columns)
+
+    def column(self, name):
+        """Values of one measurement by date; NaN where it was not recorded"""
+        with self._lock:
+            return pd.Series(self._values[:, self._columns[name]], index=self.dates, name=name)
+
+    def to_frame(self):
+        with self._lock:
+            return pd.DataFrame(self._values, index=self.dates, columns=self.names)
+
+    def add(self, measurement_date, values):
+        """Record {measurement_name: value} for a date, adding the row or columns if they are new"""
+        measurement_date = pd.Timestamp(measurement_date)
+        with self._lock:
+            row = self.dates.searchsorted(measurement_date)
+            if row == len(self.dates) or self.dates[row] != measurement_date:
+                self.dates = self.dates.insert(row, measurement_date)
+                self._values = np.insert(self._values, row, np.nan, axis=0)
+            new_names = [name for name in values if name not in self._columns]
+            if new_names:
+                padding = np.full((len(self.dates), len(new_names)), np.nan, dtype=np.float32)
+                self._values = np.hstack([self._values, padding])
+                for name in new_names:
+                    self._columns[name] = len(self._columns)
+            for name, value in values.items():
+                self._values[row, self._columns[name]] = value
+
+def load_measurement_table(client, measurements_df):
+    """Build the table from custom_measurements, dated through the already-loaded body measurements"""
+    columns = ["body_measurement_id", "measurement_name", "measurement_value"]
+    custom = pd.DataFrame(fetch_all("custom_measurements", ", ".join(columns), client=client), columns=columns)
+    rows = pd.Index(measurements_df["measurement_id"]).get_indexer(custom["body_measurement_id"])
+    known = rows >= 0
+    dates = pd.to_datetime(measurements_df["measurement_date"]).to_numpy()
+    return MeasurementTable(
+        dates[rows[known]], custom["measurement_name"].to_numpy()[known], custom["measurement_value"].to_numpy()[known]
+    )
+
+def _signature(measurements_df):
+    return len(measurements_df), int(measurements_df["measurement_id"].max()) if len(measurements_df) else None
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _cached_table(user_id):
+    return SimpleNamespace(table=None, signature=None)
+
+def get_measurement_table(client, measurements_df):
+    """Return the user's cached MeasurementTable.
+
+    It is rebuilt only when body_measurements no longer match what the table
+    was built from, i.e. after writes that did not go through record_measurement().
+    """
+    cached = _cached_table(st.session_state.user.id)
+    signature = _signature(measurements_df)
+    if cached.table is None or cached.signature != signature:
+        cached.table = load_measurement_table(client, measurements_df)
+        cached.signature = signature
+    return cached.table
+
+def record_measurement(measurement_id, measurement_date, values):
+    """Apply a just-saved body measurement's custom values to the cached table"""
+    cached = _cached_table(st.session_state.user.id)
+    if cached.table is None:
+        return
+    cached.table.add(measurement_date, values)
+    count, max_id = cached.signature
+    cached.signature = (count + 1, max(max_id or 0, int(measurement_id)))
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# Macro columns stored on `foods`, all per 100g
+MACRO_COLS = ['protein', 'carbohydrates', 'sugars', 'fat', 'saturates', 'fiber']
+
+def scale_per_100g(df, amount_col='amount'):
+    """Scale the per-100g macro columns of df to the grams in amount_col, in place"""
+    df[MACRO_COLS] = df[MACRO_COLS].mul(df[amount_col] / 100, axis=0)
+    return df
+
+class NutritionEngine:
+    """Vectorized nutrition totals for foods, recipes and meals.
+
+    The foods catalog is held as an (n_foods x 6) matrix of macros per gram,
+    indexed by food_id. Each recipe is resolved into a per-gram vector from its
+    ingredients, and both are stacked into one item matrix so a meal mixing
+    foods and recipes is a single matrix-vector product. Given the precomputed
+    recipe_nutrition rows instead, recipes are read straight from their
+    per-100g columns and no ingredients need loading.
+    """
+
+    def __init__(self, foods, recipe_ingredients=None, recipe_nutrition=None):
+        foods = foods.drop_duplicates('food_id') if len(foods) else foods
+        self.food_index = pd.Index(foods['food_id'] if len(foods) else [], name='food_id')
+        self.food_matrix = (
+            foods[MACRO_COLS].fillna(0).to_numpy(dtype=np.float64) / 100
+            if len(foods) else np.zeros((0, len(MACRO_COLS)))
+        )
+        if recipe_nutrition is not None:
+            self.recipe_index, self.recipe_matrix, self.recipe_grams = self._stored_recipes(recipe_nutrition)
+        else:
+            self.recipe_index, self.recipe_matrix, self.recipe_grams = self._resolve_recipes(recipe_ingredients)
+        self._items = np.vstack([self.food_matrix, self.recipe_matrix])
+
+    def _resolve_recipes(self, ingredients):
+        if ingredients is None or len(ingredients) == 0:
+            return pd.Index([], name='recipe_id'), np.zeros((0, len(MACRO_COLS))), np.zeros(0)
+        recipe_codes, recipe_ids = pd.factorize(ingredients['recipe_id'])
+        food_rows = self.food_index.get_indexer(ingredients['food_id'])
+        amounts = ingredients['amount'].fillna(0).to_numpy(dtype=np.float64)
+        known = food_rows >= 0
+        totals = self._sum_by(recipe_codes[known], food_rows[known], amounts[known], len(recipe_ids), self.food_matrix)
+        grams = np.bincount(recipe_codes, weights=amounts, minlength=len(recipe_ids))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            per_gram = np.where(grams[:, None] > 0, totals / grams[:, None], 0.0)
+        return pd.Index(recipe_ids, name='recipe_id'), per_gram, grams
+
+    @staticmethod
+    def _stored_recipes(recipe_nutrition):
+        per_100g = [f'{col}_per_100g' for col in MACRO_COLS]
+        return (
+            pd.Index(recipe_nutrition['recipe_id'], name='recipe_id'),
+            recipe_nutrition[per_100g].fillna(0).to_numpy(dtype=np.float64).reshape(-1, len(MACRO_COLS)) / 100,
+            recipe_nutrition['total_grams'].fillna(0).to_numpy(dtype=np.float64)
+        )
+
+    @staticmethod
+    def _sum_by(group_codes, rows, amounts, n_groups, matrix):
+        """Sum amount * matrix[row] into n_groups buckets, one bincount per macro"""
+        contributions = matrix[rows] * amounts[:, None]
+        return np.column_stack([
+            np.bincount(group_codes, weights=contributions[:, i], minlength=n_groups)
+            for i in range(matrix.shape[1])
+        ]) if n_groups else np.zeros((0, matrix.shape[1]))
+
+    def _item_rows(self, food_ids=(), recipe_ids=()):
+        food_rows = self.food_index.get_indexer(pd.Index(food_ids))
+        recipe_rows = self.recipe_index.get_indexer(pd.Index(recipe_ids))
+        recipe_rows = np.where(recipe_rows >= 0, recipe_rows + len(self.food_index), -1)
+        return np.concatenate([food_rows, recipe_rows]).astype(np.int64)
+
+    def food_vector(self, food_id):
+        """Macros per gram for a food"""
+        return self.food_matrix[self.food_index.get_loc(food_id)]
+
+    def recipe_vector(self, recipe_id):
+        """Macros per gram for a recipe, averaged over its ingredient weights"""
+        return self.recipe_matrix[self.recipe_index.get_loc(recipe_id)]
+
+    def meal_totals(self, foods=(), recipes=()):
+        """Total macros for a meal given (food_id, grams) and (recipe_id, grams) pairs.
+
+        Returns a Series indexed by MACRO_COLS. Unknown ids contribute nothing.
+        """
+        foods, recipes = list(foods), list(recipes)
+        rows = self._item_rows([f for f, _ in foods], [r for r, _ in recipes])
+        amounts = np.array([a for _, a in foods] + [a for _, a in recipes], dtype=np.float64)
+        known = rows >= 0
+        totals = self._items[rows[known]].T @ amounts[known] if known.any() else np.zeros(len(MACRO_COLS))
+        return pd.Series(totals, index=MACRO_COLS)
+
+    def batch_meal_totals(self, meal_foods=None, meal_recipes=None):
+        """Total macros for many meals at once.
+
+        meal_foods / meal_recipes are frames with meal_id, food_id / recipe_id and
+        amount columns (as stored in the meal_foods and meal_recipes tables).
+        Returns a DataFrame indexed by meal_id with one column per macro.
+        """
+        parts = []
+        if meal_foods is not None and len(meal_foods):
+            parts.append((meal_foods['meal_id'], self._item_rows(food_ids=meal_foods['food_id']), meal_foods['amount']))
+        if meal_recipes is not None and len(meal_recipes):
+            parts.append((meal_recipes['meal_id'], self._item_rows(recipe_ids=meal_recipes['recipe_id']), meal_recipes['amount']))
+        if not parts:
+            return pd.DataFrame(columns=MACRO_COLS, index=pd.Index([], name='meal_id'), dtype=np.float64)
+        meal_ids = pd.concat([p[0] for p in parts], ignore_index=True)
+        rows = np.concatenate([p[1] for p in parts])
+        amounts = pd.concat([p[2] for p in parts], ignore_index=True).fillna(0).to_numpy(dtype=np.float64)
+        meal_codes, unique_meals = pd.factorize(meal_ids)
+        known = rows >= 0
+        totals = self._sum_by(meal_codes[known], rows[known], amounts[known], len(unique_meals), self._items)
+        return pd.DataFrame(totals, columns=MACRO_COLS, index=pd.Index(unique_meals, name='meal_id'))
@@ -1,21 +1,19 @@
 import streamlit as st
 import pandas as pd
-from supabase import create_client, Client
+from nutrack_nutrition import MACRO_COLS
+from nutrack_recipe_nutrition import fetch_recipe_nutrition, refresh_recipes
+from nutrack_utils import get_supabase, fetch_all
 
-# Initialize Supabase client using Streamlit secrets
-url: str = st.secrets["supabase"]["SUPABASE_URL"]
-key: str = st.secrets["supabase"]["SUPABASE_KEY"]
-supabase: Client = create_client(url, key)
+# Shared Supabase client
+supabase = get_supabase()
 
 # Function to fetch recipes
 def fetch_recipes():
-    response = supabase.table("recipes").select("*").execute()
-    return response.data
+    return fetch_all("recipes", "recipe_id, recipe_name, directions")
 
 # Function to fetch foods
 def fetch_foods():
-    response = supabase.table("foods").select("food_id, food_name").execute()
-    return response.data
+    return fetch_all("foods", "food_id, food_name")
 
 # Function to add a new recipe
 def add_recipe(recipe_name, directions):
@@ -29,6 +27,7 @@ def add_ingredient(recipe_id, food_id, amount):
         "food_id": food_id,
         "amount": amount
     }).execute()
+    refresh_recipes(supabase, [recipe_id])
 
 # Function to fetch ingredients for a specific recipe
 def fetch_ingredients(recipe_id):
@@ -74,6 +73,10 @@ if recipes:
         if ingredients:
             ingredients_df = pd.DataFrame(ingredients)
             st.table(ingredients_df)
+            # Totals come precomputed from recipe_nutrition rather than summed here
+            totals = fetch_recipe_nutrition(supabase, [recipe_id])
+            if not totals.empty:
+                st.table(totals[["total_grams", *MACRO_COLS]])
         else:
             st.write("No ingredients found for this recipe.")
 
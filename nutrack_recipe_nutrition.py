@@ -0,0 +1,127 @@
+"""Per-recipe nutrition store: total grams, macro totals and macros per 100 g.
+
+With a row per recipe in recipe_nutrition, a recipe can be looked up like a
+food instead of being resolved from its ingredients on every read. Adding an
+ingredient folds just that ingredient into the row (add_ingredient); a change
+to a food's macros recomputes the recipes that use it (refresh_for_foods).
+Backfill or repair every recipe with:
+
+    python -m nutrack_recipe_nutrition --sqlite nutrack.db
+    SUPABASE_URL=... SUPABASE_SERVICE_KEY=... python -m nutrack_recipe_nutrition
+
+Like nutrack_rollup, functions take the client to use.
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from nutrack_nutrition import MACRO_COLS, NutritionEngine
+from nutrack_rollup import client_from_args, load_engine, select_in
+from nutrack_utils import PAGE_SIZE, fetch_all
+
+NUTRITION_TABLE = "recipe_nutrition"
+PER_100G_COLS = [f"{col}_per_100g" for col in MACRO_COLS]
+NUTRITION_COLS = ["recipe_id", "total_grams", *MACRO_COLS, *PER_100G_COLS]
+
+def recipe_row(recipe_id, grams, totals):
+    """A recipe_nutrition row from total grams and macro totals (anything indexable by MACRO_COLS)"""
+    row = {"recipe_id": int(recipe_id), "total_grams": round(float(grams), 4)}
+    for col, per_100g in zip(MACRO_COLS, PER_100G_COLS):
+        total = float(totals[col] or 0)
+        row[col] = round(total, 4)
+        row[per_100g] = round(total / grams * 100, 4) if grams > 0 else 0.0
+    row["updated_at"] = datetime.now(timezone.utc).isoformat()
+    return row
+
+def rows_from_engine(engine, recipe_ids):
+    """recipe_nutrition rows for recipe_ids; recipes the engine has no ingredients for get zeros"""
+    positions = engine.recipe_index.get_indexer(pd.Index(recipe_ids))
+    rows = []
+    for recipe_id, position in zip(recipe_ids, positions):
+        if position < 0:
+            rows.append(recipe_row(recipe_id, 0, dict.fromkeys(MACRO_COLS, 0)))
+            continue
+        grams = engine.recipe_grams[position]
+        rows.append(recipe_row(recipe_id, grams, dict(zip(MACRO_COLS, engine.recipe_matrix[position] * grams))))
+    return rows
+
+def _write(client, rows):
+    for start in range(0, len(rows), PAGE_SIZE):
+        client.table(NUTRITION_TABLE).upsert(rows[start:start + PAGE_SIZE], on_conflict="recipe_id").execute()
+    return len(rows)
+
+# --- Reads ---
+def fetch_recipe_nutrition(client, recipe_ids=None):
+    """Stored rows for the given recipes, or every recipe visible to the client"""
+    columns = ", ".join(NUTRITION_COLS)
+    if recipe_ids is not None:
+        return select_in(client, NUTRITION_TABLE, columns, "recipe_id", recipe_ids)
+    return pd.DataFrame(fetch_all(NUTRITION_TABLE, columns, client=client), columns=NUTRITION_COLS)
+
+def recipe_rows(client, recipe_ids):
+    """Nutrition rows for these recipes: the stored ones, with any recipe not yet stored resolved from its ingredients"""
+    recipe_ids = list(dict.fromkeys(int(i) for i in recipe_ids))
+    if not recipe_ids:
+        return pd.DataFrame(columns=NUTRITION_COLS)
+    stored = fetch_recipe_nutrition(client, recipe_ids)
+    missing = sorted(set(recipe_ids) - set(stored["recipe_id"]))
+    if not missing:
+        return stored
+    resolved = pd.DataFrame(_resolve(client, missing), columns=NUTRITION_COLS)
+    return pd.concat([stored, resolved], ignore_index=True) if len(stored) else resolved
+
+# --- Writes ---
+def add_ingredient(client, recipe_id, food, amount, current=None):
+    """Fold a just-inserted ingredient (food: per-100g macros) into the recipe's stored row.
+
+    current is the recipe's row before the insert. Without one the store has
+    nothing to add to, so the recipe is recomputed from all its ingredients.
+    """
+    if current is None:
+        return refresh_recipes(client, [recipe_id])
+    grams = float(current["total_grams"] or 0) + amount
+    totals = {col: float(current[col] or 0) + float(food[col] or 0) * amount / 100 for col in MACRO_COLS}
+    return _write(client, [recipe_row(recipe_id, grams, totals)])
+
+def refresh_recipes(client, recipe_ids):
+    """Recompute the stored rows for these recipes from their ingredients; returns rows written"""
+    recipe_ids = list(dict.fromkeys(int(i) for i in recipe_ids))
+    if not recipe_ids:
+        return 0
+    return _write(client, _resolve(client, recipe_ids))
+
+def _resolve(client, recipe_ids):
+    """Rows computed from the recipes' ingredients, loading only the foods they use"""
+    ingredients = select_in(client, "recipe_ingredients", "recipe_id, food_id, amount", "recipe_id", recipe_ids)
+    foods = select_in(client, "foods", ", ".join(["food_id", *MACRO_COLS]), "food_id", ingredients["food_id"])
+    return rows_from_engine(NutritionEngine(foods, ingredients), recipe_ids)
+
+def refresh_for_foods(client, food_ids):
+    """Recompute the recipes that use any of these foods, after their macros changed; returns those recipe ids"""
+    if not len(food_ids):
+        return []
+    uses = select_in(client, "recipe_ingredients", "recipe_id, food_id", "food_id", food_ids)
+    recipe_ids = sorted(set(uses["recipe_id"]))
+    refresh_recipes(client, recipe_ids)
+    return recipe_ids
+
+def rebuild_all(client, engine=None):
+    """Recompute every recipe visible to the client; returns rows written"""
+    engine = engine or load_engine(client)
+    recipe_ids = [row["recipe_id"] for row in fetch_all("recipes", "recipe_id", client=client)]
+    return _write(client, rows_from_engine(engine, recipe_ids))
+
+# --- Command line ---
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the recipe_nutrition store from recipe ingredients")
+    parser.add_argument("--sqlite", help="rebuild a SQLite database instead of Supabase")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    written = rebuild_all(client_from_args(args))
+    print(f"{written} recipes in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
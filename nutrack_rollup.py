@@ -0,0 +1,203 @@
+"""Daily nutrition rollup: one row of macro totals per user per day.
+
+Saving a meal adds just that meal's totals to its day (add_meal). When a
+food's macros or a recipe's ingredients change, recompute_for() rebuilds only
+the days whose meals use them, loading only the foods and the stored
+recipe_nutrition rows those meals reference. Foods and recipes are shared,
+so the pages call recompute_shared(), which does that for every user whose
+meals use them. rebuild() recomputes a user's whole history for backfills:
+
+    python -m nutrack_rollup --sqlite nutrack.db
+    SUPABASE_URL=... SUPABASE_SERVICE_KEY=... python -m nutrack_rollup --user <user id>
+
+Functions take the client to use, so they work with get_supabase() in the
+pages and with a plain supabase-py (or SQLite) client from the command line.
+"""
+import argparse
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+
+from nutrack_nutrition import MACRO_COLS, NutritionEngine
+from nutrack_utils import PAGE_SIZE, fetch_all
+
+ROLLUP_TABLE = "daily_nutrition"
+ROLLUP_COLS = ["day", "meal_count", *MACRO_COLS]
+ID_CHUNK = 500  # ids per in_() filter, keeps request URLs short
+
+def meal_day(created_at):
+    """The day a meal counts towards: the date part of its created_at timestamp"""
+    return str(created_at)[:10]
+
+# --- Reads ---
+def _frame(rows, columns):
+    return pd.DataFrame(rows, columns=[column.strip() for column in columns.split(",")])
+
+def select_in(client, table, columns, column, ids):
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    rows = []
+    for start in range(0, len(ids), ID_CHUNK):
+        chunk = ids[start:start + ID_CHUNK]
+        rows += fetch_all(table, columns, client=client, in_={column: chunk})
+    return _frame(rows, columns)
+
+def load_engine(client):
+    """A NutritionEngine over every food and recipe ingredient visible to the client, for whole-catalog rebuilds"""
+    food_columns = ", ".join(["food_id", *MACRO_COLS])
+    foods = _frame(fetch_all("foods", food_columns, client=client), food_columns)
+    ingredient_columns = "recipe_id, food_id, amount"
+    ingredients = _frame(fetch_all("recipe_ingredients", ingredient_columns, client=client), ingredient_columns)
+    return NutritionEngine(foods, ingredients)
+
+def engine_for(client, meal_foods, meal_recipes):
+    """A NutritionEngine over just the foods and recipes these meal items reference.
+
+    Recipes come from their recipe_nutrition rows, so no ingredients are loaded.
+    """
+    from nutrack_recipe_nutrition import recipe_rows
+
+    food_columns = ", ".join(["food_id", *MACRO_COLS])
+    foods = select_in(client, "foods", food_columns, "food_id", meal_foods["food_id"])
+    return NutritionEngine(foods, recipe_nutrition=recipe_rows(client, meal_recipes["recipe_id"]))
+
+def _load_meals(client, user_id, days=None):
+    columns = "meal_id, created_at"
+    gte, lt = {}, {}
+    if days:
+        gte["created_at"] = min(days)
+        lt["created_at"] = (date.fromisoformat(max(days)) + timedelta(days=1)).isoformat()
+    meals = _frame(fetch_all("meals", columns, client=client, filters={"user_id": user_id}, gte=gte, lt=lt), columns)
+    meals["day"] = meals["created_at"].map(meal_day)
+    return meals[meals["day"].isin(days)] if days else meals
+
+def weekly_summary(daily):
+    """Weekly (Monday-start) totals and per-logged-day averages from daily rollup rows"""
+    if daily.empty:
+        return pd.DataFrame(columns=["week", "days_logged", "meal_count", *MACRO_COLS])
+    week = daily["day"].dt.to_period("W-SUN").dt.start_time.rename("week")
+    weekly = daily.groupby(week).agg(days_logged=("day", "size"), meal_count=("meal_count", "sum"),
+                                     **{col: (col, "sum") for col in MACRO_COLS})
+    weekly[MACRO_COLS] = weekly[MACRO_COLS].div(weekly["days_logged"], axis=0)
+    return weekly.reset_index()
+
+# --- Writes ---
+def daily_totals(engine, meals, meal_foods, meal_recipes):
+    """Sum per-meal totals into one row per day; meals need meal_id and day columns"""
+    per_meal = engine.batch_meal_totals(meal_foods, meal_recipes).reindex(meals["meal_id"]).fillna(0)
+    per_meal["day"] = meals["day"].to_numpy()
+    daily = per_meal.groupby("day")[MACRO_COLS].sum()
+    daily["meal_count"] = per_meal.groupby("day").size()
+    return daily.reset_index()[ROLLUP_COLS]
+
+def add_meal(client, user_id, day, totals):
+    """Add one saved meal's totals (a Series indexed by MACRO_COLS) to its day"""
+    from postgrest.exceptions import APIError
+
+    totals = {col: round(float(totals[col]), 4) for col in MACRO_COLS}
+    try:
+        client.rpc("add_daily_nutrition", {"day": day, "totals": totals}).execute()
+        return
+    except APIError as e:
+        if e.code != "PGRST202":  # PGRST202: function not found
+            raise
+    # Without the RPC, read-modify-write; concurrent saves for the same day can race, rebuild() repairs that
+    existing = client.table(ROLLUP_TABLE).select(", ".join(ROLLUP_COLS)).eq("user_id", user_id).eq("day", day).execute().data
+    row = existing[0] if existing else {"meal_count": 0, **{col: 0 for col in MACRO_COLS}}
+    client.table(ROLLUP_TABLE).upsert({
+        "user_id": user_id, "day": day, "meal_count": row["meal_count"] + 1,
+        **{col: (row[col] or 0) + totals[col] for col in MACRO_COLS},
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }, on_conflict="user_id,day").execute()
+
+def rebuild(client, user_id, days=None, engine=None):
+    """Recompute the rollup from meals; all days when days is None. Returns the number of days written.
+
+    Rows are deleted and re-inserted, so a failed rebuild can simply be run again.
+    """
+    days = sorted(set(days)) if days is not None else None
+    if days == []:
+        return 0
+    meals = _load_meals(client, user_id, days)
+    meal_foods = select_in(client, "meal_foods", "meal_id, food_id, amount", "meal_id", meals["meal_id"])
+    meal_recipes = select_in(client, "meal_recipes", "meal_id, recipe_id, amount", "meal_id", meals["meal_id"])
+    engine = engine or engine_for(client, meal_foods, meal_recipes)
+    daily = daily_totals(engine, meals, meal_foods, meal_recipes)
+
+    stale = client.table(ROLLUP_TABLE).delete().eq("user_id", user_id)
+    if days:
+        stale = stale.in_("day", days)
+    stale.execute()
+    updated_at = datetime.now(timezone.utc).isoformat()
+    rows = [{**row, "user_id": user_id, "updated_at": updated_at} for row in daily.to_dict("records")]
+    for start in range(0, len(rows), PAGE_SIZE):
+        client.table(ROLLUP_TABLE).insert(rows[start:start + PAGE_SIZE]).execute()
+    return len(rows)
+
+def affected_user_days(client, food_ids=(), recipe_ids=()):
+    """{user_id: days} for every user with a meal that uses any of the foods (directly or through a recipe) or recipes"""
+    recipe_ids = set(recipe_ids)
+    if food_ids:
+        recipe_ids |= set(select_in(client, "recipe_ingredients", "recipe_id, food_id", "food_id", food_ids)["recipe_id"])
+    meal_ids = set()
+    if food_ids:
+        meal_ids |= set(select_in(client, "meal_foods", "meal_id, food_id", "food_id", food_ids)["meal_id"])
+    if recipe_ids:
+        meal_ids |= set(select_in(client, "meal_recipes", "meal_id, recipe_id", "recipe_id", recipe_ids)["meal_id"])
+    meals = select_in(client, "meals", "meal_id, created_at, user_id", "meal_id", meal_ids)
+    meals["day"] = meals["created_at"].map(meal_day)
+    return {user_id: sorted(set(days)) for user_id, days in meals.groupby("user_id")["day"]}
+
+def affected_days(client, user_id, food_ids=(), recipe_ids=()):
+    """Days of this user with a meal that uses any of the foods (directly or through a recipe) or recipes"""
+    return affected_user_days(client, food_ids, recipe_ids).get(user_id, [])
+
+def recompute_for(client, user_id, food_ids=(), recipe_ids=()):
+    """Rebuild the days affected by a change to these foods or recipes; returns those days"""
+    days = affected_days(client, user_id, food_ids, recipe_ids)
+    rebuild(client, user_id, days)
+    return days
+
+def recompute_shared(client, food_ids=(), recipe_ids=()):
+    """Rebuild the affected days of every user whose meals use these foods or recipes; returns days written.
+
+    Row level security hides other users' meals from a page's client, so this
+    goes through the recompute_daily_nutrition RPC where it is installed and
+    otherwise rebuilds each user here, e.g. with a service key or SQLite.
+    """
+    from postgrest.exceptions import APIError
+
+    food_ids, recipe_ids = [int(i) for i in food_ids], [int(i) for i in recipe_ids]
+    try:
+        return client.rpc("recompute_daily_nutrition", {"food_ids": food_ids, "recipe_ids": recipe_ids}).execute().data
+    except APIError as e:
+        if e.code != "PGRST202":  # PGRST202: function not found
+            raise
+    return sum(rebuild(client, user_id, days) for user_id, days in affected_user_days(client, food_ids, recipe_ids).items())
+
+# --- Command line ---
+def client_from_args(args):
+    if args.sqlite:
+        from nutrack_sqlite import SQLiteClient
+        return SQLiteClient(args.sqlite)
+    from supabase import create_client
+    # A service role key bypasses row level security, so every user's rows are visible
+    return create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_KEY"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily_nutrition rollup from meal history")
+    parser.add_argument("--sqlite", help="rebuild a SQLite database instead of Supabase")
+    parser.add_argument("--user", action="append", help="user id to rebuild (repeatable); default every user")
+    args = parser.parse_args()
+
+    client = client_from_args(args)
+    users = args.user or [row["user_id"] for row in fetch_all("user_profiles", "user_id", client=client)]
+    engine = load_engine(client)
+    for user_id in users:
+        started = time.perf_counter()
+        written = rebuild(client, user_id, engine=engine)
+        print(f"{user_id}: {written} days in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import heapq
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+import streamlit as st
+
+def normalize(name):
+    return " ".join(str(name).lower().split())
+
+def trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    """Type-ahead index over food or recipe names.
+
+    Prefix matches come from a sorted key list (bisect), substring matches from
+    a trigram inverted index. Results are ranked prefix-first, then by how often
+    the name has been picked. `ids` and `names` give O(1) lookups both ways.
+    """
+
+    def __init__(self, names, ids, usage=None):
+        self.ids = dict(zip(names, ids))
+        self.names = {item_id: name for name, item_id in self.ids.items()}
+        entries = sorted((normalize(name), name) for name in self.ids)
+        self._keys = [key for key, _ in entries]
+        self._labels = [name for _, name in entries]
+        self._positions = {name: pos for pos, name in enumerate(self._labels)}
+        # Posting lists are built in key order, so each one is already sorted
+        self._trigrams = defaultdict(list)
+        for pos, key in enumerate(self._keys):
+            for gram in trigrams(key):
+                self._trigrams[gram].append(pos)
+        self.usage = usage if usage is not None else Counter()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, name):
+        return self.ids.get(name)
+
+    def record_use(self, name):
+        self.usage[name] += 1
+
+    def _take(self, positions, is_match, limit, taken):
+        """Pick up to `limit` matches: used names by frequency first, then in key order"""
+        picked = []
+        for name, count in self.usage.most_common():
+            if len(picked) >= limit:
+                return picked
+            pos = self._positions.get(name)
+            if count > 0 and pos is not None and pos not in taken and is_match(pos):
+                picked.append(pos)
+                taken.add(pos)
+        for pos in positions:
+            if len(picked) >= limit:
+                break
+            if pos not in taken and is_match(pos):
+                picked.append(pos)
+                taken.add(pos)
+        return picked
+
+    def search(self, query, limit=20):
+        """Return up to `limit` names matching query, best first"""
+        query = normalize(query)
+        taken = set()
+        if not query:
+            picked = self._take(range(len(self._keys)), lambda pos: True, limit, taken)
+            return [self._labels[pos] for pos in picked]
+
+        start = bisect_left(self._keys, query)
+        end = bisect_left(self._keys, query + "\uffff", lo=start)
+        picked = self._take(range(start, end), lambda pos: start <= pos < end, limit, taken)
+
+        if len(picked) < limit and len(query) >= 3:
+            # Keys are indexed with word-boundary padding; the query is not, so it matches mid-word too
+            grams = {query[i:i + 3] for i in range(len(query) - 2)}
+            shortest = min((self._trigrams.get(gram, ()) for gram in grams), key=len)
+            picked += self._take(shortest, lambda pos: query in self._keys[pos], limit - len(picked), taken)
+        return [self._labels[pos] for pos in picked]
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _usage_counter(user_id, kind):
+    # Survives index rebuilds so ranking keeps what the user picks most
+    return Counter()
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _build_index(user_id, kind, signature, _names, _ids):
+    return SearchIndex(_names, _ids, usage=_usage_counter(user_id, kind))
+
+def get_search_index(kind, df, name_col, id_col):
+    """Return the cached search index for a foods/recipes frame.
+
+    The index is rebuilt only when the frame's row count or highest id changes.
+    """
+    user_id = st.session_state.user.id if "user" in st.session_state else None
+    signature = (len(df), df[id_col].max() if len(df) else None)
+    names = df[name_col].tolist() if len(df) else []
+    ids = df[id_col].tolist() if len(df) else []
+    return _build_index(user_id, kind, signature, names, ids)
+
+def search_box(label, index, key, limit=20):
+    """Text input that narrows a name list; returns matching names to feed a selectbox"""
+    query = st.text_input(label, key=key, placeholder=f"Type to search {len(index)} items")
+    return index.search(query, limit=limit)
@@ -0,0 +1,547 @@
+"""In-process stand-in for the Supabase client, backed by SQLite.
+
+Covers the subset of the supabase-py API the pages use: fluent
+select/insert/upsert/update/delete with eq/neq/gt/gte/lt/lte/in_/ilike
+filters, order, range/limit, count="exact", embedded selects such as
+"*, foods(*)" or "exercises(exercise_name, exercise_type)", the RPCs in sql/,
+and enough of auth for the login page. Row level security is not emulated:
+every caller sees every row. Inside RPCs auth.uid() is the user named by the
+request's access token (tokens issued here look like "sqlite-<user id>").
+
+Select it in .streamlit/secrets.toml:
+
+    [supabase]
+    BACKEND = "sqlite"
+    SQLITE_PATH = "nutrack.db"   # or ":memory:"
+    LATENCY_MS = 40              # optional simulated per-request latency
+    MAX_ROWS = 1000              # optional response row cap (default 1000, like Supabase)
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+
+# Rows per response, as Supabase's default PostgREST max-rows; None removes the cap
+MAX_ROWS = 1000
+
+# Requests served per database path; benchmarks read this to count round-trips
+request_counts = Counter()
+
+# table -> (primary key, {column: sqlite type})
+SCHEMA = {
+    "user_profiles": ("id", {"user_id": "TEXT", "email": "TEXT"}),
+    "foods": ("food_id", {
+        "food_name": "TEXT", "protein": "REAL", "carbohydrates": "REAL", "sugars": "REAL",
+        "fat": "REAL", "saturates": "REAL", "fiber": "REAL",
+        "created_at": "TEXT", "updated_at": "TEXT", "user_id": "TEXT"
+    }),
+    "recipes": ("recipe_id", {
+        "recipe_name": "TEXT", "directions": "TEXT", "created_at": "TEXT", "updated_at": "TEXT", "user_id": "TEXT"
+    }),
+    "recipe_ingredients": ("recipe_ingredient_id", {
+        "recipe_id": "INTEGER", "food_id": "INTEGER", "amount": "REAL", "created_at": "TEXT", "user_id": "TEXT"
+    }),
+    "meals": ("meal_id", {"user_id": "TEXT", "meal_desc": "TEXT", "created_at": "TEXT"}),
+    "meal_foods": ("meal_food_id", {
+        "meal_id": "INTEGER", "food_id": "INTEGER", "amount": "REAL", "user_id": "TEXT", "created_at": "TEXT"
+    }),
+    "meal_recipes": ("meal_recipe_id", {
+        "meal_id": "INTEGER", "recipe_id": "INTEGER", "amount": "REAL", "user_id": "TEXT", "created_at": "TEXT"
+    }),
+    "exercises": ("exercise_id", {
+        "exercise_name": "TEXT", "exercise_type": "TEXT", "muscle_groups": "JSON", "equipment": "TEXT",
+        "instructions": "TEXT", "user_id": "TEXT", "created_at": "TEXT"
+    }),
+    "workouts": ("workout_id", {
+        "user_id": "TEXT", "workout_name": "TEXT", "workout_date": "TEXT", "notes": "TEXT",
+        "created_at": "TEXT", "updated_at": "TEXT"
+    }),
+    "workout_exercises": ("workout_exercise_id", {
+        "workout_id": "INTEGER", "exercise_id": "INTEGER", "user_id": "TEXT", "sets": "INTEGER",
+        "reps": "INTEGER", "weight": "REAL", "duration": "REAL", "distance": "REAL", "notes": "TEXT",
+        "created_at": "TEXT"
+    }),
+    "body_measurements": ("measurement_id", {
+        "measurement_date": "TEXT", "weight": "REAL", "body_fat_percentage": "REAL", "muscle_mass": "REAL",
+        "user_id": "TEXT", "created_at": "TEXT"
+    }),
+    "custom_measurements": ("custom_measurement_id", {
+        "body_measurement_id": "INTEGER", "measurement_name": "TEXT", "measurement_value": "REAL",
+        "unit": "TEXT", "user_id": "TEXT", "created_at": "TEXT"
+    }),
+    "daily_nutrition": ("daily_nutrition_id", {
+        "user_id": "TEXT", "day": "TEXT", "meal_count": "INTEGER", "protein": "REAL", "carbohydrates": "REAL",
+        "sugars": "REAL", "fat": "REAL", "saturates": "REAL", "fiber": "REAL", "updated_at": "TEXT"
+    }),
+    "recipe_nutrition": ("recipe_id", {
+        "total_grams": "REAL", "protein": "REAL", "carbohydrates": "REAL", "sugars": "REAL",
+        "fat": "REAL", "saturates": "REAL", "fiber": "REAL", "protein_per_100g": "REAL",
+        "carbohydrates_per_100g": "REAL", "sugars_per_100g": "REAL", "fat_per_100g": "REAL",
+        "saturates_per_100g": "REAL", "fiber_per_100g": "REAL", "updated_at": "TEXT"
+    }),
+}
+
+# table -> {column: referenced table}; used to resolve embedded selects in both directions
+FOREIGN_KEYS = {
+    "recipe_ingredients": {"recipe_id": "recipes", "food_id": "foods"},
+    "meal_foods": {"meal_id": "meals", "food_id": "foods"},
+    "meal_recipes": {"meal_id": "meals", "recipe_id": "recipes"},
+    "workout_exercises": {"workout_id": "workouts", "exercise_id": "exercises"},
+    "custom_measurements": {"body_measurement_id": "body_measurements"},
+}
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+def _plain(value):
+    return value.item() if hasattr(value, "item") else value
+
+def _parse_select(columns):
+    """Split a PostgREST select string into plain columns and {relation: nested spec}"""
+    plain, embeds, depth, item = [], {}, 0, ""
+    for char in columns + ",":
+        if char == "," and depth == 0:
+            item = item.strip()
+            if "(" in item:
+                name = item[:item.index("(")].split(":")[-1].split("!")[0].strip()
+                embeds[name] = _parse_select(item[item.index("(") + 1:item.rindex(")")])
+            elif item:
+                plain.append(item)
+            item = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        item += char
+    return plain, embeds
+
+class SQLiteResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class SQLiteQuery:
+    """Fluent query builder mirroring postgrest-py's request builders"""
+
+    def __init__(self, client, table, method, columns="*", payload=None, count=None, on_conflict=None):
+        self.client = client
+        self.table = table
+        self.method = method
+        self.columns = columns
+        self.payload = payload
+        self.count = count
+        self.on_conflict = on_conflict
+        self.headers = {}
+        self.filters = []
+        self.orders = []
+        self.offset = None
+        self.row_limit = None
+
+    def _filter(self, column, op, value):
+        # PostgREST filters are strings on the wire; numpy scalars must bind like plain numbers here
+        value = [_plain(v) for v in value] if isinstance(value, list) else _plain(value)
+        self.filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+
+    def ilike(self, column, pattern):
+        # SQLite's LIKE is case-insensitive for ASCII, which is what ilike needs
+        return self._filter(column, "LIKE", pattern.replace("*", "%"))
+
+    def is_(self, column, value):
+        return self._filter(column, "IS", None if value in (None, "null") else value)
+
+    def in_(self, column, values):
+        return self._filter(column, "IN", list(values))
+
+    def order(self, column, *, desc=False, nullsfirst=False, foreign_table=None):
+        if foreign_table is None:
+            self.orders.append(f'"{column}" {"DESC" if desc else "ASC"} NULLS {"FIRST" if nullsfirst else "LAST"}')
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.row_limit = end - start + 1
+        return self
+
+    def limit(self, size):
+        self.row_limit = size
+        return self
+
+    def _where(self):
+        clauses, params = [], []
+        for column, op, value in self.filters:
+            if op == "IN":
+                if not value:
+                    clauses.append("0")
+                    continue
+                clauses.append(f'"{column}" IN ({", ".join("?" * len(value))})')
+                params.extend(value)
+            elif op == "IS":
+                clauses.append(f'"{column}" IS NULL' if value is None else f'"{column}" IS ?')
+                params.extend([] if value is None else [value])
+            elif op == "LIKE":
+                # Postgres takes backslash as LIKE's escape character by default; SQLite has none unless told
+                clauses.append(f"\"{column}\" LIKE ? ESCAPE '\\'")
+                params.append(value)
+            else:
+                clauses.append(f'"{column}" {op} ?')
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def execute(self):
+        return self.client._execute(self)
+
+class SQLiteRequestBuilder:
+    def __init__(self, client, table):
+        if table not in SCHEMA:
+            raise APIError({"code": "42P01", "message": f'relation "public.{table}" does not exist'})
+        self.client = client
+        self.table = table
+
+    def select(self, *columns, count=None):
+        return SQLiteQuery(self.client, self.table, "select", ",".join(columns) or "*", count=count)
+
+    def insert(self, rows, count=None, returning=None, upsert=False, default_to_null=True):
+        return SQLiteQuery(self.client, self.table, "insert", payload=rows)
+
+    def upsert(self, rows, on_conflict="", ignore_duplicates=False, **kwargs):
+        method = "upsert_ignore" if ignore_duplicates else "upsert"
+        return SQLiteQuery(self.client, self.table, method, payload=rows, on_conflict=on_conflict or None)
+
+    def update(self, values, count=None):
+        return SQLiteQuery(self.client, self.table, "update", payload=values)
+
+    def delete(self, count=None):
+        return SQLiteQuery(self.client, self.table, "delete")
+
+class SQLiteRPC:
+    def __init__(self, client, fn, params):
+        self.client = client
+        self.fn = fn
+        self.params = params
+        self.headers = {}
+
+    def execute(self):
+        return self.client._call(self.fn, self.params, self.headers)
+
+class _SQLiteAuth:
+    """Accepts any email/password; the user id is derived from the email"""
+
+    def __init__(self, client):
+        self.client = client
+        self.admin = self
+        self._emails = {}  # user id -> email, so refreshed sessions keep the address
+
+    def _respond(self, email, user_id=None):
+        user = SimpleNamespace(id=user_id or str(uuid.uuid5(uuid.NAMESPACE_URL, email)), email=email)
+        self._emails[user.id] = email
+        self.client.user_id = user.id
+        session = SimpleNamespace(
+            access_token=f"sqlite-{user.id}", refresh_token=f"sqlite-refresh-{user.id}",
+            expires_at=int(time.time()) + 3600, expires_in=3600, user=user
+        )
+        return SimpleNamespace(user=user, session=session)
+
+    def sign_in_with_password(self, credentials):
+        return self._respond(credentials["email"])
+
+    def sign_up(self, credentials):
+        return self._respond(credentials["email"])
+
+    def refresh_session(self, refresh_token=None):
+        if not refresh_token or not refresh_token.startswith("sqlite-refresh-"):
+            raise APIError({"code": "refresh_token_not_found", "message": "Invalid Refresh Token: Refresh Token Not Found"})
+        user_id = refresh_token.removeprefix("sqlite-refresh-")
+        return self._respond(self._emails.get(user_id), user_id)
+
+    def sign_out(self, jwt=None, scope="global"):
+        pass
+
+class SQLiteClient:
+    """Drop-in replacement for supabase.Client backed by a SQLite database"""
+
+    def __init__(self, path=":memory:", latency_ms=0, max_rows=MAX_ROWS):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.max_rows = max_rows
+        self.user_id = None
+        self._request_uid = None
+        self.auth = _SQLiteAuth(self)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            for table, (pk, columns) in SCHEMA.items():
+                column_sql = ", ".join(f'"{name}" {kind}' for name, kind in columns.items())
+                self._conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{table}" ("{pk}" INTEGER PRIMARY KEY AUTOINCREMENT, {column_sql})'
+                )
+            for table, references in FOREIGN_KEYS.items():
+                for column in references:
+                    self._conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_{column}" ON "{table}" ("{column}")')
+            self._conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS "ux_daily_nutrition_day" ON "daily_nutrition" ("user_id", "day")')
+
+    # --- supabase-py surface ---
+    def table(self, name):
+        return SQLiteRequestBuilder(self, name)
+
+    from_ = table
+
+    def rpc(self, fn, params=None):
+        return SQLiteRPC(self, fn, params or {})
+
+    def load_rows(self, table, rows):
+        """Bulk-load rows without per-row RETURNING; used for seeding synthetic data"""
+        if not rows:
+            return
+        columns = list(rows[0])
+        column_sql = ", ".join(f'"{column}"' for column in columns)
+        sql = f'INSERT INTO "{table}" ({column_sql}) VALUES ({", ".join("?" * len(columns))})'
+        with self._lock, self._conn:
+            self._conn.executemany(sql, [tuple(self._encode(table, row)[c] for c in columns) for row in rows])
+
+    # --- execution ---
+    def _begin_request(self):
+        request_counts[self.path] += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def _encode(self, table, row):
+        # Round-trip through JSON like the HTTP client does, so unserializable values fail the same way
+        row = json.loads(json.dumps(row))
+        _, columns = SCHEMA[table]
+        unknown = set(row) - set(columns) - {SCHEMA[table][0]}
+        if unknown:
+            raise APIError({
+                "code": "PGRST204",
+                "message": f"Could not find the '{sorted(unknown)[0]}' column of '{table}' in the schema cache"
+            })
+        return {k: json.dumps(v) if columns.get(k) == "JSON" and v is not None else v for k, v in row.items()}
+
+    def _decode(self, table, row):
+        row = dict(row)
+        for column, kind in SCHEMA[table][1].items():
+            if kind == "JSON" and row.get(column) is not None:
+                row[column] = json.loads(row[column])
+        return row
+
+    def _execute(self, query):
+        self._begin_request()
+        with self._lock, self._conn:
+            if query.method == "select":
+                return self._select(query)
+            if query.method == "insert":
+                return SQLiteResponse(self._insert(query.table, query.payload))
+            if query.method in ("upsert", "upsert_ignore"):
+                return SQLiteResponse(self._upsert(query))
+            where, params = query._where()
+            if query.method == "update":
+                values = self._encode(query.table, query.payload)
+                assignments = ", ".join(f'"{column}" = ?' for column in values)
+                cursor = self._conn.execute(
+                    f'UPDATE "{query.table}" SET {assignments}{where} RETURNING *', [*values.values(), *params]
+                )
+            else:
+                cursor = self._conn.execute(f'DELETE FROM "{query.table}"{where} RETURNING *', params)
+            return SQLiteResponse([self._decode(query.table, row) for row in cursor.fetchall()])
+
+    def _select(self, query):
+        plain, embeds = _parse_select(query.columns)
+        where, params = query._where()
+        sql = f'SELECT * FROM "{query.table}"{where}'
+        if query.orders:
+            sql += " ORDER BY " + ", ".join(query.orders)
+        # Like PostgREST's max-rows, silently cap every response, whatever limit was asked for
+        limit = min(query.row_limit, self.max_rows) if query.row_limit is not None else self.max_rows
+        if limit is not None:
+            sql += f" LIMIT {int(limit)} OFFSET {int(query.offset or 0)}"
+        rows = [self._decode(query.table, row) for row in self._conn.execute(sql, params)]
+        count = None
+        if query.count:
+            count = self._conn.execute(f'SELECT COUNT(*) FROM "{query.table}"{where}', params).fetchone()[0]
+        return SQLiteResponse(self._shape(query.table, rows, plain, embeds), count)
+
+    def _shape(self, table, rows, plain, embeds):
+        for relation, (sub_plain, sub_embeds) in embeds.items():
+            self._embed(table, rows, relation, sub_plain, sub_embeds)
+        if "*" in plain or not plain:
+            return rows
+        keep = set(plain) | set(embeds)
+        return [{k: v for k, v in row.items() if k in keep} for row in rows]
+
+    def _embed(self, table, rows, relation, plain, embeds):
+        """Attach `relation` to each row with one IN query, many-to-one as an object, one-to-many as a list"""
+        if relation not in SCHEMA:
+            raise APIError({"code": "PGRST200", "message": f"Could not find a relationship between '{table}' and '{relation}'"})
+        relation_pk = SCHEMA[relation][0]
+        outgoing = [c for c, ref in FOREIGN_KEYS.get(table, {}).items() if ref == relation]
+        incoming = [c for c, ref in FOREIGN_KEYS.get(relation, {}).items() if ref == table]
+        if outgoing:
+            local, remote, many = outgoing[0], relation_pk, False
+        elif incoming:
+            local, remote, many = SCHEMA[table][0], incoming[0], True
+        else:
+            raise APIError({"code": "PGRST200", "message": f"Could not find a relationship between '{table}' and '{relation}'"})
+
+        keys = list({row[local] for row in rows if row.get(local) is not None})
+        related = []
+        for start in range(0, len(keys), 900):  # stay under SQLite's bound-parameter limit
+            chunk = keys[start:start + 900]
+            related += [
+                self._decode(relation, row) for row in self._conn.execute(
+                    f'SELECT * FROM "{relation}" WHERE "{remote}" IN ({", ".join("?" * len(chunk))})', chunk
+                )
+            ]
+        shaped = self._shape(relation, related, plain, embeds)
+        grouped = {}
+        for original, row in zip(related, shaped):
+            grouped.setdefault(original[remote], []).append(row)
+        for row in rows:
+            matches = grouped.get(row.get(local), [])
+            row[relation] = matches if many else (matches[0] if matches else None)
+
+    def _insert(self, table, payload):
+        rows = payload if isinstance(payload, list) else [payload]
+        inserted = []
+        for row in rows:
+            row = self._encode(table, row)
+            if "created_at" in SCHEMA[table][1]:
+                row.setdefault("created_at", _now())
+            columns = ", ".join(f'"{column}"' for column in row)
+            cursor = self._conn.execute(
+                f'INSERT INTO "{table}" ({columns}) VALUES ({", ".join("?" * len(row))}) RETURNING *',
+                list(row.values())
+            )
+            inserted.append(self._decode(table, cursor.fetchone()))
+        return inserted
+
+    def _upsert(self, query):
+        table = query.table
+        conflict = [c.strip() for c in (query.on_conflict or SCHEMA[table][0]).split(",")]
+        rows = query.payload if isinstance(query.payload, list) else [query.payload]
+        written = []
+        for row in rows:
+            if any(row.get(c) is None for c in conflict):
+                written += self._insert(table, row)
+                continue
+            where = " AND ".join(f'"{c}" = ?' for c in conflict)
+            existing = self._conn.execute(f'SELECT 1 FROM "{table}" WHERE {where}', [row[c] for c in conflict]).fetchone()
+            if existing is None:
+                written += self._insert(table, row)
+            elif query.method == "upsert":
+                values = self._encode(table, row)
+                assignments = ", ".join(f'"{column}" = ?' for column in values)
+                cursor = self._conn.execute(
+                    f'UPDATE "{table}" SET {assignments} WHERE {where} RETURNING *',
+                    [*values.values(), *[row[c] for c in conflict]]
+                )
+                written += [self._decode(table, r) for r in cursor.fetchall()]
+        return written
+
+    # --- RPCs (SQLite versions of the functions in sql/) ---
+    def _auth_uid(self, headers):
+        """auth.uid() for a request: the user in an access token issued by this fake, else the signed-in user"""
+        token = headers.get("Authorization", "").removeprefix("Bearer ")
+        return token.removeprefix("sqlite-") if token.startswith("sqlite-") else self.user_id
+
+    def _call(self, fn, params, headers=None):
+        self._begin_request()
+        handler = getattr(self, f"_rpc_{fn}", None)
+        if handler is None:
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function public.{fn} in the schema cache"})
+        with self._lock, self._conn:
+            self._request_uid = self._auth_uid(headers or {})
+            return SQLiteResponse(handler(**params))
+
+    def _rpc_get_recipe_ingredients(self, recipe_id):
+        rows = self._conn.execute(
+            'SELECT f.food_name, ri.amount AS "Amount (grams)", f.protein, f.carbohydrates, f.sugars, '
+            'f.fat, f.saturates, f.fiber FROM recipe_ingredients ri JOIN foods f ON ri.food_id = f.food_id '
+            'WHERE ri.recipe_id = ?', [recipe_id]
+        )
+        return [dict(row) for row in rows]
+
+    def _rpc_get_workout_stats(self):
+        # Scoped to the caller like the real function's auth.uid() filter
+        row = self._conn.execute(
+            "SELECT (SELECT COUNT(*) FROM workouts WHERE user_id = ?) AS total_workouts, "
+            "COUNT(we.workout_id) AS total_exercises, "
+            "COALESCE(SUM(COALESCE(e.exercise_type, 'strength') <> 'cardio'), 0) AS strength_exercises, "
+            "COALESCE(SUM(e.exercise_type = 'cardio'), 0) AS cardio_exercises "
+            "FROM workout_exercises we JOIN workouts w ON w.workout_id = we.workout_id "
+            "LEFT JOIN exercises e ON e.exercise_id = we.exercise_id "
+            "WHERE w.user_id = ?",
+            [self._request_uid, self._request_uid]
+        ).fetchone()
+        return [dict(row)]
+
+    def _save_with_children(self, parent_table, parent_row, key, child_key, children):
+        parent = self._insert(parent_table, {**parent_row, "user_id": self._request_uid or parent_row.get("user_id")})[0]
+        for table, rows in children.items():
+            self._insert(table, [{**row, child_key: parent[key]} for row in rows or []])
+        return parent[key]
+
+    def _rpc_save_meal(self, meals, meal_foods=(), meal_recipes=()):
+        return self._save_with_children(
+            "meals", meals, "meal_id", "meal_id", {"meal_foods": meal_foods, "meal_recipes": meal_recipes}
+        )
+
+    def _rpc_save_body_measurement(self, body_measurements, custom_measurements=()):
+        return self._save_with_children(
+            "body_measurements", body_measurements, "measurement_id", "body_measurement_id",
+            {"custom_measurements": custom_measurements}
+        )
+
+    def _rpc_import_workouts(self, workouts):
+        new_ids = []
+        for workout in workouts:
+            workout = dict(workout)
+            logs = workout.pop("exercises", None) or []
+            owner = self._request_uid or workout.get("user_id")
+            created_at = workout.get("created_at") or _now()
+            parent = self._insert("workouts", {**workout, "user_id": owner, "created_at": created_at, "updated_at": _now()})[0]
+            self._insert("workout_exercises", [
+                {**log, "workout_id": parent["workout_id"], "user_id": owner, "created_at": created_at} for log in logs
+            ])
+            new_ids.append(parent["workout_id"])
+        return new_ids
+
+    def _rpc_add_daily_nutrition(self, day, totals):
+        if self._request_uid is None:
+            raise APIError({"code": "23502", "message": 'null value in column "user_id" violates not-null constraint'})
+        macros = ["protein", "carbohydrates", "sugars", "fat", "saturates", "fiber"]
+        values = [float(totals.get(column) or 0) for column in macros]
+        self._conn.execute(
+            f'INSERT INTO daily_nutrition (user_id, day, meal_count, {", ".join(macros)}, updated_at) '
+            f'VALUES (?, ?, 1, {", ".join("?" * len(macros))}, ?) '
+            'ON CONFLICT (user_id, day) DO UPDATE SET meal_count = meal_count + 1, '
+            + ", ".join(f"{column} = {column} + excluded.{column}" for column in macros) + ", updated_at = excluded.updated_at",
+            [self._request_uid, day, *values, _now()]
+        )
+        return None
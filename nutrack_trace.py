@@ -0,0 +1,123 @@
+"""Per-rerun tracing of backend queries.
+
+Every query executed through get_supabase() is recorded against the current
+script run: table, method, filters, duration, row count and (with tracing
+enabled) response size. Pages call trace_page() first thing, optionally
+declaring a query budget. Enable the sidebar panel with `?debug=queries` in
+the URL or `QUERY_TRACE = true` under [debug] in st.secrets; set TRACE_FILE
+there as well to append every run to a JSON lines file.
+"""
+import json
+import time
+from datetime import datetime, timezone
+
+import streamlit as st
+
+HISTORY_LENGTH = 20
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+def _debug_config():
+    return st.secrets.get("debug", {})
+
+def tracing_enabled():
+    return bool(_debug_config().get("QUERY_TRACE")) or st.query_params.get("debug") == "queries"
+
+def trace_page(page, budget=None):
+    """Start a new trace for this rerun of `page`; budget is the max queries one rerun may start.
+
+    A paged read counts once however many pages it takes.
+    """
+    previous = st.session_state.get("query_trace")
+    if previous and previous["queries"]:
+        history = st.session_state.setdefault("query_trace_history", [])
+        history.append(previous)
+        del history[:-HISTORY_LENGTH]
+        if _debug_config().get("TRACE_FILE"):
+            _append_jsonl(_debug_config()["TRACE_FILE"], previous)
+    st.session_state.query_trace = {
+        "page": page,
+        "budget": budget,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "queries": [],
+    }
+    if tracing_enabled():
+        st.session_state.query_trace_panel = st.sidebar.empty()
+        _show_history_export()
+    else:
+        st.session_state.pop("query_trace_panel", None)
+
+def record_query(table, method, filters, started, response, continuation=False):
+    trace = st.session_state.get("query_trace")
+    if trace is None:
+        return
+    data = getattr(response, "data", None)
+    trace["queries"].append({
+        "table": table,
+        "method": method,
+        "filters": filters,
+        "continuation": continuation,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "rows": len(data) if isinstance(data, list) else int(data is not None),
+        # Serialising the payload again costs time, so size is only measured while tracing is on
+        "bytes": len(json.dumps(data, default=str)) if tracing_enabled() else None,
+    })
+    panel = st.session_state.get("query_trace_panel")
+    if panel is not None:
+        _show_panel(panel, trace)
+
+def summarize(trace):
+    queries = trace["queries"]
+    return {
+        "page": trace["page"],
+        "requests": len(queries),
+        "reads": _reads(trace),
+        "total_ms": round(sum(q["duration_ms"] for q in queries), 2),
+        "rows": sum(q["rows"] for q in queries),
+        "bytes": sum(q["bytes"] or 0 for q in queries),
+        "budget": trace["budget"],
+    }
+
+def _reads(trace):
+    """Requests that start a read or write; later pages of a paged read do not count against the budget"""
+    return sum(not q.get("continuation") for q in trace["queries"])
+
+def budget_violation(trace):
+    """Return a message if the trace started more queries than its page's budget, else None"""
+    if trace is None or trace["budget"] is None or _reads(trace) <= trace["budget"]:
+        return None
+    tables = ", ".join(f"{q['method']} {q['table']}" for q in trace["queries"] if not q.get("continuation"))
+    return f"{trace['page']} made {_reads(trace)} queries (budget {trace['budget']}): {tables}"
+
+def assert_query_budget(trace):
+    message = budget_violation(trace)
+    if message:
+        raise QueryBudgetExceeded(message)
+
+def to_jsonl(traces):
+    return "".join(json.dumps({**trace, "summary": summarize(trace)}, default=str) + "\n" for trace in traces)
+
+def _append_jsonl(path, trace):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(to_jsonl([trace]))
+
+def _show_panel(panel, trace):
+    summary = summarize(trace)
+    with panel.container():
+        st.markdown("**Query trace**")
+        st.caption(
+            f"{summary['requests']} requests ({summary['reads']} queries), {summary['total_ms']:.0f} ms, "
+            f"{summary['rows']} rows, {summary['bytes'] / 1024:.1f} KB"
+        )
+        if budget_violation(trace):
+            st.error(f"Over budget: {summary['reads']} > {summary['budget']} queries")
+        st.dataframe(trace["queries"], hide_index=True, use_container_width=True)
+
+def _show_history_export():
+    history = st.session_state.get("query_trace_history", [])
+    if history:
+        st.sidebar.download_button(
+            "Download query traces (JSONL)", to_jsonl(history),
+            file_name="nutrack_query_trace.jsonl", mime="application/jsonl"
+        )
@@ -1,26 +1,613 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
 import streamlit as st
-from supabase import create_client
 
-# Always initialize the client here
-url = st.secrets["supabase"]["SUPABASE_URL"]
-key = st.secrets["supabase"]["SUPABASE_KEY"]
-supabase = create_client(url, key)
+from nutrack_trace import record_query
+
+# pandas and the supabase/postgrest stack take most of a cold page import, so
+# they are imported where first used rather than here (see benchmarks/import_times.py)
+if TYPE_CHECKING:
+    from supabase import Client
+
+# --- Supabase Client Initialization ---
+# The client (and the HTTP connection pool behind it) is built once per process
+# and shared by every page and every user session. The user's access token is
+# attached to each request instead of being set on the shared client.
+# Setting BACKEND = "sqlite" under [supabase] in st.secrets swaps in the local
+# SQLite stand-in (see nutrack_sqlite.py) for offline runs and benchmarks.
+def _supabase_credentials():
+    config = st.secrets["supabase"]
+    return config.get("SUPABASE_URL", ""), config.get("SUPABASE_KEY", "")
+
+def _use_sqlite():
+    return st.secrets["supabase"].get("BACKEND", "supabase") == "sqlite"
+
+@st.cache_resource(show_spinner=False)
+def _shared_client() -> "Client":
+    if _use_sqlite():
+        from nutrack_sqlite import SQLiteClient
+        config = st.secrets["supabase"]
+        return SQLiteClient(config.get("SQLITE_PATH", ":memory:"), latency_ms=config.get("LATENCY_MS", 0),
+                            max_rows=config.get("MAX_ROWS", 1000))
+    from supabase import create_client
+    url, key = _supabase_credentials()
+    return create_client(url, key)
+
+def _access_token():
+    if "session" in st.session_state and st.session_state.session:
+        return st.session_state.session.access_token
+    return None
+
+WRITE_METHODS = {"insert", "upsert", "update", "delete"}
+# RPCs that write, and the tables whose cached reads they make stale
+RPC_WRITES = {
+    "save_meal": ["meals", "meal_foods", "meal_recipes"],
+    "save_body_measurement": ["body_measurements", "custom_measurements"],
+    "add_daily_nutrition": ["daily_nutrition"],
+    "import_workouts": ["workouts", "workout_exercises"],
+}
+
+class _AuthedRequestBuilder:
+    """Wraps a postgrest request builder so every query it starts carries the bearer token."""
+
+    def __init__(self, builder, token, table):
+        self._builder = builder
+        self._token = token
+        self._table = table
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def start_query(*args, **kwargs):
+            query = _with_token(attr(*args, **kwargs), self._token)
+            return _Query(query, self._table, name)
+        return start_query
+
+class _Query:
+    """Proxy around a postgrest query.
+
+    Executed queries are recorded in the rerun's query trace, and writes
+    invalidate cached reads of their table. Paged reads mark the requests
+    after their first as continuations.
+    """
+    continuation = False
+
+    def __init__(self, query, table, method):
+        self._query = query
+        self._table = table
+        self._method = method
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def chain(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._query else result
+        return chain
+
+    def execute(self):
+        started = time.perf_counter()
+        response = self._query.execute()
+        record_query(self._table, self._method, _describe_filters(self._query), started, response, self.continuation)
+        if self._method in WRITE_METHODS:
+            invalidate_table(self._table)
+        elif self._method == "rpc":
+            for table in RPC_WRITES.get(self._table, ()):
+                invalidate_table(table)
+        return response
+
+def _describe_filters(query):
+    params = getattr(query, "params", None)  # postgrest builders keep filters as query params
+    if params is not None:
+        return str(params)
+    return str(getattr(query, "filters", ""))
+
+def _with_token(query, token):
+    query.headers["Authorization"] = f"Bearer {token}"
+    return query
+
+class UserClient:
+    """Per-user view of the shared Supabase client.
+
+    `table()` and `rpc()` behave like the supabase-py client, but the current
+    user's access token is read from the session and applied per request.
+    """
+
+    def __init__(self, get_client, get_anon_key):
+        # Both are resolved per request, so neither the client nor st.secrets is touched until a query runs
+        self._get_client = get_client
+        self._get_anon_key = get_anon_key
+
+    @property
+    def _client(self) -> "Client":
+        return self._get_client()
+
+    def _token(self):
+        ensure_fresh_session()
+        return _access_token() or self._get_anon_key()
+
+    def table(self, name):
+        return _AuthedRequestBuilder(self._client.table(name), self._token(), name)
+
+    def rpc(self, fn, params=None):
+        return _Query(_with_token(self._client.rpc(fn, params or {}), self._token()), fn, "rpc")
+
+def get_supabase() -> UserClient:
+    """Return a client for the current user backed by the process-wide connection pool."""
+    return UserClient(_shared_client, lambda: _supabase_credentials()[1])
+
+def get_auth_client() -> "Client":
+    """Return a throwaway client for sign-in/sign-up.
+
+    GoTrue keeps the signed-in session on the client it was called on, so auth
+    calls never go through the shared client.
+    """
+    if _use_sqlite():
+        return _shared_client()  # the SQLite stand-in keeps no auth state
+    from supabase import create_client
+    url, key = _supabase_credentials()
+    return create_client(url, key)
+
+def sign_out():
+    try:
+        if _access_token():
+            get_auth_client().auth.admin.sign_out(_access_token())
+    except Exception:
+        pass  # The session is dropped locally either way
+    st.session_state.clear()
+
+supabase = get_supabase()
+
+# --- Session refresh ---
+# Access tokens are refreshed on first use once they are this close to expiring,
+# so requests never go out with a token the server is about to reject.
+REFRESH_MARGIN_SECONDS = 120
+_refresh_lock = threading.Lock()
+
+def ensure_fresh_session():
+    """Refresh the session's access token if it expires soon. Returns False when there is no usable session."""
+    session = st.session_state.get("session")
+    if not session:
+        return False
+    expires_at = getattr(session, "expires_at", None)
+    if expires_at is None or expires_at - time.time() > REFRESH_MARGIN_SECONDS:
+        return True
+    with _refresh_lock:
+        # Refresh tokens are single-use; another thread of this session may have refreshed already
+        if st.session_state.get("session") is not session:
+            return bool(st.session_state.get("session"))
+        try:
+            response = get_auth_client().auth.refresh_session(session.refresh_token)
+        except Exception:
+            for key in ("session", "user", "profile_confirmed"):
+                st.session_state.pop(key, None)
+            return False
+        if st.session_state.get("profile_confirmed") == (session.user.id, session.access_token):
+            st.session_state.profile_confirmed = (session.user.id, response.session.access_token)
+        st.session_state.session = response.session
+        st.session_state.user = response.user or session.user
+    return True
+
+# --- Cached table reads ---
+class TableCache:
+    """Process-wide TTL cache of table reads with LRU eviction under a memory cap.
+
+    Keys are (user_id, table, query shape). Entries are dropped when they expire,
+    when the cache grows past max_bytes (least recently used first), or when a
+    write to their table goes through the app's client.
+    """
+
+    def __init__(self, ttl_seconds=300, max_bytes=256 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, DataFrame, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, df):
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, df, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, table):
+        with self._lock:
+            # Reads that embed the table (e.g. "*, foods(*)") are stale too
+            stale = [key for key in self._entries if key[1] == table or f"{table}(" in key[2]]
+            for key in stale:
+                self._drop(key)
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[2]
+
+@st.cache_resource(show_spinner=False)
+def _table_cache():
+    config = st.secrets.get("cache", {})
+    return TableCache(
+        ttl_seconds=config.get("TTL_SECONDS", 300),
+        max_bytes=config.get("MAX_MB", 256) * 1024 * 1024
+    )
+
+def _current_user_id():
+    return st.session_state.user.id if "user" in st.session_state else None
+
+# --- Paged reads ---
+# PostgREST returns at most max-rows rows per request (1000 on Supabase) and
+# silently drops the rest, so reads page through with keyset cursors: each
+# page asks for the rows after the last key seen, an index range scan however
+# deep the page. Only the first request of a read counts against a page's
+# query budget; later pages are traced as continuations.
+PAGE_SIZE = 1000  # must not exceed the server's max-rows, or a capped page looks like the last one
+
+PRIMARY_KEYS = {
+    "user_profiles": "id",
+    "foods": "food_id",
+    "recipes": "recipe_id",
+    "recipe_ingredients": "recipe_ingredient_id",
+    "recipe_nutrition": "recipe_id",
+    "meals": "meal_id",
+    "meal_foods": "meal_food_id",
+    "meal_recipes": "meal_recipe_id",
+    "daily_nutrition": "daily_nutrition_id",
+    "exercises": "exercise_id",
+    "workouts": "workout_id",
+    "workout_exercises": "workout_exercise_id",
+    "body_measurements": "measurement_id",
+    "custom_measurements": "custom_measurement_id",
+}
+
+def _top_level_columns(columns):
+    names, depth, item = [], 0, ""
+    for char in columns + ",":
+        if char == "," and depth == 0:
+            names.append(item.strip())
+            item = ""
+            continue
+        depth += (char == "(") - (char == ")")
+        item += char
+    return names
+
+def _with_columns(columns, required):
+    """Add the cursor columns to a projection if it leaves them out"""
+    present = _top_level_columns(columns)
+    if "*" in present:
+        return columns
+    return ", ".join(present + [column for column in required if column not in present])
+
+def contains_pattern(term):
+    """ilike pattern matching `term` anywhere, with %, _ and backslash in it taken literally"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _filtered(client, table, columns, filters, gte, lte, lt, in_, continuation):
+    query = client.table(table).select(columns)
+    for column, value in (filters or {}).items():
+        query = query.eq(column, value)
+    for column, value in (gte or {}).items():
+        query = query.gte(column, value)
+    for column, value in (lte or {}).items():
+        query = query.lte(column, value)
+    for column, value in (lt or {}).items():
+        query = query.lt(column, value)
+    for column, values in (in_ or {}).items():
+        query = query.in_(column, list(values))
+    if continuation and isinstance(query, _Query):
+        query.continuation = True
+    return query
+
+def iter_pages(table, columns="*", filters=None, gte=None, lte=None, lt=None, in_=None, key=None,
+               page_size=PAGE_SIZE, client=None, id_range=None, continuation=False):
+    """Yield every matching row of `table` as lists of up to page_size rows, in key order.
+
+    filters are equality filters, gte/lte/lt bounds and in_ membership lists,
+    each a dict keyed by column. key defaults to the primary key; another key
+    such as created_at is paired with the primary key to break ties. id_range
+    is an (exclusive low, inclusive high) primary key range; either end may be None.
+    """
+    client = client or supabase
+    pk = PRIMARY_KEYS[table]
+    key = key or pk
+    columns = _with_columns(columns, [key, pk])
+    last = None  # (key, primary key) of the last row yielded
+    past_tie = False
+    while True:
+        query = _filtered(client, table, columns, filters, gte, lte, lt, in_, continuation)
+        continuation = True
+        low, high = id_range or (None, None)
+        if low is not None:
+            query = query.gt(pk, low)
+        if high is not None:
+            query = query.lte(pk, high)
+        if last is not None:
+            if key == pk:
+                query = query.gt(pk, last[1])
+            else:
+                query = query.gt(key, last[0]) if past_tie else query.gte(key, last[0])
+        query = query.order(key) if key == pk else query.order(key).order(pk)
+        rows = query.limit(page_size).execute().data
+        full = len(rows) == page_size
+        if last is not None and key != pk and not past_tie:
+            # gte re-reads the rows tied with the last key; drop the ones already yielded
+            rows = [row for row in rows if row[key] != last[0] or row[pk] > last[1]]
+            if full and not rows:
+                # A whole page shares one key value: walk the rest of the tie by primary key, then move past it
+                yield from iter_pages(table, columns, {**(filters or {}), key: last[0]}, gte, lte, lt, in_, None,
+                                      page_size, client, (last[1], high), True)
+                past_tie = True
+                continue
+        past_tie = False
+        if rows:
+            yield rows
+            last = (rows[-1][key], rows[-1][pk])
+        if not full:
+            return
+
+def _in_threads(calls, max_workers):
+    """Run zero-argument callables in threads that share the script run context; returns their futures"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+
+    def run(call):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return call()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls)) or 1, thread_name_prefix="nutrack-read") as pool:
+        return [pool.submit(run, call) for call in calls]
+
+def fetch_all(table, columns="*", prefetch=0, **options):
+    """Every matching row of `table` as one list, however many pages it takes.
+
+    Takes iter_pages' options. With prefetch > 1, once the first page shows
+    there is more, the rest of the primary key range is split into `prefetch`
+    slices read concurrently.
+    """
+    pk = PRIMARY_KEYS[table]
+    page_size = options.get("page_size", PAGE_SIZE)
+    pages = iter_pages(table, columns, **options)
+    rows = next(pages, [])
+    if len(rows) < page_size or prefetch < 2 or options.get("key", pk) != pk or options.get("id_range"):
+        return rows + [row for page in pages for row in page]
+    pages.close()
+    filter_options = [options.get(name) for name in ("filters", "gte", "lte", "lt", "in_")]
+    top = _filtered(options.get("client") or supabase, table, pk, *filter_options, continuation=True)
+    highest = top.order(pk, desc=True).limit(1).execute().data[0][pk]
+    low = rows[-1][pk]
+    if not isinstance(low, int) or not isinstance(highest, int):
+        return rows + [row for page in iter_pages(table, columns, id_range=(low, None), continuation=True, **options)
+                       for row in page]
+    edges = [low + (highest - low) * i // prefetch for i in range(prefetch)] + [highest]
+    slices = [
+        lambda span=span: [row for page in iter_pages(table, columns, id_range=span, continuation=True, **options)
+                           for row in page]
+        for span in zip(edges, edges[1:]) if span[0] < span[1]
+    ]
+    for future in _in_threads(slices, prefetch):
+        rows += future.result()
+    return rows
+
+def cached_select(table, columns="*", filters=None, order=None, desc=False, gte=None, lte=None, in_=None,
+                  prefetch=0):
+    """Read every matching row of a table through the per-user cache.
+
+    filters is a dict of column -> value equality filters; gte and lte are
+    dicts of inclusive lower and upper bounds; in_ maps a column to the values
+    it may take. Rows are fetched with fetch_all,
+    so reads are not cut off at the server's max-rows, and sorted by `order`
+    afterwards. Returns a DataFrame that callers may add columns to without
+    affecting the cached copy.
+    """
+    import pandas as pd
+
+    filters, gte, lte, in_ = filters or {}, gte or {}, lte or {}, in_ or {}
+    key = (_current_user_id(), table, columns, tuple(sorted(filters.items())), order, desc,
+           tuple(sorted(gte.items())), tuple(sorted(lte.items())),
+           tuple(sorted((column, tuple(values)) for column, values in in_.items())))
+    cache = _table_cache()
+    df = cache.get(key)
+    if df is None:
+        df = pd.DataFrame(fetch_all(table, columns, prefetch, filters=filters, gte=gte, lte=lte, in_=in_))
+        if order and len(df):
+            # Postgres puts NULLs last ascending and first descending
+            df = df.sort_values(order, ascending=not desc, kind="stable", na_position="first" if desc else "last",
+                                ignore_index=True)
+        cache.put(key, df)
+    return df.copy(deep=False)
+
+def cached_rpc(function, depends_on):
+    """Rows returned by a read-only RPC, cached per user like cached_select.
+
+    The query shape names the tables in depends_on as embeds, so a write to any
+    of them from any session drops the entry along with their cached reads.
+    """
+    import pandas as pd
+
+    key = (_current_user_id(), "rpc", f"{function}() " + " ".join(f"{table}(*)" for table in depends_on))
+    cache = _table_cache()
+    df = cache.get(key)
+    if df is None:
+        df = pd.DataFrame(supabase.rpc(function).execute().data)
+        cache.put(key, df)
+    return df.copy(deep=False)
+
+# --- Concurrent reads ---
+MAX_CONCURRENT_READS = 4
+
+def fetch_concurrently(reads, max_workers=MAX_CONCURRENT_READS):
+    """Run independent reads in parallel and return {name: DataFrame}.
+
+    reads maps a name to a zero-argument callable returning a DataFrame, e.g.
+    {"foods": lambda: cached_select("foods")}. Worker threads share the
+    script run context, so st.session_state and the read cache work as usual.
+    A read that fails is reported with st.error and comes back as an empty
+    DataFrame without affecting the others.
+    """
+    import pandas as pd
+
+    futures = dict(zip(reads, _in_threads(list(reads.values()), max_workers)))
+    frames = {}
+    for name, future in futures.items():
+        try:
+            frames[name] = future.result()
+        except Exception as e:
+            st.error(f"Error fetching {name}: {str(e)}")
+            frames[name] = pd.DataFrame()
+    return frames
+
+def invalidate_table(table):
+    """Drop every cached read of `table`; called after each write made through get_supabase()"""
+    if table:
+        _table_cache().invalidate(table)
+
+# --- Batched writes ---
+class UnitOfWorkResult:
+    def __init__(self):
+        self.inserted = {}  # table -> rows returned by the server
+        self.failed = {}  # table -> error message
+        self.rolled_back = False
+
+    @property
+    def ok(self):
+        return not self.failed
+
+    def error_summary(self):
+        return "; ".join(f"{table}: {error}" for table, error in self.failed.items())
+
+class UnitOfWork:
+    """Collects rows across tables and writes them in as few requests as possible.
+
+    With a parent row, commit() first tries a transactional RPC taking one
+    argument per table (parent row as an object, child rows as arrays). If the
+    RPC is not deployed it falls back to one bulk insert per table, stamping the
+    parent key into the children and deleting everything written so far if any
+    table fails, so no orphan parent rows are left behind.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or supabase
+        self._parent = None
+        self._rows = {}
+
+    def set_parent(self, table, row, key, child_key=None):
+        """Register the parent row; its generated `key` is written to `child_key` (default: key) on every child"""
+        self._parent = (table, row, key, child_key or key)
+
+    def add(self, table, rows):
+        rows = rows if isinstance(rows, list) else [rows]
+        self._rows.setdefault(table, []).extend(rows)
+
+    def commit(self, rpc=None):
+        """Write everything; failures (server, network or timeout) are reported in the result, never raised"""
+        result = UnitOfWorkResult()
+        if rpc and self._parent:
+            from postgrest.exceptions import APIError
+            try:
+                return self._commit_rpc(rpc, result)
+            except APIError as e:
+                if e.code != "PGRST202":  # PGRST202: function not found
+                    result.failed[rpc] = e.message
+                    return result
+            except Exception as e:
+                # The transaction may or may not have committed; falling back could write the rows twice
+                result.failed[rpc] = str(e)
+                return result
+        return self._commit_bulk(result)
+
+    def _commit_rpc(self, rpc, result):
+        table, row, key, _ = self._parent
+        params = {table: row, **{child: rows for child, rows in self._rows.items()}}
+        response = self.client.rpc(rpc, params).execute()
+        result.inserted[table] = [{**row, key: response.data}]
+        result.inserted.update(self._rows)
+        return result
+
+    def _commit_bulk(self, result):
+        if self._parent:
+            table, row, key, child_key = self._parent
+            try:
+                response = self.client.table(table).insert(row).execute()
+            except Exception as e:
+                result.failed[table] = str(e)
+                return result
+            if not response.data:
+                # Nothing came back (e.g. filtered by row level security), so there is no key for the children
+                result.failed[table] = "insert returned no row"
+                return result
+            result.inserted[table] = response.data
+            parent_id = response.data[0][key]
+            for rows in self._rows.values():
+                for child in rows:
+                    child[child_key] = parent_id
+
+        for table, rows in self._rows.items():
+            if not rows:
+                continue
+            try:
+                result.inserted[table] = self.client.table(table).insert(rows).execute().data
+            except Exception as e:
+                result.failed[table] = str(e)
+
+        if self._parent and result.failed:
+            self._rollback(result, parent_id)
+        return result
+
+    def _rollback(self, result, parent_id):
+        parent_table, _, key, child_key = self._parent
+        for table in [*self._rows, parent_table]:
+            if table in result.inserted:
+                try:
+                    column = key if table == parent_table else child_key
+                    self.client.table(table).delete().eq(column, parent_id).execute()
+                except Exception as e:
+                    result.failed.setdefault(table, f"rollback failed: {e}")
+                    continue
+                del result.inserted[table]
+        result.rolled_back = True
 
 def show_sidebar_user_info():
     with st.sidebar:
         if "user" in st.session_state and "session" in st.session_state:
             st.write(f"**Logged in as:** {st.session_state.user.email}")
             if st.button("Logout"):
-                supabase.auth.sign_out()
-                st.session_state.clear()
+                sign_out()
                 st.rerun()
         else:
             st.markdown('<a href="/" target="_self">Back to Login</a>', unsafe_allow_html=True)
 
 def user_has_profile(user_id):
+    """Whether the user has a profile row; a positive answer is remembered for the current access token"""
+    if st.session_state.get("profile_confirmed") == (user_id, _access_token()):
+        return True
     try:
-        supabase.postgrest.auth(st.session_state.session.access_token)
         result = supabase.table('user_profiles').select('id').eq('user_id', user_id).execute()
+        if result.data:
+            st.session_state.profile_confirmed = (user_id, _access_token())
         return bool(result.data)
     except Exception as e:
         st.error(f"Profile check failed: {str(e)}")
@@ -36,7 +623,10 @@ def check_auth_and_profile():
 )
 
         st.stop()
-    supabase.postgrest.auth(st.session_state.session.access_token)
+    if not ensure_fresh_session():
+        st.warning("Your session has expired. Please log in again.")
+        st.markdown('<a href="/" target="_self">Back to Login</a>', unsafe_allow_html=True)
+        st.stop()
     if not user_has_profile(st.session_state.user.id):
         st.warning("You must complete your profile to access this page.")
-        st.stop()
\ No newline at end of file
+        st.stop()
@@ -0,0 +1,326 @@
+"""Import workout history from other trackers: strength-log CSVs and GPX tracks.
+
+CSV exports are read in chunks and normalized with vectorized pandas
+operations. Both layouts are accepted: one row per set (as Strong and Hevy
+export them, consecutive identical sets are folded into one log with a set
+count) or one row per exercise with a sets column. Each GPX file becomes one
+cardio workout; its trackpoints are streamed with iterparse and distance and
+duration come from one vectorized pass over them.
+
+Exercise names are resolved through a lookup loaded once, and names the
+catalog lacks are created together. Workouts and their logs are written in
+batches, each batch one import_workouts transaction (sql/import_workouts.sql).
+Workouts already logged with the same date and name are skipped, so an import
+can be re-run.
+
+    python -m nutrack_workout_import strong.csv runs/*.gpx --user <user id> --sqlite nutrack.db
+"""
+import argparse
+import sys
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from nutrack_rollup import client_from_args
+from nutrack_utils import fetch_all
+
+CHUNK_SIZE = 20_000  # CSV rows parsed at a time
+WORKOUT_BATCH = 200  # workouts per import_workouts call
+EARTH_RADIUS_KM = 6371.0088
+LOG_COLUMNS = ["sets", "reps", "weight", "duration", "distance", "notes"]
+COLUMNS = ["created_at", "workout_date", "workout_name", "exercise_name", "exercise_type", *LOG_COLUMNS]
+
+# Header spellings seen in common exports -> our column names
+COLUMN_ALIASES = {
+    "date": "created_at", "start_time": "created_at", "workout_date": "created_at",
+    "workout": "workout_name", "title": "workout_name",
+    "exercise": "exercise_name", "exercise_title": "exercise_name",
+    "weight_kg": "weight", "distance_km": "distance",
+    "duration_minutes": "duration",
+}
+
+class WorkoutImportStats:
+    """Running totals for one import; rejected counts source rows by reason"""
+
+    def __init__(self):
+        self.read = 0
+        self.workouts = 0
+        self.logs = 0
+        self.skipped = 0
+        self.exercises_created = 0
+        self.rejected = Counter()
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        rejected = sum(self.rejected.values())
+        reasons = ", ".join(f"{count} {reason}" for reason, count in (+self.rejected).most_common())
+        return (f"{self.read} rows read, {self.workouts} workouts and {self.logs} exercise logs added, "
+                f"{self.skipped} workouts already logged, {self.exercises_created} new exercises, "
+                f"{rejected} rows rejected{f' ({reasons})' if reasons else ''} in {self.elapsed:.1f}s "
+                f"({self.rows_per_second:,.0f} rows/s)")
+
+# --- Strength CSV ---
+def _normalize_csv(chunk, stats):
+    chunk = chunk.rename(columns=lambda c: str(c).strip().lower().replace(" ", "_")).rename(columns=COLUMN_ALIASES)
+    chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+    if "seconds" in chunk:
+        # Per-set exports give each set's time in seconds; their duration column is the whole workout's
+        chunk["duration"] = pd.to_numeric(chunk["seconds"], errors="coerce") / 60
+    missing = {"created_at", "exercise_name"} - set(chunk)
+    if missing:
+        raise ValueError(f"CSV has no {' or '.join(sorted(missing))} column")
+    rows = chunk.reindex(columns=COLUMNS)
+    rows["created_at"] = pd.to_datetime(rows["created_at"], errors="coerce", format="mixed")
+    rows["exercise_name"] = rows["exercise_name"].astype("string").str.replace(r"\s+", " ", regex=True).str.strip()
+    rows["workout_name"] = rows["workout_name"].astype("string").str.strip().fillna("Imported workout")
+    for column in ["sets", "reps", "weight", "duration", "distance"]:
+        rows[column] = pd.to_numeric(rows[column], errors="coerce")
+    # Exports log empty cells as 0; stored logs leave them out
+    numbers = ["sets", "reps", "weight", "duration", "distance"]
+    rows[numbers] = rows[numbers].where(lambda v: v > 0)
+    rows["notes"] = rows["notes"].astype("string").str.strip().replace("", pd.NA)
+
+    bad = pd.Series(False, index=rows.index)
+    for reason, mask in [("bad date", rows["created_at"].isna()),
+                         ("missing exercise", rows["exercise_name"].isna() | (rows["exercise_name"] == "")),
+                         ("nothing logged", rows[["reps", "duration", "distance"]].isna().all(axis=1))]:
+        mask = mask.fillna(True).astype(bool) & ~bad
+        stats.rejected[reason] += int(mask.sum())
+        bad |= mask
+    rows = rows[~bad]
+    rows["workout_date"] = rows["created_at"].dt.date.astype(str)
+    rows["exercise_type"] = np.where(rows["reps"].isna(), "cardio", "strength")
+    return rows
+
+def _fold_sets(rows):
+    """Collapse consecutive rows logging the same exercise, reps and weight into one log with a set count.
+
+    Exercise names are compared case-insensitively, as ExerciseLookup matches
+    them. The folded log keeps the first name spelling and note among its sets.
+    """
+    if rows.empty:
+        return rows
+    per_set = rows["sets"].isna() & rows["reps"].notna()
+    key = ["workout_date", "workout_name", "exercise_name", "reps", "weight"]
+    keys = rows[key].assign(exercise_name=rows["exercise_name"].str.casefold())
+    # A new run starts whenever any key column differs from the previous row
+    shifted = keys.shift()
+    changed = ~((keys == shifted) | (keys.isna() & shifted.isna())).all(axis=1)
+    run = (changed | ~per_set | ~per_set.shift(fill_value=False)).cumsum()
+    folded = rows.groupby(run, sort=False).agg({
+        column: "first" for column in COLUMNS
+    })
+    folded["sets"] = folded["sets"].fillna(rows[per_set].groupby(run[per_set]).size())
+    return folded[COLUMNS]
+
+def read_strength_csv(source, stats, chunksize=CHUNK_SIZE):
+    """Yield normalized log frames from a CSV, never splitting a workout across two frames"""
+    carry = None
+    for chunk in pd.read_csv(source, chunksize=chunksize, dtype=str, skipinitialspace=True):
+        stats.read += len(chunk)
+        rows = _normalize_csv(chunk, stats)
+        if carry is not None:
+            rows = pd.concat([carry, rows])
+        if rows.empty:
+            carry = None
+            continue
+        # The last workout may continue in the next chunk; hold it back until it is complete
+        last = (rows["workout_date"] == rows["workout_date"].iloc[-1]) & (rows["workout_name"] == rows["workout_name"].iloc[-1])
+        tail_start = len(rows) - int(last[::-1].cummin().sum())
+        carry = rows.iloc[tail_start:]
+        if tail_start:
+            yield _fold_sets(rows.iloc[:tail_start])
+    if carry is not None:
+        yield _fold_sets(carry)
+
+# --- GPX tracks ---
+def haversine_km(lat, lon):
+    """Distance in km between consecutive (lat, lon) points, in degrees"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    dlat, dlon = np.diff(lat), np.diff(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+def read_gpx(source, exercise_name="Running", name=None):
+    """One cardio log for a GPX track: distance from its trackpoints, duration from their timestamps"""
+    lats, lons, times = [], [], []
+    track_name = track_type = None
+    for _, element in ET.iterparse(source, events=("end",)):
+        tag = _local(element.tag)
+        if tag == "trkpt":
+            lats.append(float(element.get("lat")))
+            lons.append(float(element.get("lon")))
+            when = next((child.text for child in element if _local(child.tag) == "time"), None)
+            times.append(when)
+            element.clear()  # keep memory flat on long tracks
+        elif tag == "name" and track_name is None and not lats:
+            track_name = (element.text or "").strip() or None
+        elif tag == "type" and track_type is None:
+            track_type = (element.text or "").strip() or None
+    if len(lats) < 2:
+        raise ValueError("GPX file has fewer than two trackpoints")
+    times = pd.to_datetime(pd.Series(times), errors="coerce", utc=True).dropna()
+    started = times.iloc[0] if len(times) else pd.NaT
+    if pd.isna(started):
+        raise ValueError("GPX trackpoints have no timestamps")
+    log = {
+        "created_at": started, "workout_date": str(started.date()),
+        "workout_name": name or track_name or f"{exercise_name} {started:%Y-%m-%d}",
+        "exercise_name": track_type.replace("_", " ").title() if track_type else exercise_name,
+        "exercise_type": "cardio", "sets": None, "reps": None, "weight": None,
+        "duration": round((times.iloc[-1] - started).total_seconds() / 60, 1),
+        "distance": round(float(haversine_km(np.array(lats), np.array(lons)).sum()), 2),
+        "notes": None,
+    }
+    return pd.DataFrame([log], columns=COLUMNS)
+
+# --- Writing ---
+class ExerciseLookup:
+    """Exercise ids by case-insensitive name, loaded once; missing names are created in bulk"""
+
+    def __init__(self, client, user_id):
+        self.client = client
+        self.user_id = user_id
+        exercises = fetch_all("exercises", "exercise_id, exercise_name", client=client)
+        self._ids = {str(row["exercise_name"]).casefold().strip(): row["exercise_id"] for row in exercises}
+
+    def ids(self, names, types):
+        """Exercise ids for a Series of names; types gives the exercise_type for names that get created.
+        Returns (ids, number created)."""
+        keys = names.str.casefold()
+        missing = pd.DataFrame({"key": keys, "exercise_name": names, "exercise_type": types})
+        missing = missing[~missing["key"].isin(list(self._ids))].drop_duplicates("key")
+        if len(missing):
+            rows = [{"exercise_name": row["exercise_name"], "exercise_type": row["exercise_type"], "user_id": self.user_id}
+                    for row in missing.to_dict("records")]
+            for start in range(0, len(rows), WORKOUT_BATCH):
+                for row in self.client.table("exercises").insert(rows[start:start + WORKOUT_BATCH]).execute().data:
+                    self._ids[row["exercise_name"].casefold()] = row["exercise_id"]
+        return keys.map(self._ids), len(missing)
+
+def _existing_workouts(client, user_id):
+    rows = fetch_all("workouts", "workout_date, workout_name", client=client, filters={"user_id": user_id})
+    return {(str(row["workout_date"])[:10], row["workout_name"]) for row in rows}
+
+def _workouts(frame, user_id):
+    """Group a frame's logs into import_workouts payloads, keyed by (workout_date, workout_name)"""
+    frame = frame.assign(created_at=pd.to_datetime(frame["created_at"]).map(pd.Timestamp.isoformat))
+    frame = frame.astype(object).where(frame.notna(), None)
+    for column in ("sets", "reps", "exercise_id"):
+        frame[column] = frame[column].map(lambda v: None if v is None else int(v))
+    workouts = {}
+    for row in frame.to_dict("records"):
+        key = (row["workout_date"], row["workout_name"])
+        if key not in workouts:
+            workouts[key] = {"user_id": user_id, "workout_name": row["workout_name"], "workout_date": row["workout_date"],
+                             "created_at": row["created_at"], "exercises": []}
+        workouts[key]["exercises"].append({
+            "exercise_id": row["exercise_id"],
+            **{column: row[column] for column in LOG_COLUMNS if row[column] is not None}
+        })
+    return workouts
+
+def _write_batch(client, workouts):
+    """Write a batch in one transaction; without the RPC, bulk inserts that remove the workouts if the logs fail"""
+    from postgrest.exceptions import APIError
+
+    try:
+        return client.rpc("import_workouts", {"workouts": workouts}).execute().data
+    except APIError as e:
+        if e.code != "PGRST202":  # PGRST202: function not found
+            raise
+    parents = [{key: value for key, value in workout.items() if key != "exercises"} for workout in workouts]
+    new_ids = [row["workout_id"] for row in client.table("workouts").insert(parents).execute().data]
+    logs = [{**log, "workout_id": workout_id, "user_id": workout["user_id"]}
+            for workout_id, workout in zip(new_ids, workouts) for log in workout["exercises"]]
+    try:
+        if logs:
+            client.table("workout_exercises").insert(logs).execute()
+    except Exception:
+        client.table("workouts").delete().in_("workout_id", new_ids).execute()
+        raise
+    return new_ids
+
+def import_workouts(client, user_id, frames, stats=None, progress=None):
+    """Write normalized log frames (from read_strength_csv / read_gpx) as workouts; returns WorkoutImportStats"""
+    stats = stats or WorkoutImportStats()
+    lookup = ExerciseLookup(client, user_id)
+    existing = _existing_workouts(client, user_id)
+    pending = []
+    for frame in frames:
+        if frame.empty:
+            continue
+        frame = frame.copy()
+        frame["exercise_id"], created = lookup.ids(frame["exercise_name"], frame["exercise_type"])
+        stats.exercises_created += created
+        for key, workout in _workouts(frame, user_id).items():
+            if key in existing:
+                stats.skipped += 1
+                continue
+            existing.add(key)
+            pending.append(workout)
+            if len(pending) >= WORKOUT_BATCH:
+                _flush(client, pending, stats)
+        if progress:
+            progress(stats)
+    _flush(client, pending, stats)
+    if progress:
+        progress(stats)
+    return stats
+
+def _flush(client, pending, stats):
+    if not pending:
+        return
+    _write_batch(client, pending)
+    stats.workouts += len(pending)
+    stats.logs += sum(len(workout["exercises"]) for workout in pending)
+    pending.clear()
+
+def read_sources(paths, stats, exercise_name="Running"):
+    """Normalized log frames for a mix of CSV and GPX files; GPX rows count towards stats.read"""
+    for path in paths:
+        if Path(getattr(path, "name", path)).suffix.lower() == ".gpx":
+            stats.read += 1
+            try:
+                yield read_gpx(path, exercise_name)
+            except (ValueError, ET.ParseError) as e:
+                stats.rejected[f"unreadable GPX ({e})"] += 1
+        else:
+            yield from read_strength_csv(path, stats)
+
+# --- Command line ---
+def main():
+    parser = argparse.ArgumentParser(description="Import workout history from strength-log CSVs and GPX tracks")
+    parser.add_argument("paths", nargs="+", help="CSV and/or GPX files")
+    parser.add_argument("--user", required=True, help="user id the workouts belong to")
+    parser.add_argument("--sqlite", help="import into a SQLite database instead of Supabase")
+    parser.add_argument("--gpx-exercise", default="Running", help="exercise for GPX tracks without a type")
+    args = parser.parse_args()
+
+    client = client_from_args(args)
+    stats = WorkoutImportStats()
+
+    def report(stats):
+        sys.stderr.write(f"\r{stats.read} rows, {stats.workouts} workouts ({stats.rows_per_second:,.0f} rows/s)")
+
+    import_workouts(client, args.user, read_sources(args.paths, stats, args.gpx_exercise), stats, report)
+    sys.stderr.write("\n")
+    print(stats.summary())
+
+if __name__ == "__main__":
+    main()
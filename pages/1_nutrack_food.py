@@ -1,39 +1,77 @@
 import streamlit as st
-from supabase import create_client, Client
 import pandas as pd
 from datetime import datetime
-from nutrack_utils import show_sidebar_user_info, check_auth_and_profile
+from nutrack_import import apply_food_changes, format_of, import_foods, read_chunks
+from nutrack_trace import trace_page
+from nutrack_utils import show_sidebar_user_info, check_auth_and_profile, get_supabase, contains_pattern
 
+trace_page("pages/1_nutrack_food.py", budget=4)
 show_sidebar_user_info()
 check_auth_and_profile()
 
 # --- Supabase Client Initialization ---
-url: str = st.secrets["supabase"]["SUPABASE_URL"]
-key: str = st.secrets["supabase"]["SUPABASE_KEY"]
-supabase: Client = create_client(url, key)
+supabase = get_supabase()
 
-# --- Always set the access token before any DB operation ---
-def set_supabase_auth():
-    # This ensures all subsequent queries use the logged-in user's session
-    supabase.postgrest.auth(st.session_state.session.access_token)
+FOOD_COLUMNS = ['food_name', 'protein', 'carbohydrates', 'sugars', 'fat', 'saturates', 'fiber']
+PAGE_SIZE = 50
+
+if "food_page" not in st.session_state:
+    st.session_state.food_page = 1
+
+def reset_food_page():
+    st.session_state.food_page = 1
 
 # --- Main Page Content ---
+def fetch_food_page(name_filter, sort_col, descending, page):
+    """Fetch one page of foods, filtered and sorted server-side. Returns (DataFrame, total matching rows)"""
+    start = (page - 1) * PAGE_SIZE
+    query = supabase.table("foods").select(", ".join(FOOD_COLUMNS), count="exact")
+    if name_filter:
+        query = query.ilike("food_name", contains_pattern(name_filter))
+    # food_id breaks ties so rows never repeat or vanish between pages
+    query = query.order(sort_col, desc=descending).order("food_id")
+    response = query.range(start, start + PAGE_SIZE - 1).execute()
+    return pd.DataFrame(response.data, columns=FOOD_COLUMNS), response.count or 0
+
 def fetch_and_display_data():
-    try:
-        set_supabase_auth()
-        response = supabase.table("foods").select("*").execute()
-        df = pd.DataFrame(response.data)
-        # Drop the last 3 columns
-        df_visible = df.iloc[:, 1:-3]
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        name_filter = st.text_input("Search foods", on_change=reset_food_page)
+    with col2:
+        sort_col = st.selectbox("Sort by", FOOD_COLUMNS, format_func=lambda c: c.replace("_", " ").title(),
+                                on_change=reset_food_page)
+    with col3:
+        descending = st.toggle("Descending", on_change=reset_food_page)
 
-        # Identify numeric columns and round them to 2 decimal places
-        numeric_cols = df_visible.select_dtypes(include="number").columns
-        for col in df_visible.select_dtypes(include="number").columns:
-            df_visible[col] = df_visible[col].map("{:.2f}".format)
-        
-        st.table(df_visible)
+    try:
+        df, total = fetch_food_page(name_filter.strip(), sort_col, descending, st.session_state.food_page)
     except Exception as e:
         st.error(f"Data fetch failed: {str(e)}")
+        return
+
+    # Numbers stay numeric; formatting happens in the browser
+    st.dataframe(
+        df,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "food_name": "Food",
+            **{col: st.column_config.NumberColumn(col.title(), format="%.2f") for col in FOOD_COLUMNS[1:]}
+        }
+    )
+
+    page_count = max(1, -(-total // PAGE_SIZE))
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+    with prev_col:
+        if st.button("Previous", disabled=st.session_state.food_page <= 1):
+            st.session_state.food_page -= 1
+            st.rerun()
+    with info_col:
+        st.caption(f"Page {st.session_state.food_page} of {page_count} ({total} foods)")
+    with next_col:
+        if st.button("Next", disabled=st.session_state.food_page >= page_count):
+            st.session_state.food_page += 1
+            st.rerun()
 
 st.title("Foods Database")
 fetch_and_display_data()
@@ -50,7 +88,6 @@ with st.form("new_food_form", clear_on_submit=True):
     
     if st.form_submit_button("Add Food"):
         try:
-            set_supabase_auth()
             new_food = {
                 "food_name": name,
                 "protein": protein,
@@ -69,3 +106,26 @@ with st.form("new_food_form", clear_on_submit=True):
                 st.error("Insert failed. Check RLS policies.")
         except Exception as e:
             st.error(f"Insert error: {str(e)}")
+
+# --- Bulk Import ---
+with st.expander("Import foods from a file"):
+    st.caption("CSV or JSON lines with a food_name column and macros per 100 g: "
+               "protein, carbohydrates, sugars, fat, saturates, fiber.")
+    uploaded = st.file_uploader("Foods file", type=["csv", "jsonl", "ndjson", "json"])
+    on_duplicate = st.radio("Foods already in the database", ["skip", "update"],
+                            format_func=lambda choice: {"skip": "Keep existing", "update": "Update macros"}[choice],
+                            horizontal=True)
+    if st.button("Import", disabled=uploaded is None):
+        bar = st.progress(0.0, text="Starting import...")
+
+        def show_progress(stats):
+            bar.progress(min(uploaded.tell() / max(uploaded.size, 1), 1.0),
+                         text=f"{stats.read} rows read, {stats.inserted} added ({stats.rows_per_second:,.0f} rows/s)")
+        try:
+            stats = import_foods(supabase, read_chunks(uploaded, format_of(uploaded.name)),
+                                 user_id=st.session_state.user.id, on_duplicate=on_duplicate, progress=show_progress)
+            apply_food_changes(supabase, stats.updated_ids)
+            bar.progress(1.0, text="Import finished")
+            st.success(stats.summary())
+        except Exception as e:
+            st.error(f"Import failed: {str(e)}")
@@ -1,54 +1,66 @@
 import streamlit as st
-from supabase import create_client, Client
 import pandas as pd
 from datetime import datetime
-from nutrack_utils import show_sidebar_user_info, check_auth_and_profile
+from nutrack_nutrition import MACRO_COLS, scale_per_100g
+from nutrack_recipe_nutrition import NUTRITION_COLS, PER_100G_COLS, add_ingredient
+from nutrack_rollup import recompute_shared
+from nutrack_search import get_search_index, search_box
+from nutrack_trace import trace_page
+from nutrack_utils import show_sidebar_user_info, check_auth_and_profile, get_supabase, cached_select, fetch_concurrently, MAX_CONCURRENT_READS
 
+trace_page("pages/2_nutrack_recipes.py", budget=4)
 show_sidebar_user_info()
 check_auth_and_profile()
 
 # --- Supabase Client Initialization ---
-url: str = st.secrets["supabase"]["SUPABASE_URL"]
-key: str = st.secrets["supabase"]["SUPABASE_KEY"]
-supabase: Client = create_client(url, key)
-
-def set_supabase_auth():
-    supabase.postgrest.auth(st.session_state.session.access_token)
+supabase = get_supabase()
 
 def fetch_recipe_data():
-    set_supabase_auth()
-    response = supabase.table("recipes").select("*").execute()
-    df = pd.DataFrame(response.data)
-    return df
+    return cached_select("recipes", "recipe_id, recipe_name")
 
 def fetch_recipe_ingredients(recipe_id):
-    set_supabase_auth()
-    response = supabase.table("recipe_ingredients").select('*, foods(*)').execute()
-    df = pd.DataFrame(response.data)
-    if len(df) < 1:
-        return df
-    df = df[df['recipe_id'] == recipe_id]
-    if len(df) < 1:
-        return df
-    else:
-        food_cols = ['food_id', 'food_name', 'protein', 'carbohydrates', 'sugars', 'fat', 'saturates', 'fiber'] 
-        foods_expanded = pd.json_normalize(df['foods'])[food_cols]
-        recipe_cols = ['recipe_id', 'food_id', 'amount']
-        df = df[recipe_cols]
-        clean_df = pd.merge(df, foods_expanded, on='food_id')
-        for col in food_cols[2:]:
-            clean_df[col] = clean_df.apply(lambda row: row[col] * (row['amount']/100), axis=1)
-        display_cols = ['food_name', 'amount', 'protein', 'carbohydrates', 'sugars', 'fat', 'saturates', 'fiber']
-        return clean_df[display_cols]
+    display_cols = ['food_name', 'amount'] + MACRO_COLS
+    df = cached_select(
+        "recipe_ingredients",
+        f"amount, foods(food_name, {', '.join(MACRO_COLS)})",
+        filters={"recipe_id": recipe_id}
+    )
+    if df.empty:
+        return pd.DataFrame(columns=display_cols)
+    clean_df = pd.json_normalize(df['foods'])
+    clean_df['amount'] = df['amount'].to_numpy()
+    return scale_per_100g(clean_df)[display_cols]
+
+def fetch_recipe_nutrition():
+    # Empty results come back without columns; the merges and the engine need them
+    return cached_select("recipe_nutrition", ", ".join(NUTRITION_COLS)).reindex(columns=NUTRITION_COLS)
 
 def fetch_food_data():
-    set_supabase_auth()
-    response = supabase.table("foods").select("*").execute()
-    df = pd.DataFrame(response.data)
-    return df
+    # The catalog can run to tens of thousands of rows; read its pages concurrently.
+    # Kept sorted by food_id so food_row() can binary search it.
+    return cached_select("foods", f"food_id, food_name, {', '.join(MACRO_COLS)}", order="food_id",
+                         prefetch=MAX_CONCURRENT_READS)
 
-recipes = fetch_recipe_data()
-foods = fetch_food_data()
+def food_row(foods, food_id):
+    """A food's row from the food_id-sorted catalog, without scanning or copying it"""
+    return foods.iloc[foods["food_id"].searchsorted(food_id)]
+
+def recipe_list(recipes, recipe_nutrition):
+    """Recipe names with their stored weight and macros per 100 g, in the order of `recipes`"""
+    listed = recipes[["recipe_id", "recipe_name"]].merge(recipe_nutrition, on="recipe_id", how="left")
+    return listed[["recipe_name", "total_grams", *PER_100G_COLS]]
+
+RECIPE_LIST_CONFIG = {
+    "recipe_name": "Recipe",
+    "total_grams": st.column_config.NumberColumn("Weight", format="%.0f g"),
+    **{per_100g: st.column_config.NumberColumn(f"{col.title()} /100g", format="%.1f g")
+       for col, per_100g in zip(MACRO_COLS, PER_100G_COLS)},
+}
+
+loaded = fetch_concurrently({
+    "recipes": fetch_recipe_data, "recipe nutrition": fetch_recipe_nutrition, "foods": fetch_food_data
+})
+recipes, recipe_nutrition, foods = loaded["recipes"], loaded["recipe nutrition"], loaded["foods"]
 
 st.title("Recipes")
 st.subheader("Current Saved Recipes", divider="blue")
@@ -60,12 +72,12 @@ if recipes.empty:
         recipe_name = st.text_input("Recipe Name")
         submitted = st.form_submit_button("Add Recipe")
         if submitted:
-            set_supabase_auth()
             current_time = datetime.now().isoformat()
             new_recipe = {
                 "recipe_name": recipe_name,
                 "created_at": current_time,
-                "updated_at": current_time
+                "updated_at": current_time,
+                "user_id": st.session_state.user.id
             }
             response = supabase.table("recipes").insert(new_recipe).execute()
             if response.data:
@@ -75,8 +87,10 @@ if recipes.empty:
                 st.error("Failed to add recipe to the database. Please try again.")
 else:
     recipe_selection = st.dataframe(
-        recipes.iloc[:,1:2],
+        recipe_list(recipes, recipe_nutrition),
         hide_index=True,
+        column_config=RECIPE_LIST_CONFIG,
+        key="recipe_table",
         on_select="rerun",
         selection_mode="single-row"
     )
@@ -84,28 +98,47 @@ else:
         selected_id = recipes.iloc[recipe_selection['selection']['rows'][0]]['recipe_id']
         selected_recipe = recipes[recipes['recipe_id']==selected_id].iloc[0]
         rec_id = int(selected_recipe.to_list()[0])
+        stored = recipe_nutrition[recipe_nutrition["recipe_id"] == rec_id]
         st.subheader("Current Ingredients", divider="blue")
         st.table(fetch_recipe_ingredients(rec_id))
+        if len(stored):
+            st.dataframe(
+                stored[["total_grams", *MACRO_COLS]],
+                hide_index=True,
+                column_config={
+                    "total_grams": st.column_config.NumberColumn("Total Weight", format="%.0f g"),
+                    **{col: st.column_config.NumberColumn(col.title(), format="%.1f g") for col in MACRO_COLS}
+                }
+            )
 
         # --- Indented content starts here ---
         st.markdown("<br>", unsafe_allow_html=True)  # Line break before forms
         spacer, content = st.columns([0.5, 6])  # Reduced indent
         with content:
             st.subheader("Add New Ingredient",divider="blue")
+            food_index = get_search_index("foods", foods, "food_name", "food_id")
+            food_matches = search_box("Search foods", food_index, key="ingredient_search")
             with st.form("new_ingredient_form", clear_on_submit=True):
-                food_name = st.selectbox("Food Name", options=foods['food_name'])
+                food_name = st.selectbox("Food Name", options=food_matches)
                 amount = st.number_input("Amount (g)", min_value=0.0, step=0.1)
-                food_id = foods[foods['food_name']==food_name]['food_id'].to_list()[0]    
                 ingredient_submitted = st.form_submit_button("Add Ingredient")
-                if ingredient_submitted:
-                    set_supabase_auth()
+                if ingredient_submitted and food_name is None:
+                    st.error("No food matches your search.")
+                elif ingredient_submitted:
+                    food_id = food_index.lookup(food_name)
+                    food_index.record_use(food_name)
                     new_ingredient = {
                         "food_id": food_id,
                         "recipe_id": rec_id,
-                        "amount": amount
+                        "amount": amount,
+                        "user_id": st.session_state.user.id
                     }
                     response = supabase.table("recipe_ingredients").insert(new_ingredient).execute()
                     if response.data:
+                        food = food_row(foods, food_id)
+                        add_ingredient(supabase, rec_id, food, amount, stored.iloc[0] if len(stored) else None)
+                        # Meals that used this recipe, whoever logged them, now add up differently
+                        recompute_shared(supabase, recipe_ids=[rec_id])
                         st.success(f"Successfully added {food_name} to the ingredients for {selected_recipe['recipe_name']}!")
                         st.rerun()
                     else:
@@ -134,7 +167,8 @@ else:
                         "saturates": sats,
                         "fiber": fiber,
                         "created_at": current_time,
-                        "updated_at": current_time
+                        "updated_at": current_time,
+                        "user_id": st.session_state.user.id
                     }
                     response = supabase.table("foods").insert(new_food).execute()
                     if response.data:
@@ -150,12 +184,12 @@ else:
             recipe_name = st.text_input("Recipe Name")
             submitted = st.form_submit_button("Add Recipe")
             if submitted:
-                set_supabase_auth()
                 current_time = datetime.now().isoformat()
                 new_recipe = {
                     "recipe_name": recipe_name,
                     "created_at": current_time,
-                    "updated_at": current_time
+                    "updated_at": current_time,
+                    "user_id": st.session_state.user.id
                 }
                 response = supabase.table("recipes").insert(new_recipe).execute()
                 if response.data:
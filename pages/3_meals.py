@@ -1,39 +1,101 @@
 import streamlit as st
-from supabase import create_client, Client
 import pandas as pd
-from datetime import datetime
-from nutrack_utils import show_sidebar_user_info, check_auth_and_profile
+from datetime import date, datetime, timedelta
+from nutrack_nutrition import MACRO_COLS, NutritionEngine
+from nutrack_recipe_nutrition import NUTRITION_COLS
+from nutrack_rollup import ROLLUP_COLS, ROLLUP_TABLE, add_meal, meal_day, weekly_summary
+from nutrack_search import get_search_index, search_box
+from nutrack_trace import trace_page
+from nutrack_utils import show_sidebar_user_info, check_auth_and_profile, get_supabase, cached_select, fetch_concurrently, UnitOfWork, MAX_CONCURRENT_READS
 
+trace_page("pages/3_meals.py", budget=6)
 show_sidebar_user_info()
 check_auth_and_profile()
 
 # --- Supabase Client Initialization ---
-url: str = st.secrets["supabase"]["SUPABASE_URL"]
-key: str = st.secrets["supabase"]["SUPABASE_KEY"]
-supabase: Client = create_client(url, key)
+supabase = get_supabase()
 
-def set_supabase_auth():
-    supabase.postgrest.auth(st.session_state.session.access_token)
+def fetch_recipes():
+    return cached_select("recipes", "recipe_id, recipe_name")
 
-def fetch_data(table):
-    set_supabase_auth()
-    response = supabase.table(table).select("*").execute()
-    return pd.DataFrame(response.data)
+def fetch_foods():
+    # The catalog can run to tens of thousands of rows; read its pages concurrently
+    return cached_select("foods", f"food_id, food_name, {', '.join(MACRO_COLS)}", prefetch=MAX_CONCURRENT_READS)
 
 
-def fetch_meal_foods(meal_id):
-    set_supabase_auth()
-    response = supabase.table("meal_foods").select("*").eq("meal_id", meal_id).execute()
-    return pd.DataFrame(response.data)
+MEAL_TYPES = ['Breakfast', 'Lunch', 'Dinner', 'Shake', 'Snack']
+MEAL_LOG_DAYS = 30
+MEAL_LOG_PAGE_SIZE = 25
+# Meals come back with their items embedded, so a page of the log is one request
+MEAL_LOG_COLUMNS = "meal_id, meal_desc, created_at, meal_foods(food_id, amount), meal_recipes(recipe_id, amount)"
 
-def fetch_meal_recipes(meal_id):
-    set_supabase_auth()
-    response = supabase.table("meal_recipes").select("*").eq("meal_id", meal_id).execute()
-    return pd.DataFrame(response.data)     
+def reset_meal_log():
+    st.session_state.meal_log_cursors = [None]
 
-meals = fetch_data("meals")
-recipes = fetch_data("recipes")
-foods = fetch_data("foods")
+def fetch_meal_log(start, end, meal_types, cursor=None):
+    """One page of meals logged between the start and end dates, newest first.
+
+    Pages are keyed on created_at rather than offset, so every page costs the
+    same however long the history is. cursor is None for the first page, else
+    the value returned with the previous page. Returns (rows, next cursor or None).
+    """
+    query = supabase.table("meals").select(MEAL_LOG_COLUMNS)
+    query = query.gte("created_at", start.isoformat()).lt("created_at", (end + timedelta(days=1)).isoformat())
+    if meal_types:
+        query = query.in_("meal_desc", meal_types)
+    skip = 0
+    if cursor:
+        # Meals sharing the cursor's timestamp may already have been shown; fetch past them and drop them
+        created_at, meal_id, skip = cursor
+        query = query.lte("created_at", created_at)
+    rows = query.order("created_at", desc=True).order("meal_id", desc=True).limit(MEAL_LOG_PAGE_SIZE + skip + 1).execute().data
+    if cursor:
+        rows = [r for r in rows if not (r["created_at"] == created_at and r["meal_id"] >= meal_id)]
+    page, more = rows[:MEAL_LOG_PAGE_SIZE], len(rows) > MEAL_LOG_PAGE_SIZE
+    if not more:
+        return page, None
+    last = page[-1]
+    tied = sum(r["created_at"] == last["created_at"] for r in page)
+    if cursor and last["created_at"] == created_at:
+        tied += skip
+    return page, (last["created_at"], last["meal_id"], tied)
+
+def meal_items(meals, relation, id_col):
+    """Flatten the items embedded in meal log rows into a meal_id, id_col, amount frame"""
+    return pd.DataFrame(
+        [{"meal_id": meal["meal_id"], **item} for meal in meals for item in meal[relation] or []],
+        columns=["meal_id", id_col, "amount"]
+    )
+
+def fetch_recipe_nutrition():
+    # Empty results come back without columns; the merges and the engine need them
+    return cached_select("recipe_nutrition", ", ".join(NUTRITION_COLS)).reindex(columns=NUTRITION_COLS)
+
+SUMMARY_WEEKS = 12
+
+def fetch_daily(start):
+    """Rollup rows from start to today, oldest first; saving a meal invalidates the cached read"""
+    daily = cached_select(ROLLUP_TABLE, ", ".join(ROLLUP_COLS), filters={"user_id": st.session_state.user.id},
+                          order="day", gte={"day": str(start)}).reindex(columns=ROLLUP_COLS)
+    daily["day"] = pd.to_datetime(daily["day"])
+    return daily
+
+def show_totals(totals):
+    st.dataframe(
+        totals.to_frame().T,
+        hide_index=True,
+        column_config={col: st.column_config.NumberColumn(col.title(), format="%.1f g") for col in MACRO_COLS}
+    )
+
+loaded = fetch_concurrently({
+    "recipes": fetch_recipes,
+    "foods": fetch_foods,
+    "recipe nutrition": fetch_recipe_nutrition,
+})
+recipes, foods = loaded["recipes"], loaded["foods"]
+nutrition = NutritionEngine(foods, recipe_nutrition=loaded["recipe nutrition"])
+food_index = get_search_index("foods", foods, "food_name", "food_id")
+recipe_index = get_search_index("recipes", recipes, "recipe_name", "recipe_id")
 
 # Session state initialization
 if "meal_content" not in st.session_state:
@@ -51,30 +113,14 @@ st.title("Meals")
 if not st.session_state.add_foods:
     st.subheader("Add a new meal", divider="blue")
     with st.form("new_meal_form", clear_on_submit=True):
-        meal_types = ['Breakfast', 'Lunch', 'Dinner', 'Shake', 'Snack']
-        meal_name = st.selectbox("Which Meal?", meal_types)
+        meal_name = st.selectbox("Which Meal?", MEAL_TYPES)
         
         if st.form_submit_button("Start Adding Foods"):
-            set_supabase_auth()
-            current_time = datetime.now().isoformat()
-            
-            # Create initial meal record
-            new_meal = {
-                "user_id": st.session_state.session.user.id,
-                "meal_desc": meal_name,
-                "created_at": current_time
-            }
-            
-            # Insert meal and get generated ID
-            response = supabase.table("meals").insert(new_meal).execute()
-            
-            if response.data:
-                st.session_state.meal_id = response.data[0]['meal_id']
-                st.session_state.add_foods = True
-                st.session_state.meal_name = meal_name
-                st.rerun()
-            else:
-                st.error("Failed to create meal entry")
+            # The meal row is only written on "Save Meal", together with its contents
+            st.session_state.meal_started_at = datetime.now().isoformat()
+            st.session_state.add_foods = True
+            st.session_state.meal_name = meal_name
+            st.rerun()
 
 else:
     now = datetime.now()
@@ -91,44 +137,47 @@ else:
     for recipe in st.session_state.meal_content['recipes']:
         st.write(f'{iter}. {recipe[1]}g of {recipe[0]}')
         iter += 1
+    if iter > 1:
+        show_totals(nutrition.meal_totals(
+            foods=[(food_id, amount) for _, amount, food_id in st.session_state.meal_content['foods']],
+            recipes=[(recipe_id, amount) for _, amount, recipe_id in st.session_state.meal_content['recipes']]
+        ))
     
     st.write("")
     if iter > 1:
         with st.form("finalize_meal", border=False):
             if st.form_submit_button("Save Meal"):
-                set_supabase_auth()
-                current_time = datetime.now().isoformat()
-
-                for food in st.session_state.meal_content["foods"]:
-                    st.write(f'Add {food[1]}g of {food[0]} to meal_foods')
-                    food_id = int(foods[foods['food_name'] == food[0]]['food_id'].iloc[0])
-                    new_meal_food = {
-                        "meal_id": st.session_state.meal_id,
-                        "food_id": food_id,
-                        "amount": food[1],
-                        "user_id": st.session_state.session.user.id
-                    }
-                    st.write(new_meal_food)
-                    response = supabase.table("meal_foods").insert(new_meal_food).execute()
-
-                for recipe in st.session_state.meal_content["recipes"]:
-                    st.write(f'Add {recipe[1]}g of {recipe[0]} to meal_recipes')
-                    recipe_id = int(recipes[recipes['recipe_name'] == recipe[0]]['recipe_id'].iloc[0])
-                    new_meal_recipe = {
-                        "meal_id": st.session_state.meal_id,
-                        "recipe_id": recipe_id,
-                        "amount": recipe[1],
-                        "user_id": st.session_state.session.user.id
-                    }
-                    st.write(new_meal_recipe)
-                    response = supabase.table("meal_recipes").insert(new_meal_recipe).execute()
-
-            
-                # Session state reset
-                st.session_state.meal_content = {"foods": [], "recipes": []}
-                st.session_state.add_foods = False
-                st.session_state.meal_name = ""
-                st.rerun()
+                user_id = st.session_state.session.user.id
+                # Ids were resolved when each item was added, so renames since then do not matter
+                food_items = [(food_id, amount) for _, amount, food_id in st.session_state.meal_content["foods"]]
+                recipe_items = [(recipe_id, amount) for _, amount, recipe_id in st.session_state.meal_content["recipes"]]
+                uow = UnitOfWork(supabase)
+                uow.set_parent("meals", {
+                    "user_id": user_id,
+                    "meal_desc": st.session_state.meal_name,
+                    "created_at": st.session_state.meal_started_at
+                }, key="meal_id")
+                uow.add("meal_foods", [
+                    {"food_id": food_id, "amount": amount, "user_id": user_id} for food_id, amount in food_items
+                ])
+                uow.add("meal_recipes", [
+                    {"recipe_id": recipe_id, "amount": amount, "user_id": user_id} for recipe_id, amount in recipe_items
+                ])
+                result = uow.commit(rpc="save_meal")
+
+                if result.ok:
+                    try:
+                        add_meal(supabase, user_id, meal_day(st.session_state.meal_started_at),
+                                 nutrition.meal_totals(foods=food_items, recipes=recipe_items))
+                    except Exception as e:
+                        st.toast(f"Meal saved, but the daily summary could not be updated: {str(e)}")
+                    # Session state reset
+                    st.session_state.meal_content = {"foods": [], "recipes": []}
+                    st.session_state.add_foods = False
+                    st.session_state.meal_name = ""
+                    st.rerun()
+                else:
+                    st.error(f"Failed to save meal: {result.error_summary()}")
     
     st.write("")
     
@@ -145,58 +194,118 @@ else:
     
             source = st.radio("Source", ['Foods', 'Recipes'], key='source_selector')
 
+            index = food_index if st.session_state.source_selector == 'Foods' else recipe_index
+            matches = search_box(f"Search {st.session_state.source_selector.lower()}", index, key="meal_item_search")
+
             with st.form("add_food", clear_on_submit=True, border=False):
                 if st.session_state.source_selector == 'Foods':
-                    new_food = st.selectbox('Which Food?', foods['food_name'])
+                    new_food = st.selectbox('Which Food?', matches)
                 else:
-                    new_food = st.selectbox('Which Recipe?', recipes['recipe_name'])
+                    new_food = st.selectbox('Which Recipe?', matches)
 
                 new_amount = st.number_input("Amount (g)", min_value=0.0, step=0.1)
 
-                if st.form_submit_button("Add to Meal"):
-                    if st.session_state.source_selector == 'Foods':
-                        st.session_state.meal_content["foods"] += [[new_food, new_amount]]
+                if st.form_submit_button("Add to Meal") and new_food is not None:
+                    item_id = index.lookup(new_food)
+                    if item_id is None:
+                        st.error(f"{new_food} is no longer available. Please search again.")
                     else:
-                        st.session_state.meal_content["recipes"] += [[new_food, new_amount]]
-                    st.success(f"Added {new_amount}g of {new_food}!")
-                    st.rerun()
+                        index.record_use(new_food)
+                        if st.session_state.source_selector == 'Foods':
+                            st.session_state.meal_content["foods"] += [[new_food, new_amount, int(item_id)]]
+                        else:
+                            st.session_state.meal_content["recipes"] += [[new_food, new_amount, int(item_id)]]
+                        st.success(f"Added {new_amount}g of {new_food}!")
+                        st.rerun()
 
 
 if not st.session_state.add_foods:
+    st.subheader("Nutrition Summary", divider="blue")
+    daily = fetch_daily(date.today() - timedelta(weeks=SUMMARY_WEEKS))
+    today = daily[daily["day"].dt.date == date.today()]
+    if len(today):
+        st.write(f"**Today** ({int(today['meal_count'].iloc[0])} meals)")
+        show_totals(today[MACRO_COLS].iloc[0])
+    else:
+        st.write("Nothing logged today yet.")
+    macro_columns = {col: st.column_config.NumberColumn(col.title(), format="%.1f g") for col in MACRO_COLS}
+    last_week, by_week = st.tabs(["Last 7 days", f"Weekly averages (last {SUMMARY_WEEKS} weeks)"])
+    with last_week:
+        st.dataframe(
+            daily[daily["day"].dt.date > date.today() - timedelta(days=7)].sort_values("day", ascending=False),
+            hide_index=True,
+            column_config={"day": st.column_config.DateColumn("Day"), "meal_count": "Meals", **macro_columns}
+        )
+    with by_week:
+        st.dataframe(
+            weekly_summary(daily).sort_values("week", ascending=False),
+            hide_index=True,
+            column_config={"week": st.column_config.DateColumn("Week of"), "days_logged": "Days logged",
+                           "meal_count": "Meals", **macro_columns}
+        )
+
     with st.expander("View Previous Meals"):
-        meals = fetch_data("meals")
-        meals["created_at"] = pd.to_datetime(meals["created_at"])
         if "selected_meal" not in st.session_state:
             st.session_state.selected_meal = None
+        if "meal_log_cursors" not in st.session_state:
+            reset_meal_log()
+
+        range_col, type_col = st.columns([1, 1])
+        with range_col:
+            date_range = st.date_input(
+                "Logged between", value=(date.today() - timedelta(days=MEAL_LOG_DAYS), date.today()),
+                max_value=date.today(), on_change=reset_meal_log
+            )
+        with type_col:
+            meal_type_filter = st.multiselect("Meal types", MEAL_TYPES, placeholder="All meal types",
+                                              on_change=reset_meal_log)
+        # While the second date is being picked the range has only one end
+        range_start = date_range[0] if date_range else date.today()
+        range_end = date_range[1] if len(date_range) > 1 else range_start
+
+        try:
+            log_page, next_cursor = fetch_meal_log(range_start, range_end, meal_type_filter,
+                                                   st.session_state.meal_log_cursors[-1])
+        except Exception as e:
+            st.error(f"Failed to load meals: {str(e)}")
+            st.stop()
+        log_foods = meal_items(log_page, "meal_foods", "food_id")
+        log_recipes = meal_items(log_page, "meal_recipes", "recipe_id")
+        log = pd.DataFrame(log_page, columns=["meal_id", "meal_desc", "created_at"])
+        log["created_at"] = pd.to_datetime(log["created_at"], format="ISO8601")
+        log = log.join(nutrition.batch_meal_totals(log_foods, log_recipes), on="meal_id").fillna({c: 0.0 for c in MACRO_COLS})
 
-        # Display meals dataframe
         meal_display = st.dataframe(
-            meals.iloc[:, :-1],
+            log.drop(columns="meal_id"),
             hide_index=True,
             key="meal_table",
-            selection_mode="single-row",  # <-- Enable row selection
+            selection_mode="single-row",
             on_select="rerun",
             column_config={
                 "meal_desc": "Meal Type",
-                "created_at": st.column_config.DatetimeColumn("Logged At")
+                "created_at": st.column_config.DatetimeColumn("Logged At"),
+                **{col: st.column_config.NumberColumn(col.title(), format="%.1f g") for col in MACRO_COLS}
             }
         )
 
-        if len(meal_display["selection"]['rows']) > 0:
-            rowid = meal_display["selection"]['rows']
-            st.session_state.selected_meal = meals.iloc[rowid]["meal_id"].iloc[0]
-            meal_foods = fetch_meal_foods(st.session_state.selected_meal)
-            meal_recipes = fetch_meal_recipes(st.session_state.selected_meal)
-            for idx, row in meal_foods.iterrows():
-                amt = row['amount']
-                fd = foods[foods['food_id']==row['food_id']]['food_name'].iloc[0]
-                st.write(f'{amt}g of {fd}')
-
-            for idx, row in meal_recipes.iterrows():
-                amt = row['amount']
-                fd = recipes[recipes['recipe_id']==row['recipe_id']]['recipe_name'].iloc[0]
-                st.write(f'{amt}g of {fd}')
-
+        newer_col, info_col, older_col = st.columns([1, 4, 1])
+        with newer_col:
+            if st.button("Newer", disabled=len(st.session_state.meal_log_cursors) <= 1):
+                st.session_state.meal_log_cursors.pop()
+                st.rerun()
+        with info_col:
+            first = (len(st.session_state.meal_log_cursors) - 1) * MEAL_LOG_PAGE_SIZE
+            st.caption(f"Meals {first + 1 if len(log) else 0}-{first + len(log)}" + (" of more" if next_cursor else ""))
+        with older_col:
+            if st.button("Older", disabled=next_cursor is None):
+                st.session_state.meal_log_cursors.append(next_cursor)
+                st.rerun()
 
-        
-    
\ No newline at end of file
+        selected_rows = meal_display["selection"]["rows"]
+        if selected_rows and selected_rows[0] < len(log):
+            st.session_state.selected_meal = log["meal_id"].iloc[selected_rows[0]]
+            show_totals(log[MACRO_COLS].iloc[selected_rows[0]])
+            for item in log_foods[log_foods["meal_id"] == st.session_state.selected_meal].itertuples():
+                st.write(f"{item.amount}g of {food_index.names.get(item.food_id)}")
+            for item in log_recipes[log_recipes["meal_id"] == st.session_state.selected_meal].itertuples():
+                st.write(f"{item.amount}g of {recipe_index.names.get(item.recipe_id)}")
@@ -1,28 +1,19 @@
 import streamlit as st
-from supabase import create_client, Client
-import pandas as pd
 from datetime import datetime
-from nutrack_utils import show_sidebar_user_info, check_auth_and_profile
+from nutrack_trace import trace_page
+from nutrack_utils import show_sidebar_user_info, check_auth_and_profile, get_supabase, cached_select
 
+trace_page("pages/4_exercises.py", budget=2)
 show_sidebar_user_info()
 check_auth_and_profile()
 
 # --- Supabase Client Initialization ---
-url: str = st.secrets["supabase"]["SUPABASE_URL"]
-key: str = st.secrets["supabase"]["SUPABASE_KEY"]
-supabase: Client = create_client(url, key)
-
-# --- Always set the access token before any DB operation ---
-def set_supabase_auth():
-    # This ensures all subsequent queries use the logged-in user's session
-    supabase.postgrest.auth(st.session_state.session.access_token)
+supabase = get_supabase()
 
 # --- Main Page Content ---
 def fetch_and_display_exercises():
     try:
-        set_supabase_auth()
-        response = supabase.table("exercises").select("*").execute()
-        df = pd.DataFrame(response.data)
+        df = cached_select("exercises")
 
         if len(df) > 0:
             # Display relevant columns
@@ -65,7 +56,6 @@ with st.form("new_exercise_form", clear_on_submit=True):
     if st.form_submit_button("Add Exercise"):
         if name and exercise_type:
             try:
-                set_supabase_auth()
                 new_exercise = {
                     "exercise_name": name,
                     "exercise_type": exercise_type,
@@ -1,19 +1,17 @@
 import streamlit as st
-from supabase import create_client, Client
-import pandas as pd
 from datetime import date, datetime
-from nutrack_utils import show_sidebar_user_info, check_auth_and_profile
+from nutrack_analytics import get_strength_analytics, invalidate_strength_analytics, record_log, workout_days
+from nutrack_charts import show_progress_chart
+from nutrack_trace import trace_page
+from nutrack_workout_import import WorkoutImportStats, import_workouts, read_sources
+from nutrack_utils import show_sidebar_user_info, check_auth_and_profile, get_supabase, cached_select, cached_rpc, fetch_concurrently, invalidate_table
 
+trace_page("pages/5_workouts.py", budget=6)
 show_sidebar_user_info()
 check_auth_and_profile()
 
-# Supabase setup
-url: str = st.secrets["supabase"]["SUPABASE_URL"]
-key: str = st.secrets["supabase"]["SUPABASE_KEY"]
-supabase: Client = create_client(url, key)
-
-def set_supabase_auth():
-    supabase.postgrest.auth(st.session_state.session.access_token)
+# --- Supabase Client Initialization ---
+supabase = get_supabase()
 
 def convert_to_json_serializable(data):
     """Convert numpy/pandas types to JSON serializable types"""
@@ -37,23 +35,16 @@ def filter_null_values(data):
 
 def fetch_workouts():
     """Fetch user's workouts ordered by most recent first"""
-    try:
-        set_supabase_auth()
-        response = supabase.table("workouts").select("*").order("created_at", desc=True).execute()
-        return pd.DataFrame(response.data)
-    except Exception as e:
-        st.error(f"Error fetching workouts: {str(e)}")
-        return pd.DataFrame()
+    return cached_select("workouts", "workout_id, workout_name, workout_date, notes, created_at", order="created_at", desc=True)
 
 def fetch_exercises():
     """Fetch available exercises with their types"""
-    try:
-        set_supabase_auth()
-        response = supabase.table("exercises").select("exercise_id, exercise_name, exercise_type").execute()
-        return pd.DataFrame(response.data)
-    except Exception as e:
-        st.error(f"Error fetching exercises: {str(e)}")
-        return pd.DataFrame()
+    return cached_select("exercises", "exercise_id, exercise_name, exercise_type")
+
+def fetch_workouts_and_exercises():
+    """Fetch workouts and exercises in parallel; either comes back empty (with an error shown) if its read fails"""
+    loaded = fetch_concurrently({"workouts": fetch_workouts, "exercises": fetch_exercises})
+    return loaded["workouts"], loaded["exercises"]
 
 def get_exercise_type(exercise_name, exercises_df):
     """Get exercise type for a given exercise name"""
@@ -65,53 +56,60 @@ def get_exercise_type(exercise_name, exercises_df):
         return exercise_row.iloc[0]['exercise_type']
     return 'strength'  # default
 
-def fetch_workout_exercises(workout_id):
-    """Fetch exercises for a specific workout with exercise details"""
+def fetch_workout_exercises(workout_ids):
+    """Fetch exercises for several workouts in one query, grouped by workout_id"""
+    grouped = {workout_id: [] for workout_id in workout_ids}
     try:
-        set_supabase_auth()
-        response = supabase.table("workout_exercises").select("*, exercises(exercise_name, exercise_type)").eq("workout_id", workout_id).execute()
-        return response.data
+        response = (
+            supabase.table("workout_exercises")
+            .select("*, exercises(exercise_name, exercise_type)")
+            .in_("workout_id", list(workout_ids))
+            .execute()
+        )
+        for row in response.data:
+            grouped.setdefault(row['workout_id'], []).append(row)
     except Exception as e:
         st.error(f"Error fetching workout exercises: {str(e)}")
-        return []
+    return grouped
+
+def fetch_workout_stats():
+    """Fetch total workouts, logged exercises and the strength/cardio split in one aggregate query.
+
+    The result is cached per user until a workout, exercise log or exercise is written.
+    """
+    try:
+        stats = cached_rpc("get_workout_stats", ["workouts", "workout_exercises", "exercises"])
+    except Exception as e:
+        st.error(f"Error fetching workout stats: {str(e)}")
+        return {}
+    return stats.to_dict("records")[0] if len(stats) else {}
+
+def exercise_names(exercises_df):
+    return dict(zip(exercises_df['exercise_id'], exercises_df['exercise_name'])) if not exercises_df.empty else {}
 
 st.title("Workout Tracking")
 
-workouts = fetch_workouts()
-exercises = fetch_exercises()
+workouts, exercises = fetch_workouts_and_exercises()
 
 # Section 1: Quick Stats
 if not workouts.empty:
     st.subheader("Quick Stats", divider="blue")
     
+    # All counts come from a single server-side aggregate (see sql/get_workout_stats.sql)
+    stats = fetch_workout_stats()
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Workouts", len(workouts))
+        st.metric("Total Workouts", stats.get('total_workouts', len(workouts)))
     
     with col2:
-        # Count total exercises across all workouts
-        total_exercises = 0
-        for _, workout in workouts.iterrows():
-            workout_exercises = fetch_workout_exercises(workout['workout_id'])
-            total_exercises += len(workout_exercises)
-        st.metric("Total Exercises", total_exercises)
+        st.metric("Total Exercises", stats.get('total_exercises', 0))
     
     with col3:
-        # Count strength vs cardio exercises
-        strength_count = 0
-        cardio_count = 0
-        for _, workout in workouts.iterrows():
-            workout_exercises = fetch_workout_exercises(workout['workout_id'])
-            for ex in workout_exercises:
-                if ex.get('exercises', {}).get('exercise_type') == 'cardio':
-                    cardio_count += 1
-                else:
-                    strength_count += 1
-        st.metric("Strength Exercises", strength_count)
+        st.metric("Strength Exercises", stats.get('strength_exercises', 0))
     
     with col4:
-        st.metric("Cardio Exercises", cardio_count)
+        st.metric("Cardio Exercises", stats.get('cardio_exercises', 0))
 
 
 # Section 1: Quick Workout Creation
@@ -121,8 +119,10 @@ if not workouts.empty:
     st.markdown("##### Recent Workouts")
     
     # Show expandable summaries of recent workouts
-    for idx, workout in workouts.head(3).iterrows():
-        workout_exercises = fetch_workout_exercises(workout['workout_id'])
+    recent_workouts = workouts.head(3)
+    recent_exercises = fetch_workout_exercises(recent_workouts['workout_id'].tolist())
+    for idx, workout in recent_workouts.iterrows():
+        workout_exercises = recent_exercises.get(workout['workout_id'], [])
         
         with st.expander(f"{workout['workout_name']} - {workout['created_at'][:10]} ({len(workout_exercises)} exercises)"):
             if workout_exercises:
@@ -168,7 +168,6 @@ with st.form("quick_workout_form", clear_on_submit=True):
             st.error("Please enter a workout name")
         else:
             try:
-                set_supabase_auth()
                 current_time = datetime.now().isoformat()
                 
                 new_workout = {
@@ -195,8 +194,7 @@ with st.form("quick_workout_form", clear_on_submit=True):
 # Section 2: Exercise Logging
 st.subheader("Log Exercise to Workout", divider="blue")
 
-workouts = fetch_workouts()
-exercises = fetch_exercises()
+workouts, exercises = fetch_workouts_and_exercises()
 
 if not workouts.empty and not exercises.empty:
     
@@ -261,8 +259,6 @@ if not workouts.empty and not exercises.empty:
         
         if st.form_submit_button("Log Exercise"):
             try:
-                set_supabase_auth()
-                
                 # Get exercise ID
                 exercise_id = exercises[exercises['exercise_name'] == exercise_name]['exercise_id'].iloc[0]
                 
@@ -293,6 +289,13 @@ if not workouts.empty and not exercises.empty:
                 response = supabase.table("workout_exercises").insert(clean_exercise_log).execute()
                 
                 if response.data:
+                    record = record_log(
+                        response.data[0]['workout_exercise_id'], int(exercise_id),
+                        workout_days(workouts)[selected_workout_id], sets, reps, new_exercise_log.get("weight")
+                    )
+                    if record:
+                        st.toast(f"🏆 New {exercise_name} PR: estimated 1RM {record['e1rm']:.1f} kg "
+                                 f"(was {record['previous_e1rm']:.1f} kg)")
                     if exercise_type == 'strength':
                         st.success(f"✅ Logged {exercise_name}: {sets} sets × {reps} reps @ {weight}kg")
                     else:
@@ -313,6 +316,97 @@ else:
     if exercises.empty:
         st.info("Add some exercises first using the Exercise Management page!")
 
-# Section 3: Current Workout Summary
+# Section 3: Import History
+st.subheader("Import Workout History", divider="blue")
+with st.expander("Import from another tracker"):
+    st.caption("Strength-log CSVs (one row per set, as Strong or Hevy export them, or one row per exercise "
+               "with a sets column) and GPX tracks, one cardio workout per file. Workouts already logged "
+               "with the same date and name are skipped.")
+    uploads = st.file_uploader("History files", type=["csv", "gpx"], accept_multiple_files=True)
+    gpx_exercise = st.text_input("Exercise for GPX tracks without a type", value="Running")
+    if st.button("Import History", disabled=not uploads):
+        import_stats = WorkoutImportStats()
+        status = st.empty()
+
+        def show_progress(stats):
+            status.caption(f"{stats.read} rows read, {stats.workouts} workouts added ({stats.rows_per_second:,.0f} rows/s)")
+        try:
+            with st.spinner("Importing..."):
+                import_workouts(supabase, st.session_state.session.user.id,
+                                read_sources(uploads, import_stats, gpx_exercise), import_stats, show_progress)
+            status.empty()
+            st.success(import_stats.summary())
+        except Exception as e:
+            st.error(f"Import failed: {str(e)}")
+        finally:
+            # Batches written before a failure are committed, and a write that timed out may have landed,
+            # so the cached stats and reads are stale either way
+            invalidate_table("workouts")
+            invalidate_table("workout_exercises")
+            invalidate_strength_analytics()
+
+# Section 4: Strength Progress
+if not workouts.empty:
+    st.subheader("Strength Progress", divider="blue")
+    # Built once from the whole log and updated in place as sets are logged (see nutrack_analytics.py)
+    analytics = get_strength_analytics(supabase, workouts, fetch_workout_stats().get('total_exercises'))
+    if analytics.empty:
+        st.info("Log sets with reps and weight to see estimated 1RM, weekly volume and personal records.")
+    else:
+        names = exercise_names(exercises)
+        summary = analytics.exercise_summary()
+        summary.insert(0, "exercise", summary["exercise_id"].map(names).fillna("Unknown exercise"))
+        summary = summary.sort_values("tonnage", ascending=False)
+        st.dataframe(
+            summary.drop(columns="exercise_id"),
+            hide_index=True,
+            column_config={
+                "exercise": "Exercise",
+                "best_e1rm": st.column_config.NumberColumn("Best e1RM", format="%.1f kg"),
+                "top_weight": st.column_config.NumberColumn("Heaviest", format="%.1f kg"),
+                "tonnage": st.column_config.NumberColumn("Tonnage", format="%.0f kg"),
+                "weeks": "Weeks trained",
+                "records": "PRs",
+                "last_record": st.column_config.DateColumn("Last PR"),
+            }
+        )
+
+        progress_exercise = st.selectbox("Exercise", summary["exercise_id"], format_func=lambda e: names.get(e, e),
+                                         key="progress_exercise")
+        label = names.get(progress_exercise, "Exercise")
+        weeks = analytics.exercise_weeks(progress_exercise)
+        e1rm_tab, volume_tab, records_tab = st.tabs(["Estimated 1RM", "Weekly Volume", "Personal Records"])
+        with e1rm_tab:
+            if weeks["best_e1rm"].notna().sum() > 1:
+                show_progress_chart(weeks, "week", "best_e1rm", f"{label}: best estimated 1RM per week", "e1RM (kg)")
+            else:
+                st.info("Need at least 2 weeks of sets to show a trend")
+        with volume_tab:
+            if len(weeks) > 1:
+                show_progress_chart(weeks, "week", "tonnage", f"{label}: weekly tonnage", "Tonnage (kg)", rolling_days=28)
+            else:
+                st.info("Need at least 2 weeks of sets to show a trend")
+            total_volume = analytics.weekly_volume()
+            if len(total_volume) > 1:
+                show_progress_chart(total_volume, "week", "tonnage", "All exercises: weekly tonnage", "Tonnage (kg)",
+                                    rolling_days=28)
+        with records_tab:
+            records = analytics.exercise_records(progress_exercise).sort_values("day", ascending=False)
+            if records.empty:
+                st.info(f"No {label} PRs yet; the first session sets the baseline")
+            else:
+                st.dataframe(
+                    records[["day", "weight", "reps", "e1rm", "previous_e1rm"]],
+                    hide_index=True,
+                    column_config={
+                        "day": st.column_config.DateColumn("Date"),
+                        "weight": st.column_config.NumberColumn("Weight", format="%.1f kg"),
+                        "reps": st.column_config.NumberColumn("Reps", format="%d"),
+                        "e1rm": st.column_config.NumberColumn("e1RM", format="%.1f kg"),
+                        "previous_e1rm": st.column_config.NumberColumn("Previous best", format="%.1f kg"),
+                    }
+                )
+
+# Section 5: Current Workout Summary
 
 
@@ -1,38 +1,47 @@
 import streamlit as st
-from supabase import create_client, Client
 import pandas as pd
-from datetime import datetime, date
-import plotly.express as px
-from nutrack_utils import show_sidebar_user_info, check_auth_and_profile
+from datetime import datetime, date, timedelta
+from nutrack_charts import show_progress_chart
+from nutrack_measurements import get_measurement_table, record_measurement
+from nutrack_trace import trace_page
+from nutrack_utils import show_sidebar_user_info, check_auth_and_profile, get_supabase, cached_select, UnitOfWork
 
+trace_page("pages/6_measurements.py", budget=6)
 show_sidebar_user_info()
 check_auth_and_profile()
 
 # --- Supabase Client Initialization ---
-url: str = st.secrets["supabase"]["SUPABASE_URL"]
-key: str = st.secrets["supabase"]["SUPABASE_KEY"]
-supabase: Client = create_client(url, key)
-
-def set_supabase_auth():
-    supabase.postgrest.auth(st.session_state.session.access_token)
+supabase = get_supabase()
 
 def fetch_body_measurements():
-    set_supabase_auth()
-    response = supabase.table("body_measurements").select("*").order("measurement_date", desc=True).execute()
-    return pd.DataFrame(response.data)
-
-def fetch_custom_measurements(body_measurement_id):
-    set_supabase_auth()
-    response = supabase.table("custom_measurements").select("*").eq("body_measurement_id", body_measurement_id).execute()
-    return pd.DataFrame(response.data)
-
-def fetch_all_custom_measurements():
-    set_supabase_auth()
-    response = supabase.table("custom_measurements").select("*, body_measurements(measurement_date)").execute()
-    return pd.DataFrame(response.data)
+    return cached_select("body_measurements", "measurement_id, measurement_date, weight, body_fat_percentage, muscle_mass",
+                         order="measurement_date", desc=True)
+
+def fetch_custom_measurements(body_measurement_ids):
+    """Fetch custom measurements for several body measurements in one query, grouped by body_measurement_id"""
+    if not body_measurement_ids:
+        return {}
+    df = cached_select("custom_measurements", "body_measurement_id, measurement_name, measurement_value, unit",
+                       in_={"body_measurement_id": [int(i) for i in body_measurement_ids]})
+    if df.empty:
+        return {}
+    return {measurement_id: group for measurement_id, group in df.groupby('body_measurement_id')}
+
+def fetch_chart_window(start, end):
+    """Only the columns the charts plot, for the dates currently in view"""
+    df = cached_select("body_measurements", "measurement_date, weight, body_fat_percentage", order="measurement_date",
+                       gte={"measurement_date": start.isoformat()}, lte={"measurement_date": end.isoformat()})
+    return df if len(df) else pd.DataFrame(columns=["measurement_date", "weight", "body_fat_percentage"])
+
+HISTORY_PAGE_SIZE = 30
+CHART_DAYS = 365
+ROLLING_OPTIONS = {"Off": None, "7-day average": 7, "30-day average": 30}
 
 st.title("📏 Body Measurements")
 
+if "history_limit" not in st.session_state:
+    st.session_state.history_limit = HISTORY_PAGE_SIZE
+
 # Fetch existing measurements
 measurements_df = fetch_body_measurements()
 
@@ -71,9 +80,7 @@ with st.form("new_measurement_form", clear_on_submit=True):
     if st.form_submit_button("Save Measurements"):
         if weight > 0:
             try:
-                set_supabase_auth()
 
-                # Insert main body measurement
                 new_measurement = {
                     "measurement_date": measurement_date.isoformat(),
                     "weight": weight,
@@ -82,49 +89,46 @@ with st.form("new_measurement_form", clear_on_submit=True):
                     "user_id": st.session_state.user.id
                 }
 
-                response = supabase.table("body_measurements").insert(new_measurement).execute()
-
-                if response.data:
-                    body_measurement_id = response.data[0]['measurement_id']
-
-                    # Insert custom measurements if provided
-                    custom_measurements = []
-
-                    custom_data = {
-                        "chest": custom_chest,
-                        "waist": custom_waist, 
-                        "hips": custom_hips,
-                        "bicep_left": custom_bicep_l,
-                        "bicep_right": custom_bicep_r,
-                        "thigh_left": custom_thigh_l,
-                        "thigh_right": custom_thigh_r,
-                        "neck": custom_neck,
-                        "forearm": custom_forearm
+                # Custom measurements if provided
+                custom_data = {
+                    "chest": custom_chest,
+                    "waist": custom_waist, 
+                    "hips": custom_hips,
+                    "bicep_left": custom_bicep_l,
+                    "bicep_right": custom_bicep_r,
+                    "thigh_left": custom_thigh_l,
+                    "thigh_right": custom_thigh_r,
+                    "neck": custom_neck,
+                    "forearm": custom_forearm
+                }
+                custom_measurements = [
+                    {
+                        "measurement_name": measurement_name,
+                        "measurement_value": value,
+                        "unit": "cm",
+                        "user_id": st.session_state.user.id
                     }
-
-                    for measurement_name, value in custom_data.items():
-                        if value > 0:
-                            custom_measurements.append({
-                                "body_measurement_id": body_measurement_id,
-                                "measurement_name": measurement_name,
-                                "measurement_value": value,
-                                "unit": "cm",
-                                "user_id": st.session_state.user.id
-                            })
-
+                    for measurement_name, value in custom_data.items() if value > 0
+                ]
+
+                # Body measurement and custom measurements are written together
+                uow = UnitOfWork(supabase)
+                uow.set_parent("body_measurements", new_measurement, key="measurement_id", child_key="body_measurement_id")
+                uow.add("custom_measurements", custom_measurements)
+                result = uow.commit(rpc="save_body_measurement")
+
+                if result.ok:
+                    record_measurement(
+                        result.inserted["body_measurements"][0]["measurement_id"], measurement_date,
+                        {custom["measurement_name"]: custom["measurement_value"] for custom in custom_measurements}
+                    )
                     if custom_measurements:
-                        custom_response = supabase.table("custom_measurements").insert(custom_measurements).execute()
-
-                        if custom_response.data:
-                            st.success(f"Saved measurements for {measurement_date} with {len(custom_measurements)} custom measurements!")
-                        else:
-                            st.warning("Main measurements saved, but custom measurements failed.")
+                        st.success(f"Saved measurements for {measurement_date} with {len(custom_measurements)} custom measurements!")
                     else:
                         st.success(f"Saved measurements for {measurement_date}!")
-
                     st.rerun()
                 else:
-                    st.error("Failed to save measurements")
+                    st.error(f"Failed to save measurements: {result.error_summary()}")
 
             except Exception as e:
                 st.error(f"Error saving measurements: {str(e)}")
@@ -164,55 +168,62 @@ if len(measurements_df) > 0:
     # --- Charts ---
     st.subheader("Progress Charts", divider="blue")
 
+    # Zooming re-queries just the visible window; the charts downsample anything longer
+    first_date = date.fromisoformat(measurements_df['measurement_date'].min())
+    last_date = max(date.fromisoformat(measurements_df['measurement_date'].max()), date.today())
+    range_col, smoothing_col = st.columns([2, 1])
+    with range_col:
+        chart_range = st.date_input(
+            "Chart range", value=(max(first_date, last_date - timedelta(days=CHART_DAYS)), last_date),
+            min_value=first_date, max_value=last_date
+        )
+    with smoothing_col:
+        rolling_days = ROLLING_OPTIONS[st.selectbox("Smoothing", list(ROLLING_OPTIONS))]
+    # While the second date is being picked the range has only one end
+    chart_start = chart_range[0] if chart_range else first_date
+    chart_end = chart_range[1] if len(chart_range) > 1 else last_date
+    chart_df = fetch_chart_window(chart_start, chart_end)
+
     chart_tab1, chart_tab2, chart_tab3 = st.tabs(["Weight", "Body Fat %", "Custom Measurements"])
 
     with chart_tab1:
-        if len(measurements_df) > 1:
-            fig = px.line(measurements_df, x='measurement_date', y='weight', 
-                         title='Weight Progress', markers=True)
-            fig.update_layout(xaxis_title="Date", yaxis_title="Weight (kg)")
-            st.plotly_chart(fig, use_container_width=True)
+        if len(chart_df) > 1:
+            show_progress_chart(chart_df, 'measurement_date', 'weight', 'Weight Progress', "Weight (kg)", rolling_days)
         else:
             st.info("Need at least 2 measurements to show progress chart")
 
     with chart_tab2:
-        body_fat_data = measurements_df[measurements_df['body_fat_percentage'].notna()]
+        body_fat_data = chart_df[chart_df['body_fat_percentage'].notna()]
         if len(body_fat_data) > 1:
-            fig = px.line(body_fat_data, x='measurement_date', y='body_fat_percentage',
-                         title='Body Fat Progress', markers=True)
-            fig.update_layout(xaxis_title="Date", yaxis_title="Body Fat %")
-            st.plotly_chart(fig, use_container_width=True)
+            show_progress_chart(body_fat_data, 'measurement_date', 'body_fat_percentage', 'Body Fat Progress',
+                                "Body Fat %", rolling_days)
         else:
             st.info("Need at least 2 body fat measurements to show progress chart")
 
     with chart_tab3:
-        custom_df = fetch_all_custom_measurements()
-        if len(custom_df) > 0:
-            # Expand the body_measurements data
-            custom_df['measurement_date'] = custom_df['body_measurements'].apply(lambda x: x['measurement_date'] if x else None)
-
+        custom_table = get_measurement_table(supabase, measurements_df)
+        if custom_table.names:
             # Let user select which measurement to chart
-            available_measurements = custom_df['measurement_name'].unique()
-            if len(available_measurements) > 0:
-                selected_measurement = st.selectbox("Select measurement to chart:", available_measurements)
-
-                measurement_data = custom_df[custom_df['measurement_name'] == selected_measurement]
-                if len(measurement_data) > 1:
-                    fig = px.line(measurement_data, x='measurement_date', y='measurement_value',
-                                 title=f'{selected_measurement.replace("_", " ").title()} Progress', markers=True)
-                    fig.update_layout(xaxis_title="Date", yaxis_title=f"{selected_measurement.replace('_', ' ').title()} (cm)")
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.info(f"Need at least 2 {selected_measurement} measurements to show progress chart")
+            selected_measurement = st.selectbox("Select measurement to chart:", sorted(custom_table.names))
+
+            measurement_data = custom_table.column(selected_measurement).loc[chart_start:chart_end].dropna()
+            if len(measurement_data) > 1:
+                label = selected_measurement.replace("_", " ").title()
+                show_progress_chart(measurement_data.reset_index(), 'measurement_date', selected_measurement,
+                                    f'{label} Progress', f"{label} (cm)", rolling_days)
             else:
-                st.info("No custom measurements recorded yet")
+                st.info(f"Need at least 2 {selected_measurement} measurements to show progress chart")
         else:
             st.info("No custom measurements recorded yet")
 
     # --- Measurement History ---
     st.subheader("Measurement History", divider="blue")
 
-    for idx, measurement in measurements_df.iterrows():
+    # Only the visible page of history is rendered; its custom measurements come from a single query
+    visible_df = measurements_df.head(st.session_state.history_limit)
+    custom_by_measurement = fetch_custom_measurements(visible_df['measurement_id'].tolist())
+
+    for idx, measurement in visible_df.iterrows():
         with st.expander(f"📅 {measurement['measurement_date']} - Weight: {measurement['weight']:.1f}kg"):
             col1, col2 = st.columns(2)
 
@@ -225,8 +236,8 @@ if len(measurements_df) > 0:
 
             with col2:
                 # Show custom measurements for this date
-                custom_measurements = fetch_custom_measurements(measurement['measurement_id'])
-                if len(custom_measurements) > 0:
+                custom_measurements = custom_by_measurement.get(measurement['measurement_id'])
+                if custom_measurements is not None:
                     st.write("**Custom Measurements:**")
                     for _, custom in custom_measurements.iterrows():
                         name = custom['measurement_name'].replace('_', ' ').title()
@@ -236,6 +247,12 @@ if len(measurements_df) > 0:
                 else:
                     st.write("*No custom measurements*")
 
+    if len(measurements_df) > len(visible_df):
+        st.caption(f"Showing {len(visible_df)} of {len(measurements_df)} measurements")
+        if st.button("Load more"):
+            st.session_state.history_limit += HISTORY_PAGE_SIZE
+            st.rerun()
+
 else:
     st.info("No measurements recorded yet. Add your first measurement above!")
 
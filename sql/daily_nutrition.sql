@@ -0,0 +1,124 @@
+-- Per-user, per-day macro totals maintained by the app (see nutrack_rollup.py).
+-- Saving a meal adds its totals through add_daily_nutrition; edits to foods or
+-- recipe ingredients recompute the affected days of every user through
+-- recompute_daily_nutrition, and `python -m nutrack_rollup` rebuilds everything.
+create table if not exists daily_nutrition (
+    daily_nutrition_id bigint generated always as identity primary key,
+    user_id uuid not null default auth.uid() references auth.users (id) on delete cascade,
+    day date not null,
+    meal_count integer not null default 0,
+    protein numeric not null default 0,
+    carbohydrates numeric not null default 0,
+    sugars numeric not null default 0,
+    fat numeric not null default 0,
+    saturates numeric not null default 0,
+    fiber numeric not null default 0,
+    updated_at timestamptz not null default now(),
+    unique (user_id, day)
+);
+
+alter table daily_nutrition enable row level security;
+
+create policy "Users manage their own daily nutrition" on daily_nutrition
+    for all using (auth.uid() = user_id) with check (auth.uid() = user_id);
+
+-- Atomically add one meal's totals to its day. `totals` holds the macro columns.
+create or replace function add_daily_nutrition(day date, totals jsonb)
+returns void
+language sql
+security invoker
+as $$
+    insert into daily_nutrition (user_id, day, meal_count, protein, carbohydrates, sugars, fat, saturates, fiber)
+    values (
+        auth.uid(),
+        add_daily_nutrition.day,
+        1,
+        coalesce((totals->>'protein')::numeric, 0),
+        coalesce((totals->>'carbohydrates')::numeric, 0),
+        coalesce((totals->>'sugars')::numeric, 0),
+        coalesce((totals->>'fat')::numeric, 0),
+        coalesce((totals->>'saturates')::numeric, 0),
+        coalesce((totals->>'fiber')::numeric, 0)
+    )
+    on conflict (user_id, day) do update set
+        meal_count = daily_nutrition.meal_count + 1,
+        protein = daily_nutrition.protein + excluded.protein,
+        carbohydrates = daily_nutrition.carbohydrates + excluded.carbohydrates,
+        sugars = daily_nutrition.sugars + excluded.sugars,
+        fat = daily_nutrition.fat + excluded.fat,
+        saturates = daily_nutrition.saturates + excluded.saturates,
+        fiber = daily_nutrition.fiber + excluded.fiber,
+        updated_at = now();
+$$;
+
+-- Recompute every user's days whose meals use these foods (directly or through a
+-- recipe) or recipes. Foods and recipes are shared, so an edit reaches days the
+-- editor's own policies hide from them; hence security definer. Totals match
+-- nutrack_rollup.rebuild(): foods are per 100 g and recipes count through their
+-- recipe_nutrition row, which the caller refreshes first. Returns days written.
+create or replace function recompute_daily_nutrition(
+    food_ids bigint[] default '{}',
+    recipe_ids bigint[] default '{}'
+)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    all_recipe_ids bigint[];
+    written integer;
+begin
+    all_recipe_ids := recompute_daily_nutrition.recipe_ids || array(
+        select distinct ri.recipe_id from recipe_ingredients ri where ri.food_id = any(recompute_daily_nutrition.food_ids)
+    );
+
+    with used as (
+        select mf.meal_id from meal_foods mf where mf.food_id = any(recompute_daily_nutrition.food_ids)
+        union
+        select mr.meal_id from meal_recipes mr where mr.recipe_id = any(all_recipe_ids)
+    ),
+    days as (
+        select distinct m.user_id, left(m.created_at::text, 10)::date as day
+        from meals m join used on used.meal_id = m.meal_id
+    ),
+    day_meals as (
+        select m.meal_id, days.user_id, days.day
+        from days join meals m on m.user_id = days.user_id and left(m.created_at::text, 10)::date = days.day
+    ),
+    items as (
+        select mf.meal_id, coalesce(mf.amount, 0) / 100 as hundreds,
+               f.protein, f.carbohydrates, f.sugars, f.fat, f.saturates, f.fiber
+        from meal_foods mf join foods f on f.food_id = mf.food_id
+        where mf.meal_id in (select meal_id from day_meals)
+        union all
+        select mr.meal_id, coalesce(mr.amount, 0) / 100,
+               rn.protein_per_100g, rn.carbohydrates_per_100g, rn.sugars_per_100g,
+               rn.fat_per_100g, rn.saturates_per_100g, rn.fiber_per_100g
+        from meal_recipes mr join recipe_nutrition rn on rn.recipe_id = mr.recipe_id
+        where mr.meal_id in (select meal_id from day_meals)
+    )
+    insert into daily_nutrition (user_id, day, meal_count, protein, carbohydrates, sugars, fat, saturates, fiber)
+    select day_meals.user_id, day_meals.day, count(distinct day_meals.meal_id),
+           coalesce(sum(items.hundreds * items.protein), 0),
+           coalesce(sum(items.hundreds * items.carbohydrates), 0),
+           coalesce(sum(items.hundreds * items.sugars), 0),
+           coalesce(sum(items.hundreds * items.fat), 0),
+           coalesce(sum(items.hundreds * items.saturates), 0),
+           coalesce(sum(items.hundreds * items.fiber), 0)
+    from day_meals left join items on items.meal_id = day_meals.meal_id
+    group by day_meals.user_id, day_meals.day
+    on conflict (user_id, day) do update set
+        meal_count = excluded.meal_count,
+        protein = excluded.protein,
+        carbohydrates = excluded.carbohydrates,
+        sugars = excluded.sugars,
+        fat = excluded.fat,
+        saturates = excluded.saturates,
+        fiber = excluded.fiber,
+        updated_at = now();
+
+    get diagnostics written = row_count;
+    return written;
+end;
+$$;
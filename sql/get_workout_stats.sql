@@ -0,0 +1,23 @@
+-- Aggregate workout counts for the signed-in user in one round-trip.
+-- Used by the Quick Stats section of pages/5_workouts.py.
+create or replace function get_workout_stats()
+returns table (
+    total_workouts bigint,
+    total_exercises bigint,
+    strength_exercises bigint,
+    cardio_exercises bigint
+)
+language sql
+stable
+security invoker
+as $$
+    select
+        (select count(*) from workouts w where w.user_id = auth.uid()),
+        count(we.workout_id),
+        count(we.workout_id) filter (where coalesce(e.exercise_type, 'strength') <> 'cardio'),
+        count(we.workout_id) filter (where e.exercise_type = 'cardio')
+    from workouts w
+    join workout_exercises we on we.workout_id = w.workout_id
+    left join exercises e on e.exercise_id = we.exercise_id
+    where w.user_id = auth.uid();
+$$;
@@ -0,0 +1,49 @@
+-- Insert a batch of imported workouts and their exercise logs in one transaction.
+-- `workouts` is an array of workout objects, each with its logs in an
+-- "exercises" array (see nutrack_workout_import.py). Returns the new
+-- workout_ids in input order.
+create or replace function import_workouts(workouts jsonb)
+returns bigint[]
+language plpgsql
+security invoker
+as $$
+declare
+    workout jsonb;
+    owner uuid;
+    new_workout_id bigint;
+    new_ids bigint[] := '{}';
+begin
+    for workout in select * from jsonb_array_elements(import_workouts.workouts) loop
+        -- Service-role imports name the owner; signed-in users always import as themselves
+        owner := coalesce(auth.uid(), (workout->>'user_id')::uuid);
+
+        insert into workouts (user_id, workout_name, workout_date, notes, created_at, updated_at)
+        values (
+            owner,
+            workout->>'workout_name',
+            (workout->>'workout_date')::date,
+            workout->>'notes',
+            coalesce((workout->>'created_at')::timestamptz, now()),
+            now()
+        )
+        returning workout_id into new_workout_id;
+
+        insert into workout_exercises (workout_id, exercise_id, user_id, sets, reps, weight, duration, distance, notes, created_at)
+        select
+            new_workout_id,
+            (item->>'exercise_id')::bigint,
+            owner,
+            (item->>'sets')::integer,
+            (item->>'reps')::integer,
+            (item->>'weight')::numeric,
+            (item->>'duration')::numeric,
+            (item->>'distance')::numeric,
+            item->>'notes',
+            coalesce((workout->>'created_at')::timestamptz, now())
+        from jsonb_array_elements(coalesce(workout->'exercises', '[]'::jsonb)) as item;
+
+        new_ids := new_ids || new_workout_id;
+    end loop;
+    return new_ids;
+end;
+$$;
@@ -0,0 +1,28 @@
+-- Per-recipe totals and macros per 100 g, maintained by the app (see
+-- nutrack_recipe_nutrition.py). Adding an ingredient updates its recipe's row;
+-- edits to a food's macros recompute the recipes that use it, and
+-- `python -m nutrack_recipe_nutrition` rebuilds every row.
+create table if not exists recipe_nutrition (
+    recipe_id bigint primary key references recipes (recipe_id) on delete cascade,
+    total_grams numeric not null default 0,
+    protein numeric not null default 0,
+    carbohydrates numeric not null default 0,
+    sugars numeric not null default 0,
+    fat numeric not null default 0,
+    saturates numeric not null default 0,
+    fiber numeric not null default 0,
+    protein_per_100g numeric not null default 0,
+    carbohydrates_per_100g numeric not null default 0,
+    sugars_per_100g numeric not null default 0,
+    fat_per_100g numeric not null default 0,
+    saturates_per_100g numeric not null default 0,
+    fiber_per_100g numeric not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+alter table recipe_nutrition enable row level security;
+
+-- A row is visible and writable exactly when its recipe is; the subquery runs under recipes' own policies
+create policy "Recipe nutrition follows its recipe" on recipe_nutrition
+    for all using (exists (select 1 from recipes r where r.recipe_id = recipe_nutrition.recipe_id))
+    with check (exists (select 1 from recipes r where r.recipe_id = recipe_nutrition.recipe_id));
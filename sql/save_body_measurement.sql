@@ -0,0 +1,35 @@
+-- Insert a body measurement and its custom measurements in one transaction.
+-- Called through UnitOfWork.commit(rpc="save_body_measurement"). Returns the new measurement_id.
+create or replace function save_body_measurement(
+    body_measurements jsonb,
+    custom_measurements jsonb default '[]'::jsonb
+)
+returns bigint
+language plpgsql
+security invoker
+as $$
+declare
+    new_measurement_id bigint;
+begin
+    insert into body_measurements (measurement_date, weight, body_fat_percentage, muscle_mass, user_id)
+    values (
+        (save_body_measurement.body_measurements->>'measurement_date')::date,
+        (save_body_measurement.body_measurements->>'weight')::numeric,
+        (save_body_measurement.body_measurements->>'body_fat_percentage')::numeric,
+        (save_body_measurement.body_measurements->>'muscle_mass')::numeric,
+        auth.uid()
+    )
+    returning measurement_id into new_measurement_id;
+
+    insert into custom_measurements (body_measurement_id, measurement_name, measurement_value, unit, user_id)
+    select
+        new_measurement_id,
+        item->>'measurement_name',
+        (item->>'measurement_value')::numeric,
+        coalesce(item->>'unit', 'cm'),
+        auth.uid()
+    from jsonb_array_elements(save_body_measurement.custom_measurements) as item;
+
+    return new_measurement_id;
+end;
+$$;
@@ -0,0 +1,34 @@
+-- Insert a meal and its foods/recipes in one transaction.
+-- Arguments are named after the tables so UnitOfWork.commit(rpc="save_meal")
+-- can pass its collected rows straight through. Returns the new meal_id.
+create or replace function save_meal(
+    meals jsonb,
+    meal_foods jsonb default '[]'::jsonb,
+    meal_recipes jsonb default '[]'::jsonb
+)
+returns bigint
+language plpgsql
+security invoker
+as $$
+declare
+    new_meal_id bigint;
+begin
+    insert into meals (user_id, meal_desc, created_at)
+    values (
+        auth.uid(),
+        save_meal.meals->>'meal_desc',
+        coalesce((save_meal.meals->>'created_at')::timestamptz, now())
+    )
+    returning meal_id into new_meal_id;
+
+    insert into meal_foods (meal_id, food_id, amount, user_id)
+    select new_meal_id, (item->>'food_id')::bigint, (item->>'amount')::numeric, auth.uid()
+    from jsonb_array_elements(save_meal.meal_foods) as item;
+
+    insert into meal_recipes (meal_id, recipe_id, amount, user_id)
+    select new_meal_id, (item->>'recipe_id')::bigint, (item->>'amount')::numeric, auth.uid()
+    from jsonb_array_elements(save_meal.meal_recipes) as item;
+
+    return new_meal_id;
+end;
+$$;
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The app's modules and benchmarks/ live at the repository root, which is not a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,101 @@
+"""Strength analytics: e1RM, weekly volume, personal records and in-place updates."""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+import nutrack_analytics
+from nutrack_analytics import StrengthAnalytics, epley, load_strength_log, week_start
+from nutrack_sqlite import SQLiteClient
+
+def log(workout_exercise_id, exercise_id, day, reps, weight, sets=1):
+    return {"workout_exercise_id": workout_exercise_id, "exercise_id": exercise_id, "day": pd.Timestamp(day),
+            "sets": float(sets), "reps": float(reps), "weight": float(weight)}
+
+@pytest.fixture
+def analytics():
+    return StrengthAnalytics(pd.DataFrame([
+        log(1, 7, "2024-05-06", 5, 100, sets=3),  # Monday
+        log(2, 7, "2024-05-08", 3, 110),          # e1RM 121 beats 116.7
+        log(3, 7, "2024-05-15", 5, 100),          # not a record
+        log(4, 8, "2024-05-15", 10, 50),
+        log(5, 9, "2024-05-15", 0, 0),            # cardio: no reps or weight
+    ]))
+
+def test_epley_and_week_start():
+    assert epley([100, 100, 100], [1, 0, 10]).tolist() == pytest.approx([100, 100, 100 * (1 + 10 / 30)])
+    assert week_start(pd.Series(pd.to_datetime(["2024-05-12", "2024-05-13"]))).dt.day.tolist() == [6, 13]
+
+def test_weekly_totals_per_exercise(analytics):
+    week = analytics.weekly.loc[(7, pd.Timestamp("2024-05-06"))]
+    assert (week["sets"], week["reps"], week["tonnage"]) == (4, 18, 3 * 5 * 100 + 3 * 110)
+    assert week["best_e1rm"] == pytest.approx(121) and week["top_weight"] == 110
+    assert 9 not in analytics.weekly.index.get_level_values("exercise_id")
+
+def test_records_beat_every_earlier_log_and_the_first_log_sets_the_baseline(analytics):
+    assert analytics.records["workout_exercise_id"].tolist() == [2]
+    assert analytics.records["previous_e1rm"].iloc[0] == pytest.approx(100 * (1 + 5 / 30))
+    summary = analytics.exercise_summary().set_index("exercise_id")
+    assert summary.loc[7, "records"] == 1 and summary.loc[8, "records"] == 0 and summary.loc[7, "weeks"] == 2
+
+def test_exercise_weeks_fill_gaps_with_zero_volume(analytics):
+    analytics.add(6, 7, "2024-05-29", 1, 5, 90)
+    weeks = analytics.exercise_weeks(7)
+    assert weeks["tonnage"].tolist() == [1830, 500, 0, 450]
+    assert analytics.exercise_weeks(99).empty
+
+def test_add_returns_a_record_only_when_it_beats_the_best(analytics):
+    assert analytics.add(6, 7, "2024-05-16", 1, 5, 100) is None
+    record = analytics.add(7, 7, "2024-05-17", 1, 2, 120)
+    assert record["e1rm"] == pytest.approx(128) and record["previous_e1rm"] == pytest.approx(121)
+    assert analytics.add(8, 7, "2024-05-17", None, None, None) is None  # cardio-style log
+    assert analytics.weekly.loc[(7, pd.Timestamp("2024-05-13")), "tonnage"] == 500 + 500 + 240
+    assert analytics.exercise_records(7)["workout_exercise_id"].tolist() == [2, 7]
+
+def test_a_new_exercise_first_log_is_not_a_record(analytics):
+    assert analytics.add(6, 10, "2024-05-20", 3, 5, 60) is None
+    assert analytics.exercise_weeks(10)["sets"].tolist() == [3]
+
+def test_backdated_log_demotes_later_records(analytics):
+    record = analytics.add(6, 7, "2024-05-07", 1, 1, 130)  # before the 110 x 3 that was a record
+    assert record["e1rm"] == 130
+    assert analytics.exercise_records(7)["workout_exercise_id"].tolist() == [6]
+    assert analytics.add(7, 7, "2024-05-20", 1, 3, 110) is None
+
+def test_load_strength_log_dates_logs_through_their_workouts():
+    client = SQLiteClient()
+    client.table("workouts").insert([
+        {"user_id": "u1", "workout_name": "A", "workout_date": "2024-05-06", "created_at": "2024-05-06T07:00:00"},
+        {"user_id": "u1", "workout_name": "B", "workout_date": None, "created_at": "2024-05-08T07:00:00"},
+    ]).execute()
+    client.table("workout_exercises").insert([
+        {"workout_id": 1, "exercise_id": 7, "user_id": "u1", "sets": 3, "reps": 5, "weight": 100},
+        {"workout_id": 2, "exercise_id": 7, "user_id": "u1", "sets": 1, "reps": 3, "weight": 110},
+        {"workout_id": 3, "exercise_id": 7, "user_id": "u1", "sets": 1, "reps": 1, "weight": 200},  # no such workout
+        {"workout_id": 1, "exercise_id": 7, "user_id": "u2", "sets": 1, "reps": 1, "weight": 300},
+    ]).execute()
+    workouts = pd.DataFrame(client.table("workouts").select("*").execute().data)
+    analytics = load_strength_log(client, "u1", workouts)
+    assert analytics.records["day"].tolist() == [pd.Timestamp("2024-05-08")]
+    assert analytics.exercise_summary()["top_weight"].tolist() == [110]
+
+def test_cache_is_rebuilt_only_when_the_server_count_changes(monkeypatch):
+    builds = []
+
+    def build(client, user_id, workouts_df):
+        builds.append(user_id)
+        return StrengthAnalytics(pd.DataFrame([log(1, 7, "2024-05-06", 5, 100)]))
+    monkeypatch.setattr(nutrack_analytics, "load_strength_log", build)
+    st.session_state.user = SimpleNamespace(id="cache-test")
+    try:
+        nutrack_analytics.invalidate_strength_analytics()
+        get = nutrack_analytics.get_strength_analytics
+        first = get(None, None, log_count=40)  # the server counts logs the analytics leave out
+        assert get(None, None, log_count=40) is first and len(builds) == 1
+        nutrack_analytics.record_log(2, 7, "2024-05-13", 1, 1, 120)
+        assert get(None, None, log_count=41) is first and len(builds) == 1
+        get(None, None, log_count=45)  # written elsewhere
+        assert len(builds) == 2
+    finally:
+        del st.session_state.user
@@ -0,0 +1,46 @@
+"""LTTB downsampling keeps endpoints, one point per bucket and the series' extremes."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from nutrack_charts import WEBGL_THRESHOLD, downsample, lttb, progress_chart
+
+@pytest.mark.parametrize("n, threshold", [(10, 10), (10, 50), (10, 2), (0, 5)])
+def test_short_series_and_tiny_thresholds_keep_every_point(n, threshold):
+    assert list(lttb(np.arange(n), np.zeros(n), threshold)) == list(range(n))
+
+def test_keeps_endpoints_and_one_point_per_bucket():
+    n, threshold = 1000, 50
+    rng = np.random.default_rng(0)
+    keep = lttb(np.arange(n), rng.normal(size=n), threshold)
+    assert len(keep) == threshold
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert np.all(np.diff(keep) > 0)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    for bucket, index in enumerate(keep[1:-1]):
+        assert edges[bucket] <= index < edges[bucket + 1]
+
+def test_spikes_survive_downsampling():
+    y = np.zeros(10_000)
+    y[4321], y[7000] = 50.0, -30.0
+    keep = lttb(np.arange(len(y)), y, 100)
+    assert 4321 in keep and 7000 in keep
+
+def test_downsample_keeps_the_dates_of_the_points_it_picks():
+    days = pd.date_range("2020-01-01", periods=2000, freq="D")
+    series = pd.Series(np.sin(np.arange(2000) / 50), index=days)
+    shown = downsample(series, 200)
+    assert len(shown) == 200
+    assert shown.index[0] == days[0] and shown.index[-1] == days[-1]
+    assert (series.reindex(shown.index) == shown).all()
+
+def test_progress_chart_switches_to_webgl_for_long_series():
+    days = pd.date_range("2015-01-01", periods=WEBGL_THRESHOLD + 1, freq="D")
+    df = pd.DataFrame({"date": days, "weight": np.linspace(90, 80, len(days))})
+    fig, shown, total = progress_chart(df, "date", "weight", "Weight", "kg", rolling_days=7, max_points=300)
+    assert (shown, total) == (300, WEBGL_THRESHOLD + 1)
+    assert [trace.type for trace in fig.data] == ["scattergl", "scattergl"]
+
+    fig, shown, total = progress_chart(df.head(30), "date", "weight", "Weight", "kg")
+    assert (shown, total) == (30, 30)
+    assert fig.data[0].type == "scatter" and fig.data[0].mode == "lines+markers"
@@ -0,0 +1,90 @@
+"""Account export round-trips through Parquet and CSV, limited to the user's rows."""
+import glob
+import io
+import json
+import os
+import tempfile
+import zipfile
+from functools import partial
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import nutrack_export
+from nutrack_export import ExportTooLarge, export_account, export_to_tempfile, remove_stale_exports
+from nutrack_sqlite import SQLiteClient
+from nutrack_utils import iter_pages
+
+@pytest.fixture
+def client():
+    client = SQLiteClient()
+    client.table("foods").insert([
+        {"food_name": f"Food {i}", "protein": i / 10, "user_id": "u1" if i % 2 else "u2"} for i in range(1, 31)
+    ]).execute()
+    client.table("meals").insert([
+        {"user_id": "u1", "meal_desc": "Lunch", "created_at": "2024-05-01T12:00:00"},
+        {"user_id": "u2", "meal_desc": "Dinner", "created_at": "2024-05-01T19:00:00"},
+    ]).execute()
+    # Children written before user_id was stamped on them still belong to the parent's owner
+    client.table("meal_foods").insert([
+        {"meal_id": 1, "food_id": 1, "amount": 150.0},
+        {"meal_id": 2, "food_id": 2, "amount": 80.0, "user_id": "u2"},
+    ]).execute()
+    return client
+
+def read(archive, table, fmt):
+    with archive.open(f"{table}.{fmt}") as entry:
+        return pd.read_parquet(io.BytesIO(entry.read())) if fmt == "parquet" else pd.read_csv(entry)
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(nutrack_export, "iter_pages", partial(iter_pages, page_size=7))
+
+@pytest.mark.parametrize("fmt", ["parquet", "csv"])
+def test_round_trip_holds_only_the_users_rows(client, fmt, small_pages):
+    target = io.BytesIO()
+    counts = export_account(client, target, fmt, user_id="u1")
+    archive = zipfile.ZipFile(target)
+
+    foods = read(archive, "foods", fmt)
+    expected = pd.DataFrame(client.table("foods").select("*").eq("user_id", "u1").execute().data)
+    assert foods["food_id"].tolist() == expected["food_id"].tolist()
+    assert foods["protein"].tolist() == pytest.approx(expected["protein"].tolist())
+    assert read(archive, "meal_foods", fmt)[["meal_id", "food_id"]].values.tolist() == [[1, 1]]
+
+    manifest = json.loads(archive.read("manifest.json"))
+    assert manifest["rows"] == counts and manifest["user_id"] == "u1" and manifest["format"] == fmt
+    assert counts["foods"] == 15 and counts["meals"] == 1 and counts["meal_foods"] == 1
+    assert counts["workouts"] == 0 and f"workouts.{fmt}" not in archive.namelist()
+
+def test_each_page_is_one_parquet_row_group(client, small_pages):
+    target = io.BytesIO()
+    assert export_account(client, target, "parquet")["foods"] == 30
+    with zipfile.ZipFile(target).open("foods.parquet") as entry:
+        assert pq.ParquetFile(io.BytesIO(entry.read())).num_row_groups == 5
+
+def test_unknown_format_is_an_error(client):
+    with pytest.raises(ValueError, match="format"):
+        export_account(client, io.BytesIO(), "xlsx")
+
+def test_tempfile_export_over_max_bytes_leaves_nothing_behind(client):
+    before = set(glob.glob(os.path.join(tempfile.gettempdir(), "nutrack-export-*.zip")))
+    with pytest.raises(ExportTooLarge):
+        export_to_tempfile(client, "csv", max_bytes=0)
+    assert set(glob.glob(os.path.join(tempfile.gettempdir(), "nutrack-export-*.zip"))) == before
+
+    path, counts = export_to_tempfile(client, "csv", user_id="u2")
+    try:
+        assert counts["foods"] == 15 and zipfile.is_zipfile(path)
+    finally:
+        os.remove(path)
+
+def test_remove_stale_exports_keeps_recent_files():
+    handle, path = tempfile.mkstemp(prefix="nutrack-export-", suffix=".zip")
+    os.close(handle)
+    remove_stale_exports(max_age_s=3600)
+    assert os.path.exists(path)
+    os.utime(path, (0, 0))
+    remove_stale_exports(max_age_s=3600)
+    assert not os.path.exists(path)
@@ -0,0 +1,65 @@
+"""Food import from CSV and JSON lines into the SQLite stand-in: validation, deduplication and updates."""
+import io
+
+import pytest
+
+from nutrack_import import clean_chunk, format_of, import_foods, read_chunks
+from nutrack_sqlite import SQLiteClient
+
+CSV = b"""Name, Proteins, Carbs, Sugar, Fats, Saturated Fat, Fibre
+Apple,0.3,14,10,0.2,0,2.4
+  apple  ,1,1,1,1,1,1
+Oats,13,60,1,7,1.2,10
+,1,1,1,1,1,1
+Bad Macro,abc,1,1,1,1,1
+Too Much,60,40,1,10,1,1
+Sweet,1,5,9,1,1,1
+Blank Macros,,,,,,
+"""
+
+JSONL = b"""{"food_name": "Rice", "protein": 2.7, "carbohydrates": 28, "sugars": 0.1, "fat": 0.3, "saturates": 0.1, "fiber": 0.4}
+{"food_name": "OATS", "protein": 17, "carbohydrates": 66, "sugars": 1, "fat": 7, "saturates": 1.2, "fiber": 11}
+"""
+
+def foods(client):
+    return {row["food_name"]: row for row in client.table("foods").select("*").execute().data}
+
+@pytest.fixture
+def client():
+    return SQLiteClient()
+
+def test_format_follows_the_extension():
+    assert format_of("export.NDJSON") == "jsonl" and format_of("foods.csv") == "csv" and format_of("foods") == "csv"
+    with pytest.raises(ValueError):
+        read_chunks(io.BytesIO(b""), "xml")
+
+def test_clean_chunk_maps_aliases_and_rejects_impossible_rows():
+    chunk = next(read_chunks(io.BytesIO(CSV), "csv"))
+    clean, rejected = clean_chunk(chunk)
+    assert clean["food_name"].tolist() == ["Apple", "apple", "Oats", "Blank Macros"]
+    assert clean["key"].tolist() == ["apple", "apple", "oats", "blank macros"]
+    assert clean.loc[clean["food_name"] == "Oats", "fiber"].item() == 10
+    assert clean.loc[clean["food_name"] == "Blank Macros", "protein"].item() == 0
+    assert rejected == {"missing name": 1, "non-numeric macro": 1, "macros over 100 g": 1,
+                        "sugars above carbohydrates": 1}
+
+def test_import_skips_duplicates_in_the_file_and_the_catalog(client):
+    client.table("foods").insert({"food_name": "Oats", "protein": 10.0}).execute()
+    stats = import_foods(client, read_chunks(io.BytesIO(CSV), "csv", chunksize=3), user_id="u1")
+    assert (stats.read, stats.inserted, stats.skipped, sum(stats.rejected.values())) == (8, 2, 2, 4)
+    stored = foods(client)
+    assert sorted(stored) == ["Apple", "Blank Macros", "Oats"]
+    assert stored["Apple"]["user_id"] == "u1" and stored["Apple"]["protein"] == 0.3
+    assert stored["Oats"]["protein"] == 10.0
+
+def test_update_changes_macros_but_keeps_the_stored_name(client):
+    import_foods(client, read_chunks(io.BytesIO(CSV), "csv"))
+    stats = import_foods(client, read_chunks(io.BytesIO(JSONL), "jsonl"), on_duplicate="update")
+    assert (stats.inserted, stats.updated) == (1, 1)
+    stored = foods(client)
+    assert "OATS" not in stored and stored["Oats"]["protein"] == 17
+    assert stats.updated_ids == [stored["Oats"]["food_id"]]
+
+def test_missing_name_column_is_an_error(client):
+    with pytest.raises(ValueError, match="food_name"):
+        import_foods(client, read_chunks(io.BytesIO(b"protein,fat\n1,2\n"), "csv"))
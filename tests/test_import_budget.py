@@ -0,0 +1,23 @@
+"""Each page's cold import time stays within its budget in benchmarks/import_times.py.
+
+Times are `-X importtime` cumulative figures, scaled by how fast this runner
+imports streamlit, with a generous tolerance: the test catches a heavy module
+creeping back into a page's top-level imports, not a few milliseconds of
+noise. `python -m benchmarks.import_times --check` holds pages to the exact budgets.
+"""
+import pytest
+
+from benchmarks.import_times import PAGES, allowed_ms, measure
+
+TOLERANCE = 2.0
+
+@pytest.mark.parametrize("page", PAGES)
+def test_page_imports_within_budget(page):
+    total, modules, streamlit_ms = measure(page)
+    allowed = allowed_ms(page, streamlit_ms, TOLERANCE)
+    if total > allowed:
+        # The first run may pay for a cold disk cache; only a repeatable overrun counts
+        total, modules, streamlit_ms = measure(page)
+        allowed = allowed_ms(page, streamlit_ms, TOLERANCE)
+    heaviest = ", ".join(f"{name} {ms:.0f}ms" for ms, name in modules[:3])
+    assert total <= allowed, f"{page} imports in {total:.0f}ms, over its {allowed:.0f}ms allowance ({heaviest})"
@@ -0,0 +1,54 @@
+"""MeasurementTable's wide layout, in-place add() and loading through the SQLite stand-in."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from nutrack_measurements import MeasurementTable, load_measurement_table
+from nutrack_sqlite import SQLiteClient
+
+@pytest.fixture
+def table():
+    return MeasurementTable(
+        ["2024-01-03", "2024-01-01", "2024-01-03"], ["waist", "waist", "arm"], [80.0, 82.5, 35.0]
+    )
+
+def test_long_rows_become_sorted_wide_columns(table):
+    assert list(table.dates) == list(pd.to_datetime(["2024-01-01", "2024-01-03"]))
+    assert table.names == ["arm", "waist"]
+    frame = table.to_frame()
+    assert frame.dtypes.unique().tolist() == [np.float32]
+    assert np.isnan(frame.loc["2024-01-01", "arm"])
+    assert table.column("waist").tolist() == [82.5, 80.0]
+
+def test_add_to_an_existing_date_overwrites_in_place(table):
+    table.add("2024-01-03", {"waist": 79.0})
+    assert len(table.dates) == 2
+    assert table.column("waist").tolist() == [82.5, 79.0]
+
+def test_add_inserts_new_dates_in_order_and_new_columns(table):
+    table.add("2024-01-02", {"waist": 81.0, "chest": 100.0})
+    assert list(table.dates.strftime("%d")) == ["01", "02", "03"]
+    assert table.names == ["arm", "waist", "chest"]
+    assert table.column("waist").tolist() == [82.5, 81.0, 80.0]
+    chest = table.column("chest")
+    assert chest.isna().tolist() == [True, False, True] and chest.iloc[1] == 100.0
+
+def test_empty_table_accepts_the_first_measurement():
+    table = MeasurementTable([], [], [])
+    table.add("2024-02-01", {"hips": 95.0})
+    assert table.to_frame().shape == (1, 1)
+
+def test_load_dates_custom_values_through_their_body_measurement():
+    client = SQLiteClient()
+    client.table("body_measurements").insert([
+        {"measurement_date": "2024-03-01", "weight": 80.0, "user_id": "u1"},
+        {"measurement_date": "2024-03-08", "weight": 79.5, "user_id": "u1"},
+    ]).execute()
+    client.table("custom_measurements").insert([
+        {"body_measurement_id": 1, "measurement_name": "waist", "measurement_value": 84.0, "user_id": "u1"},
+        {"body_measurement_id": 2, "measurement_name": "waist", "measurement_value": 83.0, "user_id": "u1"},
+        {"body_measurement_id": 99, "measurement_name": "waist", "measurement_value": 1.0, "user_id": "u2"},
+    ]).execute()
+    measurements = pd.DataFrame(client.table("body_measurements").select("*").execute().data)
+    table = load_measurement_table(client, measurements)
+    assert table.column("waist").to_dict() == {pd.Timestamp("2024-03-01"): 84.0, pd.Timestamp("2024-03-08"): 83.0}
@@ -0,0 +1,53 @@
+"""NutritionEngine totals for foods, recipes and meals."""
+import pandas as pd
+import pytest
+
+from nutrack_nutrition import MACRO_COLS, NutritionEngine, scale_per_100g
+
+def food(food_id, protein, fat=0.0):
+    return {"food_id": food_id, **{col: 0.0 for col in MACRO_COLS}, "protein": protein, "fat": fat}
+
+FOODS = pd.DataFrame([food(1, 20.0, fat=10.0), food(2, 5.0), food(3, None)])
+# Recipe 10: 100 g of food 1 and 300 g of food 2, so 20 + 15 = 35 g protein over 400 g
+INGREDIENTS = pd.DataFrame({"recipe_id": [10, 10], "food_id": [1, 2], "amount": [100.0, 300.0]})
+
+@pytest.fixture
+def engine():
+    return NutritionEngine(FOODS, INGREDIENTS)
+
+def test_meal_totals_scale_foods_per_100g(engine):
+    totals = engine.meal_totals(foods=[(1, 150), (2, 200)])
+    assert totals["protein"] == pytest.approx(30 + 10)
+    assert totals["fat"] == pytest.approx(15)
+    assert list(totals.index) == MACRO_COLS
+
+def test_meal_totals_average_recipes_over_ingredient_weight(engine):
+    assert engine.meal_totals(recipes=[(10, 200)])["protein"] == pytest.approx(35 / 400 * 200)
+    assert engine.recipe_grams[0] == pytest.approx(400)
+
+def test_unknown_ids_and_missing_macros_contribute_nothing(engine):
+    assert engine.meal_totals(foods=[(99, 100), (3, 100)], recipes=[(99, 50)]).sum() == 0
+    assert engine.meal_totals().sum() == 0
+
+def test_stored_recipe_nutrition_is_used_per_100g():
+    stored = pd.DataFrame([{"recipe_id": 10, "total_grams": 400.0,
+                            **{f"{col}_per_100g": 0.0 for col in MACRO_COLS}, "protein_per_100g": 8.75}])
+    engine = NutritionEngine(FOODS, recipe_nutrition=stored)
+    assert engine.meal_totals(recipes=[(10, 200)])["protein"] == pytest.approx(17.5)
+
+def test_batch_meal_totals_match_single_meals(engine):
+    meal_foods = pd.DataFrame({"meal_id": [1, 1, 2], "food_id": [1, 2, 99], "amount": [100.0, 100.0, 50.0]})
+    meal_recipes = pd.DataFrame({"meal_id": [2, 3], "recipe_id": [10, 10], "amount": [400.0, None]})
+    batch = engine.batch_meal_totals(meal_foods, meal_recipes)
+    assert sorted(batch.index) == [1, 2, 3]
+    pd.testing.assert_series_equal(batch.loc[1], engine.meal_totals(foods=[(1, 100), (2, 100)]), check_names=False)
+    assert batch.loc[2, "protein"] == pytest.approx(35)
+    assert batch.loc[3].sum() == 0  # a missing amount counts as 0 g
+
+def test_batch_meal_totals_without_items_is_empty(engine):
+    batch = engine.batch_meal_totals(pd.DataFrame(columns=["meal_id", "food_id", "amount"]))
+    assert batch.empty and list(batch.columns) == MACRO_COLS
+
+def test_scale_per_100g_multiplies_by_amount():
+    df = pd.DataFrame([{**food(1, 20.0), "amount": 250.0}])
+    assert scale_per_100g(df).loc[0, "protein"] == pytest.approx(50)
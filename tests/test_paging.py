@@ -0,0 +1,46 @@
+"""Keyset paging through the SQLite stand-in: every row once, in key order, past the server's row cap."""
+import pytest
+
+from nutrack_sqlite import SQLiteClient
+from nutrack_utils import fetch_all, iter_pages
+
+# created_at values with long runs of ties, deliberately out of primary key order
+CREATED = ["2024-01-02"] * 7 + ["2024-01-01"] * 2 + ["2024-01-03"] + ["2024-01-02"] * 3 + ["2024-01-01"]
+
+@pytest.fixture
+def client():
+    client = SQLiteClient(max_rows=5)
+    client.table("meals").insert([
+        {"user_id": "u1" if i % 4 else "u2", "meal_desc": f"Meal {i}", "created_at": created}
+        for i, created in enumerate(CREATED, start=1)
+    ]).execute()
+    return client
+
+def ids(pages):
+    return [row["meal_id"] for page in pages for row in page]
+
+def test_primary_key_pages_cover_every_row_in_order(client):
+    pages = list(iter_pages("meals", "meal_desc", page_size=5, client=client))
+    assert [len(page) for page in pages] == [5, 5, 4]
+    assert ids(pages) == list(range(1, 15))
+    assert "meal_id" in pages[0][0]  # the cursor column is added to the projection
+
+def test_ties_on_a_non_unique_key_are_neither_skipped_nor_repeated(client):
+    for page_size in (2, 3, 5):
+        got = ids(iter_pages("meals", key="created_at", page_size=page_size, client=client))
+        expected = [meal_id for _, meal_id in sorted(zip(CREATED, range(1, 15)))]
+        assert got == expected, page_size
+
+def test_filters_and_id_range_narrow_the_pages(client):
+    assert ids(iter_pages("meals", filters={"user_id": "u2"}, page_size=2, client=client)) == [4, 8, 12]
+    assert ids(iter_pages("meals", id_range=(3, 9), page_size=2, client=client)) == [4, 5, 6, 7, 8, 9]
+    assert ids(iter_pages("meals", in_={"meal_id": [13, 2, 7]}, gte={"created_at": "2024-01-02"},
+                          page_size=2, client=client)) == [2, 7, 13]
+
+def test_fetch_all_reads_past_the_row_cap(client):
+    assert len(client.table("meals").select("*").execute().data) == 5
+    assert [row["meal_id"] for row in fetch_all("meals", client=client, page_size=5)] == list(range(1, 15))
+
+def test_fetch_all_prefetch_splits_the_rest_into_key_ranges(client):
+    rows = fetch_all("meals", "meal_id", prefetch=3, client=client, page_size=5, filters={"user_id": "u1"})
+    assert [row["meal_id"] for row in rows] == [i for i in range(1, 15) if i % 4]
@@ -0,0 +1,29 @@
+"""Every benchmark scenario runs without errors and within its page's query budget."""
+import pytest
+import streamlit as st
+
+from benchmarks.run_pages import SCENARIOS, _app
+from benchmarks.synthetic import generate
+from nutrack_trace import assert_query_budget
+
+# Big enough that catalog reads take several pages, small enough to generate in a few seconds
+SIZES = {"foods": 2500, "recipes": 200, "meals": 400, "workouts": 60, "measurement_days": 120}
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("bench") / "bench.db")
+    generate(path, SIZES)
+    return path
+
+@pytest.mark.parametrize("name, page, interaction", SCENARIOS, ids=[scenario[0] for scenario in SCENARIOS])
+def test_scenario_within_query_budget(db_path, name, page, interaction):
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = _app(page, db_path, 0)
+    at.run()
+    if interaction is not None:
+        interaction(at)
+        at.run()
+    assert not at.exception, [e.value for e in at.exception]
+    assert "query_trace" in at.session_state, f"{page} does not call trace_page"
+    assert_query_budget(at.session_state["query_trace"])
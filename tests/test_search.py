@@ -0,0 +1,59 @@
+"""SearchIndex prefix and trigram matching and usage ranking, and the server-side name filter."""
+import pytest
+
+from nutrack_search import SearchIndex, normalize, trigrams
+from nutrack_sqlite import SQLiteClient
+from nutrack_utils import contains_pattern
+
+NAMES = ["Apple", "apple pie", "Pineapple", "Grape Juice", "Green  Apple", "Banana"]
+
+@pytest.fixture
+def index():
+    return SearchIndex(NAMES, list(range(1, len(NAMES) + 1)))
+
+def test_normalize_folds_case_and_whitespace():
+    assert normalize("  Green   APPLE ") == "green apple"
+    assert trigrams("ab") == {" ab", "ab "}
+
+def test_prefix_matches_come_first_in_key_order(index):
+    assert index.search("APP") == ["Apple", "apple pie", "Green  Apple", "Pineapple"]
+    assert index.search("green a") == ["Green  Apple"]
+
+def test_short_queries_match_prefixes_only(index):
+    assert index.search("ap") == ["Apple", "apple pie"]
+    assert index.search("e") == []
+
+def test_substring_matches_need_every_character(index):
+    assert index.search("juice") == ["Grape Juice"]
+    assert index.search("ppie") == []
+    assert index.search("xyz") == []
+
+def test_used_names_rank_first_within_prefix_and_substring_matches(index):
+    index.record_use("apple pie")
+    index.record_use("Pineapple")
+    index.record_use("Pineapple")
+    assert index.search("app") == ["apple pie", "Apple", "Pineapple", "Green  Apple"]
+    assert index.search("")[:2] == ["Pineapple", "apple pie"]
+
+def test_limit_caps_results(index):
+    assert index.search("app", limit=2) == ["Apple", "apple pie"]
+    assert len(index.search("", limit=3)) == 3
+
+def test_lookup_both_ways(index):
+    assert index.lookup("Banana") == 6
+    assert index.lookup("banana") is None
+    assert index.names[3] == "Pineapple"
+    assert len(index) == len(NAMES)
+
+def test_contains_pattern_takes_like_wildcards_literally():
+    client = SQLiteClient()
+    client.table("foods").insert([{"food_name": name} for name in
+                                  ["100% Juice", "1000 Juice", "a_b", "axb", "back\\slash", "backslash"]]).execute()
+
+    def search(term):
+        query = client.table("foods").select("food_name").ilike("food_name", contains_pattern(term))
+        return [row["food_name"] for row in query.execute().data]
+    assert search("100%") == ["100% Juice"]
+    assert search("A_B") == ["a_b"]
+    assert search("\\") == ["back\\slash"]
+    assert search("juice") == ["100% Juice", "1000 Juice"]
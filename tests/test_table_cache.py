@@ -0,0 +1,88 @@
+"""TableCache expiry, LRU eviction under its memory cap and invalidation by table."""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+import nutrack_utils
+from nutrack_utils import TableCache, cached_rpc
+
+def frame(n=10):
+    return pd.DataFrame({"id": range(n)})
+
+def key(table, columns="*", user="u1"):
+    return (user, table, columns, (), None, False, (), (), ())
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(nutrack_utils.time, "monotonic", lambda: now[0])
+    return now
+
+def test_entries_expire_after_ttl(clock):
+    cache = TableCache(ttl_seconds=60)
+    cache.put(key("foods"), frame())
+    clock[0] += 59
+    assert cache.get(key("foods")) is not None
+    clock[0] += 2
+    assert cache.get(key("foods")) is None
+    assert cache._bytes == 0
+
+def test_least_recently_used_entry_is_evicted_first():
+    size = int(frame().memory_usage(deep=True).sum())
+    cache = TableCache(max_bytes=size * 2)
+    cache.put(key("foods"), frame())
+    cache.put(key("recipes"), frame())
+    cache.get(key("foods"))  # recipes is now the least recently used
+    cache.put(key("meals"), frame())
+    assert cache.get(key("recipes")) is None
+    assert cache.get(key("foods")) is not None and cache.get(key("meals")) is not None
+    assert cache._bytes == size * 2
+
+def test_frames_larger_than_the_cap_are_not_cached():
+    cache = TableCache(max_bytes=100)
+    cache.put(key("foods"), frame(1000))
+    assert cache.get(key("foods")) is None and cache._bytes == 0
+
+def test_putting_a_key_again_replaces_it():
+    cache = TableCache()
+    cache.put(key("foods"), frame(10))
+    cache.put(key("foods"), frame(20))
+    assert len(cache.get(key("foods"))) == 20
+    assert cache._bytes == int(frame(20).memory_usage(deep=True).sum())
+
+def test_invalidate_drops_the_table_and_reads_that_embed_it():
+    cache = TableCache()
+    cache.put(key("foods"), frame())
+    cache.put(key("foods", user="u2"), frame())
+    cache.put(key("recipe_ingredients", "amount, foods(food_name, protein)"), frame())
+    cache.put(key("recipes"), frame())
+    cache.invalidate("foods")
+    assert cache.get(key("foods")) is None and cache.get(key("foods", user="u2")) is None
+    assert cache.get(key("recipe_ingredients", "amount, foods(food_name, protein)")) is None
+    assert cache.get(key("recipes")) is not None
+
+def test_cached_rpc_is_per_user_and_dropped_with_its_tables(monkeypatch):
+    calls = []
+
+    class Client:
+        def rpc(self, function):
+            calls.append((function, st.session_state.user.id))
+            return SimpleNamespace(execute=lambda: SimpleNamespace(data=[{"total": len(calls)}]))
+    cache = TableCache()
+    monkeypatch.setattr(nutrack_utils, "supabase", Client())
+    monkeypatch.setattr(nutrack_utils, "_table_cache", lambda: cache)
+    monkeypatch.setitem(st.session_state, "user", SimpleNamespace(id="u1"))
+
+    def stats():
+        return cached_rpc("get_workout_stats", ["workouts", "workout_exercises"])["total"].item()
+    assert stats() == 1 and stats() == 1
+    st.session_state.user = SimpleNamespace(id="u2")  # signed in as someone else in the same session
+    assert stats() == 2
+    cache.invalidate("workout_exercises")
+    assert stats() == 3
+    st.session_state.user = SimpleNamespace(id="u1")
+    assert stats() == 4
+    cache.invalidate("foods")
+    assert stats() == 4 and calls[-1] == ("get_workout_stats", "u1")
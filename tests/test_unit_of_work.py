@@ -0,0 +1,87 @@
+"""UnitOfWork commits through an RPC, falls back to bulk inserts and rolls back partial writes."""
+import pytest
+from postgrest.exceptions import APIError
+
+from nutrack_sqlite import SQLiteClient
+from nutrack_utils import UnitOfWork
+
+class RecordingClient(SQLiteClient):
+    """Records the table of every delete, in order"""
+
+    def __init__(self):
+        super().__init__()
+        self.deleted = []
+
+    def table(self, name):
+        builder = super().table(name)
+        delete = builder.delete
+
+        def recorded_delete():
+            self.deleted.append(name)
+            return delete()
+        builder.delete = recorded_delete
+        return builder
+
+class FailingRPCClient(SQLiteClient):
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+    def rpc(self, fn, params=None):
+        raise self.error
+
+def meal(client, foods, recipes=()):
+    uow = UnitOfWork(client)
+    uow.set_parent("meals", {"user_id": "u1", "meal_desc": "Lunch", "created_at": "2024-05-01T12:00:00"}, key="meal_id")
+    uow.add("meal_foods", foods)
+    uow.add("meal_recipes", list(recipes))
+    return uow
+
+def rows(client, table):
+    return client.table(table).select("*").execute().data
+
+@pytest.fixture
+def client():
+    return RecordingClient()
+
+def test_rpc_writes_parent_and_children(client):
+    result = meal(client, [{"food_id": 1, "amount": 100.0}], [{"recipe_id": 2, "amount": 50.0}]).commit(rpc="save_meal")
+    assert result.ok
+    meal_id = result.inserted["meals"][0]["meal_id"]
+    assert [row["meal_id"] for row in rows(client, "meal_foods") + rows(client, "meal_recipes")] == [meal_id, meal_id]
+
+def test_missing_rpc_falls_back_to_bulk_inserts(client):
+    result = meal(client, [{"food_id": 1, "amount": 100.0}, {"food_id": 2, "amount": 20.0}]).commit(rpc="not_deployed")
+    assert result.ok and not result.rolled_back
+    meal_id = result.inserted["meals"][0]["meal_id"]
+    assert [(row["meal_id"], row["food_id"]) for row in rows(client, "meal_foods")] == [(meal_id, 1), (meal_id, 2)]
+    assert "meal_recipes" not in result.inserted  # an empty table is not written
+
+def test_failed_child_rolls_back_children_before_parent(client):
+    uow = meal(client, [{"food_id": 1, "amount": 100.0}], [{"recipe_id": 2, "no_such_column": 1}])
+    result = uow.commit()
+    assert not result.ok and result.rolled_back
+    assert "meal_recipes" in result.failed
+    assert client.deleted == ["meal_foods", "meals"]
+    assert rows(client, "meals") == [] and rows(client, "meal_foods") == []
+    assert result.inserted == {}
+
+def test_rpc_errors_other_than_missing_function_are_not_retried():
+    client = FailingRPCClient(APIError({"code": "23503", "message": "violates foreign key constraint"}))
+    result = meal(client, [{"food_id": 1, "amount": 100.0}]).commit(rpc="save_meal")
+    assert result.failed == {"save_meal": "violates foreign key constraint"}
+    assert rows(client, "meals") == []
+
+def test_transport_errors_are_reported_without_falling_back():
+    client = FailingRPCClient(TimeoutError("read timed out"))
+    result = meal(client, [{"food_id": 1, "amount": 100.0}]).commit(rpc="save_meal")
+    assert result.error_summary() == "save_meal: read timed out"
+    assert rows(client, "meals") == []
+
+def test_without_parent_each_table_is_one_insert(client):
+    uow = UnitOfWork(client)
+    uow.add("exercises", [{"exercise_name": "Squat"}, {"exercise_name": "Bench"}])
+    uow.add("exercises", {"exercise_name": "Row"})
+    result = uow.commit(rpc="save_meal")  # ignored without a parent
+    assert result.ok
+    assert [row["exercise_name"] for row in result.inserted["exercises"]] == ["Squat", "Bench", "Row"]
@@ -0,0 +1,93 @@
+"""Workout history import from strength CSVs and GPX tracks into the SQLite stand-in."""
+import io
+
+import pandas as pd
+import pytest
+
+from nutrack_sqlite import SQLiteClient
+from nutrack_workout_import import (
+    WorkoutImportStats, haversine_km, import_workouts, read_gpx, read_sources, read_strength_csv
+)
+
+# One row per set, as Strong exports it
+STRONG = b"""Date,Workout Name,Exercise Name,Set Order,Weight,Reps,Distance,Seconds,Notes
+2024-05-01 07:00:00,Push,Bench Press,1,80,5,0,0,
+2024-05-01 07:00:00,Push,bench  press,2,80,5,0,0,felt good
+2024-05-01 07:00:00,Push,Bench Press,3,85,3,0,0,
+2024-05-01 07:00:00,Push,Rowing Machine,1,0,0,2.5,600,
+2024-05-03 07:00:00,Legs,Squat,1,100,5,0,0,
+2024-05-03 07:00:00,Legs,Squat,2,100,5,0,0,
+not a date,Legs,Squat,3,100,5,0,0,
+2024-05-03 07:00:00,Legs,,1,100,5,0,0,
+2024-05-03 07:00:00,Legs,Plank,1,0,0,0,0,
+"""
+
+GPX = b"""<?xml version="1.0"?>
+<gpx xmlns="http://www.topografix.com/GPX/1/1"><trk><name>Morning Ride</name><type>road_cycling</type><trkseg>
+<trkpt lat="51.0" lon="0.0"><time>2024-05-02T06:00:00Z</time></trkpt>
+<trkpt lat="51.1" lon="0.0"><time>2024-05-02T06:20:00Z</time></trkpt>
+<trkpt lat="51.2" lon="0.0"><time>2024-05-02T06:45:00Z</time></trkpt>
+</trkseg></trk></gpx>
+"""
+
+def logs(chunksize=100):
+    stats = WorkoutImportStats()
+    return pd.concat(list(read_strength_csv(io.BytesIO(STRONG), stats, chunksize=chunksize))), stats
+
+def test_consecutive_identical_sets_fold_into_one_log():
+    frame, stats = logs()
+    bench = frame[frame["exercise_name"].str.casefold() == "bench press"]
+    assert bench[["sets", "reps", "weight"]].values.tolist() == [[2, 5, 80], [1, 3, 85]]
+    assert bench["exercise_name"].iloc[0] == "Bench Press" and bench["notes"].iloc[0] == "felt good"
+    rowing = frame[frame["exercise_name"] == "Rowing Machine"].iloc[0]
+    assert rowing["exercise_type"] == "cardio" and rowing["duration"] == 10 and rowing["distance"] == 2.5
+    assert stats.read == 9
+    assert dict(stats.rejected) == {"bad date": 1, "missing exercise": 1, "nothing logged": 1}
+
+def test_chunks_never_split_a_workout():
+    frame, _ = logs(chunksize=2)
+    squat = frame[frame["exercise_name"] == "Squat"]
+    assert squat["sets"].tolist() == [2]
+    pd.testing.assert_frame_equal(frame.reset_index(drop=True), logs()[0].reset_index(drop=True))
+
+def test_rows_with_a_sets_column_are_not_folded():
+    csv = b"Date,Exercise,Sets,Reps,Weight\n2024-05-01,Curl,3,10,12\n2024-05-01,Curl,3,10,12\n"
+    frame = pd.concat(list(read_strength_csv(io.BytesIO(csv), WorkoutImportStats())))
+    assert frame["sets"].tolist() == [3, 3]
+    assert frame["workout_name"].tolist() == ["Imported workout"] * 2
+
+def test_missing_required_columns_are_an_error():
+    with pytest.raises(ValueError, match="exercise_name"):
+        list(read_strength_csv(io.BytesIO(b"Date,Reps\n2024-05-01,5\n"), WorkoutImportStats()))
+
+def test_haversine_measures_a_degree_of_latitude():
+    assert haversine_km([0.0, 1.0], [0.0, 0.0])[0] == pytest.approx(111.19, abs=0.01)
+
+def test_gpx_track_becomes_one_cardio_log():
+    log = read_gpx(io.BytesIO(GPX)).iloc[0]
+    assert log["workout_name"] == "Morning Ride" and log["exercise_name"] == "Road Cycling"
+    assert log["workout_date"] == "2024-05-02" and log["duration"] == 45
+    assert log["distance"] == pytest.approx(22.24, abs=0.01)
+
+def test_unreadable_gpx_is_counted_not_raised():
+    stats = WorkoutImportStats()
+    gpx = io.BytesIO(GPX.replace(b"<time>", b"<when>").replace(b"</time>", b"</when>"))
+    gpx.name = "ride.gpx"
+    assert list(read_sources([gpx], stats)) == []
+    assert list(stats.rejected) == ["unreadable GPX (GPX trackpoints have no timestamps)"]
+
+def test_import_writes_workouts_once_and_reuses_exercises():
+    client = SQLiteClient()
+    client.user_id = "u1"
+    client.table("exercises").insert({"exercise_name": "SQUAT", "exercise_type": "strength"}).execute()
+    frames = [*read_strength_csv(io.BytesIO(STRONG), WorkoutImportStats()), read_gpx(io.BytesIO(GPX))]
+    stats = import_workouts(client, "u1", frames)
+    assert (stats.workouts, stats.logs, stats.exercises_created) == (3, 5, 3)
+    exercises = {row["exercise_name"]: row["exercise_id"] for row in client.table("exercises").select("*").execute().data}
+    assert sorted(exercises) == ["Bench Press", "Road Cycling", "Rowing Machine", "SQUAT"]
+    squat = client.table("workout_exercises").select("*").eq("exercise_id", exercises["SQUAT"]).execute().data
+    assert [(row["sets"], row["reps"], row["weight"], row["user_id"]) for row in squat] == [(2, 5, 100, "u1")]
+
+    again = import_workouts(client, "u1", [*read_strength_csv(io.BytesIO(STRONG), WorkoutImportStats())])
+    assert (again.workouts, again.skipped) == (0, 2)
+    assert len(client.table("workouts").select("*").execute().data) == 3